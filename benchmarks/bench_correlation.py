@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""Compares response correlation with 10k outstanding requests.
+
+The old way keys a dict by str(id(deferred)) and adds a reactor timeout per request,
+the new way uses the client correlation table and its shared timing wheel.
+"""
+
+import timeit
+
+from twisted.internet import defer, reactor
+
+from ctrader_open_api.correlation import CorrelationTable
+from ctrader_open_api.timingWheel import TimingWheel
+
+OUTSTANDING = 10000
+
+
+def oldCorrelation():
+    deferreds = dict()
+    ids = []
+    for _ in range(OUTSTANDING):
+        deferred = defer.Deferred()
+        clientMsgId = str(id(deferred))
+        deferreds[clientMsgId] = deferred
+        deferred.addTimeout(5, reactor)
+        ids.append(clientMsgId)
+    for clientMsgId in ids:
+        deferreds.pop(clientMsgId).callback(None)
+
+
+def newCorrelation():
+    table = CorrelationTable(TimingWheel())
+    ids = []
+    for _ in range(OUTSTANDING):
+        deferred = defer.Deferred()
+        clientMsgId = table.nextId()
+        table.add(clientMsgId, deferred, 5)
+        ids.append(clientMsgId)
+    for clientMsgId in ids:
+        table.pop(clientMsgId).callback(None)
+    table.timingWheel.stop()
+
+
+if __name__ == "__main__":
+    for name, function in [("str(id()) + addTimeout", oldCorrelation), ("CorrelationTable", newCorrelation)]:
+        seconds = min(timeit.repeat(function, number=1, repeat=5))
+        print(f"{name:>24}: {seconds * 1000:8.2f} ms for {OUTSTANDING} requests ({seconds / OUTSTANDING * 1e6:.2f} us/request)")
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+"""Measures the cold import time of the package entry points, each one in a new interpreter."""
+
+import os
+import subprocess
+import sys
+
+STATEMENTS = [
+    "import ctrader_open_api",
+    "from ctrader_open_api.decode import readSession",
+    "from ctrader_open_api import Protobuf; Protobuf.get(2131)",
+    "from ctrader_open_api import Client",
+    "from ctrader_open_api import Client, AccountState, PnlEngine, RiskGate",
+]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measureImport(statement, repeat=5):
+    """Returns the best seconds to run statement in a new interpreter, without the interpreter start up."""
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    return min(float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=environment).stdout)
+               for _ in range(repeat))
+
+
+if __name__ == "__main__":
+    for statement in STATEMENTS:
+        print(f"{measureImport(statement) * 1000:8.2f} ms  {statement}")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""Compares MessageToJson with JsonEncoder on symbol and deal lists of the size a real account returns."""
+
+import timeit
+
+from google.protobuf.json_format import MessageToJson
+
+from ctrader_open_api.jsonEncoder import JsonEncoder
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASymbolsListRes, ProtoOADealListRes
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOATradeSide, ProtoOADealStatus
+
+SYMBOLS = 5000
+DEALS = 10000
+
+
+def symbolsListRes():
+    response = ProtoOASymbolsListRes(ctidTraderAccountId=12345678)
+    for symbolId in range(SYMBOLS):
+        response.symbol.add(symbolId=symbolId, symbolName=f"SYMBOL{symbolId}", enabled=True, baseAssetId=symbolId % 50,
+                            quoteAssetId=symbolId % 7, symbolCategoryId=symbolId % 20, description=f"Symbol number {symbolId}")
+    return response
+
+
+def dealListRes():
+    response = ProtoOADealListRes(ctidTraderAccountId=12345678, hasMore=False)
+    for dealId in range(DEALS):
+        deal = response.deal.add(dealId=dealId, orderId=dealId, positionId=dealId // 2, volume=100000, filledVolume=100000,
+                                 symbolId=dealId % 30, createTimestamp=1700000000000 + dealId, executionTimestamp=1700000000000 + dealId,
+                                 executionPrice=1.08123 + dealId / 1e6, tradeSide=ProtoOATradeSide.BUY,
+                                 dealStatus=ProtoOADealStatus.FILLED, commission=-350, moneyDigits=2)
+        if dealId % 2:
+            deal.closePositionDetail.entryPrice = 1.08
+            deal.closePositionDetail.grossProfit = 1200
+            deal.closePositionDetail.swap = 0
+            deal.closePositionDetail.commission = -350
+            deal.closePositionDetail.balance = 100000000
+            deal.closePositionDetail.closedVolume = 100000
+    return response
+
+
+if __name__ == "__main__":
+    encoder = JsonEncoder()
+    for payloadName, message in [(f"{SYMBOLS} symbols", symbolsListRes()), (f"{DEALS} deals", dealListRes())]:
+        for name, function in [("MessageToJson", lambda: MessageToJson(message)), ("JsonEncoder", lambda: encoder.encode(message)),
+                               ("JsonEncoder.iterEncode", lambda: sum(len(chunk) for chunk in encoder.iterEncode(message))),
+                               ("SerializeToString", lambda: message.SerializeToString())]:
+            seconds = min(timeit.repeat(function, number=1, repeat=3))
+            print(f"{payloadName:>13} {name:>22}: {seconds * 1000:8.2f} ms")
+        print(f"{payloadName:>13} sizes: {len(MessageToJson(message))} bytes MessageToJson, {len(encoder.encode(message))} bytes JsonEncoder, "
+              f"{message.ByteSize()} bytes protobuf")
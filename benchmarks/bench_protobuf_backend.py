@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""Compares the protobuf backends on the message mix of a trading session, each backend in a new interpreter.
+
+For each received message the frame is parsed into a ProtoMessage and its payload is extracted, for each sent order the
+request is serialized and wrapped in a ProtoMessage, like TcpProtocol does. Backends that are not installed are skipped.
+"""
+
+import os
+import subprocess
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKENDS = ("python", "cpp", "upb")
+# Received messages of each kind in a mix of 1000 messages, and orders sent
+MIX = {"spot": 800, "depth": 100, "execution": 40, "heartbeat": 10, "order": 50}
+
+
+def buildMix():
+    from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage, ProtoHeartbeatEvent
+    from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent, ProtoOADepthEvent, ProtoOAExecutionEvent, ProtoOANewOrderReq
+    from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOADepthQuote, ProtoOAOrder, ProtoOATradeData
+
+    def frame(payload):
+        return ProtoMessage(payloadType=payload.payloadType, payload=payload.SerializePartialToString()).SerializeToString()
+
+    spot = ProtoOASpotEvent(ctidTraderAccountId=12345678, symbolId=1, bid=108123, ask=108125, timestamp=1700000000000)
+    depth = ProtoOADepthEvent(ctidTraderAccountId=12345678, symbolId=1, deletedQuotes=[1, 2, 3],
+                              newQuotes=[ProtoOADepthQuote(id=index, size=100000 * index, bid=108100 - index) for index in range(10)])
+    tradeData = ProtoOATradeData(symbolId=1, volume=100000, tradeSide=1, openTimestamp=1700000000000, label="strategy")
+    execution = ProtoOAExecutionEvent(ctidTraderAccountId=12345678, executionType=2,
+                                      order=ProtoOAOrder(orderId=1, tradeData=tradeData, orderType=1, orderStatus=1, clientOrderId="1"))
+    received = [frame(spot)] * MIX["spot"] + [frame(depth)] * MIX["depth"] + [frame(execution)] * MIX["execution"] + \
+        [frame(ProtoHeartbeatEvent())] * MIX["heartbeat"]
+    order = ProtoOANewOrderReq(ctidTraderAccountId=12345678, symbolId=1, orderType=1, tradeSide=1, volume=100000, label="strategy")
+    return received, [order] * MIX["order"]
+
+
+def runMix(repeat=5):
+    """Returns the best seconds per message of the mix with the backend of this interpreter."""
+    from ctrader_open_api.protobuf import Protobuf
+    from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+    received, orders = buildMix()
+
+    def run():
+        for data in received:
+            Protobuf.extract(ProtoMessage.FromString(data))
+        for index, order in enumerate(orders):
+            ProtoMessage(payloadType=order.payloadType, payload=order.SerializeToString(), clientMsgId=str(index)).SerializeToString()
+
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / (len(received) + len(orders))
+
+
+def measureBackend(backend):
+    """Returns the seconds per message of backend, or None if it's not installed."""
+    code = ("from google.protobuf.internal import api_implementation; import bench_protobuf_backend; "
+            "print(api_implementation.Type(), bench_protobuf_backend.runMix())")
+    paths = [ROOT, os.path.dirname(os.path.abspath(__file__)), os.environ.get("PYTHONPATH")]
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, paths)), PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=backend)
+    process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=environment)
+    if process.returncode != 0:
+        return None
+    active, seconds = process.stdout.split()
+    # protobuf falls back to another backend if the requested one is not installed
+    return float(seconds) if active == backend else None
+
+
+if __name__ == "__main__":
+    print(f"Message mix: {', '.join(f'{count} {kind}' for kind, count in MIX.items())}")
+    results = {backend: measureBackend(backend) for backend in BACKENDS}
+    for backend, seconds in results.items():
+        if seconds is None:
+            print(f"{backend:>8}: not available")
+        else:
+            print(f"{backend:>8}: {seconds * 1e6:8.2f} us/message, {results['python'] / seconds:5.1f}x python")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""Compares scheduling and canceling many timeouts with reactor callLater and with the client timing wheel."""
+
+import random
+import timeit
+
+from twisted.internet import reactor
+
+from ctrader_open_api.timingWheel import TimingWheel
+
+OUTSTANDING = 100000
+DELAYS = [random.uniform(1, 120) for _ in range(OUTSTANDING)]
+
+
+def reactorCallLater():
+    calls = [reactor.callLater(delay, id, None) for delay in DELAYS]
+    for call in calls:
+        call.cancel()
+    # Canceled calls are removed from reactor heap on next iteration
+    reactor.runUntilCurrent()
+
+
+def timingWheel():
+    wheel = TimingWheel()
+    handles = [wheel.callLater(delay, id, None) for delay in DELAYS]
+    for handle in handles:
+        handle.cancel()
+    wheel.stop()
+
+
+if __name__ == "__main__":
+    for name, function in [("reactor.callLater", reactorCallLater), ("TimingWheel", timingWheel)]:
+        seconds = min(timeit.repeat(function, number=1, repeat=5))
+        print(f"{name:>18}: {seconds * 1000:8.2f} ms for {OUTSTANDING} timers ({seconds / OUTSTANDING * 1e6:.2f} us/timer)")
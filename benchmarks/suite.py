@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+"""Benchmarks of the client hot paths, with results saved as JSON to compare runs.
+
+    python benchmarks/suite.py --save benchmarks/results/baseline.json
+    python benchmarks/suite.py --compare benchmarks/results/baseline.json
+
+A benchmark is reported as a regression if its best time per operation is more than threshold slower than in the compared
+results, and the command exits with status 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from contextlib import contextmanager
+
+from bench_import import measureImport
+from google.protobuf.internal import api_implementation
+from twisted.internet import defer, reactor
+from twisted.internet.endpoints import TCP4ClientEndpoint
+from twisted.internet.protocol import Factory as ServerFactory
+from twisted.internet.testing import StringTransport
+from twisted.protocols.basic import Int32StringReceiver
+
+import ctrader_open_api.client
+from ctrader_open_api import Client, Protobuf, TcpProtocol
+from ctrader_open_api.factory import Factory
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent, ProtoOAVersionReq, ProtoOAVersionRes, ProtoOANewOrderReq
+
+BENCHMARKS = dict()
+# Cold import times, each measured in a new interpreter
+IMPORT_BENCHMARKS = {
+    "importPackage": "import ctrader_open_api",
+    "importDecode": "from ctrader_open_api.decode import readSession",
+    "importClient": "from ctrader_open_api import Client",
+}
+
+
+def benchmark(operations):
+    """Registers a function that returns a callable doing operations operations."""
+    def register(function):
+        BENCHMARKS[function.__name__] = (function, operations)
+        return function
+    return register
+
+
+def spotMessage(bid=108123):
+    event = ProtoOASpotEvent(ctidTraderAccountId=12345678, symbolId=1, bid=bid, ask=bid + 2, timestamp=1700000000000)
+    return ProtoMessage(payloadType=event.payloadType, payload=event.SerializeToString())
+
+
+def connectedProtocol(client, numberOfMessagesToSendPerSecond=5):
+    client.numberOfMessagesToSendPerSecond = numberOfMessagesToSendPerSecond
+    protocol = TcpProtocol()
+    protocol.factory = Factory(client=client)
+    protocol.makeConnection(StringTransport())
+    protocol._send_task.stop()
+    return protocol
+
+
+@benchmark(10000)
+def protobufGet():
+    payloadTypes = [ProtoOASpotEvent().payloadType, ProtoOAVersionReq().payloadType, ProtoOANewOrderReq().payloadType] * 3334
+    def run():
+        for payloadType in payloadTypes[:10000]:
+            Protobuf.get(payloadType)
+    return run
+
+
+@benchmark(10000)
+def protobufExtract():
+    message = spotMessage()
+    def run():
+        for _ in range(10000):
+            Protobuf.extract(message)
+    return run
+
+
+@benchmark(10000)
+def tcpProtocolSend():
+    protocol = connectedProtocol(Client("localhost", 5035, TcpProtocol))
+    order = ProtoOANewOrderReq(ctidTraderAccountId=12345678, symbolId=1, orderType=1, tradeSide=1, volume=100000)
+    def run():
+        protocol._send_queue.clear()
+        for clientMsgId in range(10000):
+            protocol.send(order, clientMsgId=str(clientMsgId))
+    return run
+
+
+@benchmark(10000)
+def sendStringsDrain():
+    protocol = connectedProtocol(Client("localhost", 5035, TcpProtocol), numberOfMessagesToSendPerSecond=10000)
+    data = ProtoMessage(payloadType=ProtoOAVersionReq().payloadType, payload=b"", clientMsgId="1").SerializeToString()
+    def run():
+        protocol.transport.clear()
+        protocol._send_queue.extend([None, data, None, None] for _ in range(10000))
+        protocol._sendStrings()
+    return run
+
+
+@benchmark(10000)
+def stringReceived():
+    client = Client("localhost", 5035, TcpProtocol)
+    protocol = connectedProtocol(client)
+    data = spotMessage().SerializeToString()
+    def run():
+        for _ in range(10000):
+            protocol.stringReceived(data)
+    return run
+
+
+@benchmark(10000)
+def clientSendCorrelation():
+    client = Client("localhost", 5035, TcpProtocol)
+    request = ProtoOAVersionReq()
+    response = ProtoMessage(payloadType=ProtoOAVersionRes().payloadType, payload=ProtoOAVersionRes(version="1").SerializeToString())
+    def run():
+        for clientMsgId in range(10000):
+            response.clientMsgId = str(clientMsgId)
+            client.send(request, clientMsgId=response.clientMsgId)
+            client._received(response)
+    return run
+
+
+class StandInServer(Int32StringReceiver):
+    """Answers each request with a ProtoOAVersionRes that has the request clientMsgId."""
+    MAX_LENGTH = 15000000
+    RESPONSE_PAYLOAD = ProtoOAVersionRes(version="stand-in").SerializeToString()
+    RESPONSE_PAYLOAD_TYPE = ProtoOAVersionRes().payloadType
+
+    def stringReceived(self, data):
+        request = ProtoMessage.FromString(data)
+        if request.clientMsgId:
+            response = ProtoMessage(payloadType=self.RESPONSE_PAYLOAD_TYPE, payload=self.RESPONSE_PAYLOAD, clientMsgId=request.clientMsgId)
+            self.sendString(response.SerializeToString())
+
+
+@contextmanager
+def plainTcpClients(port):
+    # The stand-in server has no TLS, so clients connect to it with a TCP endpoint
+    clientFromString = ctrader_open_api.client.clientFromString
+    ctrader_open_api.client.clientFromString = lambda reactor, description: TCP4ClientEndpoint(reactor, "127.0.0.1", port)
+    try:
+        yield
+    finally:
+        ctrader_open_api.client.clientFromString = clientFromString
+
+
+def roundTrips(requestsCount=1000, repeat=5):
+    """Sends requestsCount requests through a connected client and a local server, returns the best seconds per round trip."""
+    port = reactor.listenTCP(0, ServerFactory.forProtocol(StandInServer), interface="127.0.0.1")
+    with plainTcpClients(port.getHost().port):
+        client = Client("localhost", port.getHost().port, TcpProtocol, numberOfMessagesToSendPerSecond=requestsCount)
+    timings = []
+
+    @defer.inlineCallbacks
+    def run():
+        try:
+            protocol = yield client.whenConnected()
+            for _ in range(repeat):
+                start = time.perf_counter()
+                deferreds = [client.send(ProtoOAVersionReq()) for _ in range(requestsCount)]
+                # The send queue is drained now instead of waiting for the next second of the send loop
+                protocol._sendStrings()
+                yield defer.gatherResults(deferreds)
+                timings.append((time.perf_counter() - start) / requestsCount)
+        finally:
+            client.stopService()
+            yield port.stopListening()
+            reactor.stop()
+
+    client.startService()
+    reactor.callWhenRunning(run)
+    reactor.run()
+    return min(timings), sorted(timings)[len(timings) // 2]
+
+
+def getCommit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def runAll(names, repeat):
+    results = dict()
+    for name in names:
+        if name == "roundTrip":
+            best, median = roundTrips()
+        elif name in IMPORT_BENCHMARKS:
+            timings = sorted(measureImport(IMPORT_BENCHMARKS[name], repeat=1) for _ in range(repeat))
+            best, median = timings[0], timings[len(timings) // 2]
+        else:
+            function, operations = BENCHMARKS[name]
+            timings = [seconds / operations for seconds in timeit.repeat(function(), number=1, repeat=repeat)]
+            best, median = min(timings), sorted(timings)[len(timings) // 2]
+        results[name] = {"best": best, "median": median}
+        print(f"{name:>22}: {best * 1e6:10.3f} us/op best, {median * 1e6:10.3f} us/op median")
+    return results
+
+
+def compare(results, path, threshold):
+    with open(path) as file:
+        previous = json.load(file)
+    regressions = []
+    print(f"Compared with {path} (commit {previous.get('commit')}):")
+    for name, result in results.items():
+        if name not in previous["benchmarks"]:
+            continue
+        ratio = result["best"] / previous["benchmarks"][name]["best"]
+        isRegression = ratio > 1 + threshold
+        print(f"{name:>22}: {ratio:6.2f}x{'  REGRESSION' if isRegression else ''}")
+        if isRegression:
+            regressions.append(name)
+    if previous.get("protobufBackend") != api_implementation.Type():
+        print(f"Warning: protobuf backend was {previous.get('protobufBackend')}, it's {api_implementation.Type()} now")
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    allNames = list(BENCHMARKS) + list(IMPORT_BENCHMARKS) + ["roundTrip"]
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run, all by default: {', '.join(allNames)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="JSON file to save the results to")
+    parser.add_argument("--compare", help="JSON file saved by a previous run")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    arguments = parser.parse_args(arguments)
+    unknownNames = set(arguments.names) - set(allNames)
+    if unknownNames:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknownNames))}")
+    results = runAll(arguments.names or allNames, arguments.repeat)
+    if arguments.save:
+        os.makedirs(os.path.dirname(arguments.save) or ".", exist_ok=True)
+        with open(arguments.save, "w") as file:
+            json.dump({"commit": getCommit(), "python": sys.version.split()[0], "machine": platform.platform(),
+                       "protobufBackend": api_implementation.Type(), "benchmarks": results}, file, indent=2)
+    if arguments.compare and compare(results, arguments.compare, arguments.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,58 @@
 """Top-level package for Spotware OpenApiPy."""
-from .client import Client
-from .protobuf import Protobuf
-from .tcpProtocol import TcpProtocol
-from .auth import Auth
-from .endpoints import EndPoints
+import importlib
+
 __author__ = """Spotware"""
 __email__ = 'connect@spotware.com'
+
+# Submodules are imported when one of their names is used first, so importing the package or only decoding messages
+# doesn't import Twisted, requests and all the message modules
+_LAZY_NAMES = {
+    "Client": ".client",
+    "Superseded": ".client",
+    "Protobuf": ".protobuf",
+    "TcpProtocol": ".tcpProtocol",
+    "Auth": ".auth",
+    "EndPoints": ".endpoints",
+    "TokenManager": ".tokenManager",
+    "AccountRouter": ".accountRouter",
+    "AccountState": ".accountState",
+    "PnlEngine": ".pnlEngine",
+    "SubscriptionManager": ".subscriptionManager",
+    "RiskGate": ".riskGate",
+    "RiskCheckError": ".riskGate",
+    "SymbolLimits": ".riskGate",
+    "HistoryExporter": ".historyExporter",
+    "HistoryExportError": ".historyExporter",
+    "NpyChunkWriter": ".historyExporter",
+    "ParquetWriter": ".historyExporter",
+    "QuoteRing": ".sharedQuotes",
+    "SharedQuotePublisher": ".sharedQuotes",
+    "Offloader": ".offload",
+    "StaleResultError": ".offload",
+    "Backtester": ".backtest",
+    "SimulatedClient": ".backtest",
+    "UnsupportedMessageError": ".backtest",
+    "PushGateway": ".pushGateway",
+    "ResponseCache": ".responseCache",
+    "JsonEncoder": ".jsonEncoder",
+    "Conflator": ".conflator",
+    "EventLog": ".eventLog",
+    "MetricsRegistry": ".metrics",
+    "MetricsResource": ".metrics",
+    "StageProfiler": ".profiler",
+    "SessionRecorder": ".profiler",
+    "ProtobufBackend": ".protobufBackend",
+    "SlowProtobufWarning": ".protobufBackend",
+}
+__all__ = list(_LAZY_NAMES)
+
+def __getattr__(name):
+    moduleName = _LAZY_NAMES.get(name)
+    if moduleName is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(moduleName, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+from twisted.internet import defer
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (ProtoOAAccountAuthReq, ProtoOAAccountAuthRes, ProtoOAApplicationAuthRes,
+                                                           ProtoOAAccountDisconnectEvent, ProtoOAAccountsTokenInvalidatedEvent)
+
+class AccountRouter:
+    """Authorizes many trading accounts on one client and routes their messages by ctidTraderAccountId."""
+    ACCOUNT_AUTH_RES_PAYLOAD_TYPE = ProtoOAAccountAuthRes().payloadType
+    APPLICATION_AUTH_RES_PAYLOAD_TYPE = ProtoOAApplicationAuthRes().payloadType
+    ACCOUNT_DISCONNECT_PAYLOAD_TYPE = ProtoOAAccountDisconnectEvent().payloadType
+    TOKEN_INVALIDATED_PAYLOAD_TYPE = ProtoOAAccountsTokenInvalidatedEvent().payloadType
+
+    def __init__(self, client, accessToken=None, tokenManager=None, reauthorizeOnApplicationAuth=True):
+        self.client = client
+        self.tokenManager = tokenManager
+        self.reauthorizeOnApplicationAuth = reauthorizeOnApplicationAuth
+        self._accessToken = accessToken
+        self._accountIds = set()
+        self._authorizedAccountIds = set()
+        self._invalidatedAccountIds = set()
+        self._handlers = dict()
+        self._accountIdFields = dict()
+        client.addMessageListener(self._onMessageReceived)
+        if tokenManager is not None:
+            tokenManager.addTokenRefreshedCallback(self._onTokenRefreshed)
+
+    @property
+    def accessToken(self):
+        if self.tokenManager is not None:
+            return self.tokenManager.accessToken
+        return self._accessToken
+
+    @property
+    def authorizedAccountIds(self):
+        return frozenset(self._authorizedAccountIds)
+
+    def isAuthorized(self, accountId):
+        return int(accountId) in self._authorizedAccountIds
+
+    def setAccountHandler(self, accountId, handler):
+        self._handlers[int(accountId)] = handler
+
+    def removeAccountHandler(self, accountId):
+        self._handlers.pop(int(accountId), None)
+
+    def setDefaultHandler(self, handler):
+        self._defaultHandler = handler
+
+    def authorizeAccounts(self, accountIds, accessToken=None):
+        deferreds = []
+        for accountId in accountIds:
+            accountId = int(accountId)
+            self._accountIds.add(accountId)
+            request = ProtoOAAccountAuthReq(ctidTraderAccountId=accountId, accessToken=accessToken or self.accessToken)
+            deferred = self.client.send(request)
+            deferred.addCallback(self._onAccountAuthRes, accountId)
+            deferreds.append(deferred)
+        return defer.gatherResults(deferreds, consumeErrors=True)
+
+    def reauthorizeAll(self):
+        self._authorizedAccountIds.clear()
+        self._invalidatedAccountIds.clear()
+        return self.authorizeAccounts(sorted(self._accountIds))
+
+    def send(self, accountId, message, **kwargs):
+        if type(message) in [str, int]:
+            message = Protobuf.get(message)
+        message.ctidTraderAccountId = int(accountId)
+        return self.client.send(message, **kwargs)
+
+    def stop(self):
+        self.client.removeMessageListener(self._onMessageReceived)
+
+    def getAccountId(self, message):
+        payloadType = message.payloadType
+        if payloadType not in self._accountIdFields:
+            self._accountIdFields[payloadType] = Protobuf.get_field_number(payloadType, "ctidTraderAccountId")
+        fieldNumber = self._accountIdFields[payloadType]
+        if fieldNumber is None:
+            return None
+        return Protobuf.peek_varint(message.payload, fieldNumber)
+
+    def _onAccountAuthRes(self, message, accountId):
+        if message.payloadType == self.ACCOUNT_AUTH_RES_PAYLOAD_TYPE:
+            self._authorizedAccountIds.add(accountId)
+        return message
+
+    def _onTokenRefreshed(self, tokenManager):
+        # Accounts logged out by token invalidation are authorized again with the new token
+        if not self._invalidatedAccountIds:
+            return
+        accountIds, self._invalidatedAccountIds = sorted(self._invalidatedAccountIds), set()
+        self.authorizeAccounts(accountIds).addErrback(lambda failure: None)
+
+    def _onMessageReceived(self, client, message):
+        payloadType = message.payloadType
+        if payloadType == self.APPLICATION_AUTH_RES_PAYLOAD_TYPE:
+            if self.reauthorizeOnApplicationAuth and self._accountIds:
+                self.reauthorizeAll().addErrback(lambda failure: None)
+            return
+        if payloadType == self.TOKEN_INVALIDATED_PAYLOAD_TYPE:
+            event = Protobuf.extract(message)
+            for accountId in event.ctidTraderAccountIds:
+                self._authorizedAccountIds.discard(accountId)
+                if accountId in self._accountIds:
+                    self._invalidatedAccountIds.add(accountId)
+                self._dispatch(accountId, message)
+            return
+        accountId = self.getAccountId(message)
+        if accountId is None:
+            return
+        if payloadType == self.ACCOUNT_DISCONNECT_PAYLOAD_TYPE:
+            self._authorizedAccountIds.discard(accountId)
+        self._dispatch(accountId, message)
+
+    def _dispatch(self, accountId, message):
+        handler = self._handlers.get(accountId)
+        if handler is not None:
+            handler(self.client, message)
+        elif hasattr(self, "_defaultHandler"):
+            self._defaultHandler(self.client, message)
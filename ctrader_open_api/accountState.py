@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+
+from twisted.internet import task
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (ProtoOAReconcileReq, ProtoOAReconcileRes, ProtoOAExecutionEvent,
+                                                           ProtoOAOrderErrorEvent, ProtoOATraderUpdatedEvent, ProtoOATraderRes)
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOAPositionStatus, ProtoOAOrderStatus, ProtoOATradeSide
+
+class AccountState:
+    """In-memory positions, orders and trader state of one account, kept in sync from execution events."""
+    RECONCILE_RES_PAYLOAD_TYPE = ProtoOAReconcileRes().payloadType
+    EXECUTION_EVENT_PAYLOAD_TYPE = ProtoOAExecutionEvent().payloadType
+    ORDER_ERROR_EVENT_PAYLOAD_TYPE = ProtoOAOrderErrorEvent().payloadType
+    TRADER_UPDATED_EVENT_PAYLOAD_TYPE = ProtoOATraderUpdatedEvent().payloadType
+    TRADER_RES_PAYLOAD_TYPE = ProtoOATraderRes().payloadType
+    PAYLOAD_TYPES = frozenset([RECONCILE_RES_PAYLOAD_TYPE, EXECUTION_EVENT_PAYLOAD_TYPE, ORDER_ERROR_EVENT_PAYLOAD_TYPE,
+                               TRADER_UPDATED_EVENT_PAYLOAD_TYPE, TRADER_RES_PAYLOAD_TYPE])
+    CLOSED_POSITION_STATUSES = frozenset([ProtoOAPositionStatus.POSITION_STATUS_CLOSED, ProtoOAPositionStatus.POSITION_STATUS_ERROR])
+
+    def __init__(self, accountId, client=None):
+        self.accountId = int(accountId)
+        self.client = client
+        self.trader = None
+        self.isSeeded = False
+        self.driftCount = 0
+        self._positions = dict()
+        self._orders = dict()
+        self._positionIdsBySymbol = dict()
+        self._orderIdsBySymbol = dict()
+        self._netVolumes = dict()
+        self._pendingNetVolumes = dict()
+        self._orderErrors = dict()
+        self._updateCallbacks = []
+        self._driftCheckTask = None
+        if client is not None:
+            client.addMessageListener(self.onMessage)
+
+    def addUpdateCallback(self, callback):
+        self._updateCallbacks.append(callback)
+
+    def reconcile(self, responseTimeoutInSeconds=5):
+        deferred = self.client.send(ProtoOAReconcileReq(ctidTraderAccountId=self.accountId), responseTimeoutInSeconds=responseTimeoutInSeconds)
+        deferred.addCallback(lambda message: self if message.payloadType == self.RECONCILE_RES_PAYLOAD_TYPE else message)
+        return deferred
+
+    def startDriftCheck(self, intervalInSeconds=60):
+        self.stopDriftCheck()
+        self._driftCheckTask = task.LoopingCall(lambda: self.reconcile().addErrback(lambda failure: None))
+        self._driftCheckTask.start(intervalInSeconds, now=not self.isSeeded)
+
+    def stopDriftCheck(self):
+        if self._driftCheckTask is not None and self._driftCheckTask.running:
+            self._driftCheckTask.stop()
+        self._driftCheckTask = None
+
+    def stop(self):
+        self.stopDriftCheck()
+        if self.client is not None:
+            self.client.removeMessageListener(self.onMessage)
+
+    def getPosition(self, positionId):
+        return self._positions.get(positionId)
+
+    def getOrder(self, orderId):
+        return self._orders.get(orderId)
+
+    def getPositions(self):
+        return list(self._positions.values())
+
+    def getOrders(self):
+        return list(self._orders.values())
+
+    def getPositionsBySymbol(self, symbolId):
+        return [self._positions[positionId] for positionId in self._positionIdsBySymbol.get(symbolId, ())]
+
+    def getOrdersBySymbol(self, symbolId):
+        return [self._orders[orderId] for orderId in self._orderIdsBySymbol.get(symbolId, ())]
+
+    def getNetVolume(self, symbolId):
+        return self._netVolumes.get(symbolId, 0)
+
+    def getNetVolumes(self):
+        return dict(self._netVolumes)
+
+    def getPendingNetVolume(self, symbolId):
+        return self._pendingNetVolumes.get(symbolId, 0)
+
+    def getOrderError(self, orderId):
+        return self._orderErrors.get(orderId)
+
+    def onMessage(self, client, message):
+        if message.payloadType not in self.PAYLOAD_TYPES:
+            return
+        payload = Protobuf.extract(message)
+        if payload.ctidTraderAccountId != self.accountId:
+            return
+        if message.payloadType == self.EXECUTION_EVENT_PAYLOAD_TYPE:
+            self.applyExecutionEvent(payload)
+        elif message.payloadType == self.RECONCILE_RES_PAYLOAD_TYPE:
+            self.loadReconcile(payload)
+        elif message.payloadType == self.ORDER_ERROR_EVENT_PAYLOAD_TYPE:
+            self._orderErrors[payload.orderId] = payload
+        else:
+            self.trader = payload.trader
+        for callback in self._updateCallbacks:
+            callback(self, payload)
+
+    def loadReconcile(self, reconcileRes):
+        positions = {position.positionId: position for position in reconcileRes.position}
+        orders = {order.orderId: order for order in reconcileRes.order}
+        if self.isSeeded and not self._isSame(positions, orders):
+            self.driftCount += 1
+        self._positions.clear()
+        self._orders.clear()
+        self._positionIdsBySymbol.clear()
+        self._orderIdsBySymbol.clear()
+        self._netVolumes.clear()
+        self._pendingNetVolumes.clear()
+        self._orderErrors.clear()
+        for position in positions.values():
+            self._storePosition(position)
+        for order in orders.values():
+            self._storeOrder(order)
+        self.isSeeded = True
+
+    def applyExecutionEvent(self, executionEvent):
+        if executionEvent.HasField("position"):
+            position = executionEvent.position
+            if position.positionStatus in self.CLOSED_POSITION_STATUSES:
+                self._removePosition(position.positionId)
+            else:
+                self._storePosition(position)
+        if executionEvent.HasField("order"):
+            order = executionEvent.order
+            if order.orderStatus == ProtoOAOrderStatus.ORDER_STATUS_ACCEPTED:
+                self._storeOrder(order)
+            else:
+                self._removeOrder(order.orderId)
+        if self.trader is not None:
+            if executionEvent.HasField("depositWithdraw"):
+                self.trader.balance = executionEvent.depositWithdraw.balance
+            elif executionEvent.HasField("deal") and executionEvent.deal.HasField("closePositionDetail"):
+                self.trader.balance = executionEvent.deal.closePositionDetail.balance
+
+    def _isSame(self, positions, orders):
+        return positions == self._positions and orders == self._orders
+
+    def _storePosition(self, position):
+        self._removePosition(position.positionId)
+        stored = type(position)()
+        stored.CopyFrom(position)
+        symbolId = stored.tradeData.symbolId
+        self._positions[stored.positionId] = stored
+        self._positionIdsBySymbol.setdefault(symbolId, set()).add(stored.positionId)
+        self._netVolumes[symbolId] = self._netVolumes.get(symbolId, 0) + self._getSignedVolume(stored)
+
+    def _removePosition(self, positionId):
+        position = self._positions.pop(positionId, None)
+        if position is None:
+            return
+        symbolId = position.tradeData.symbolId
+        positionIds = self._positionIdsBySymbol[symbolId]
+        positionIds.discard(positionId)
+        netVolume = self._netVolumes[symbolId] - self._getSignedVolume(position)
+        if positionIds:
+            self._netVolumes[symbolId] = netVolume
+        else:
+            del self._positionIdsBySymbol[symbolId]
+            del self._netVolumes[symbolId]
+
+    def _storeOrder(self, order):
+        self._removeOrder(order.orderId)
+        stored = type(order)()
+        stored.CopyFrom(order)
+        symbolId = stored.tradeData.symbolId
+        self._orders[stored.orderId] = stored
+        self._orderIdsBySymbol.setdefault(symbolId, set()).add(stored.orderId)
+        if not stored.closingOrder:
+            self._pendingNetVolumes[symbolId] = self._pendingNetVolumes.get(symbolId, 0) + self._getSignedVolume(stored)
+
+    def _removeOrder(self, orderId):
+        self._orderErrors.pop(orderId, None)
+        order = self._orders.pop(orderId, None)
+        if order is None:
+            return
+        symbolId = order.tradeData.symbolId
+        orderIds = self._orderIdsBySymbol[symbolId]
+        orderIds.discard(orderId)
+        if not order.closingOrder:
+            self._pendingNetVolumes[symbolId] -= self._getSignedVolume(order)
+        if not orderIds:
+            del self._orderIdsBySymbol[symbolId]
+            self._pendingNetVolumes.pop(symbolId, None)
+
+    @staticmethod
+    def _getSignedVolume(position):
+        volume = position.tradeData.volume
+        return volume if position.tradeData.tradeSide == ProtoOATradeSide.BUY else -volume
@@ -1,15 +1,21 @@
 from ctrader_open_api.endpoints import EndPoints
-import requests
 
 class Auth:
     def __init__(self, appClientId, appClientSecret, redirectUri):
         self.appClientId = appClientId
         self.appClientSecret = appClientSecret
         self.redirectUri = redirectUri
+        self._session = None
+    def _getSession(self):
+        if self._session is None:
+            # Imported here as requests is slow to import and only needed once tokens are requested
+            import requests
+            self._session = requests.Session()
+        return self._session
     def getAuthUri(self, scope = "trading", baseUri = EndPoints.AUTH_URI):
         return f"{baseUri}?client_id={self.appClientId}&redirect_uri={self.redirectUri}&scope={scope}"
     def getToken(self, authCode, baseUri = EndPoints.TOKEN_URI):
-        request = requests.get(baseUri, params=
+        request = self._getSession().get(baseUri, params=
                                {"grant_type": "authorization_code",
                                "code": authCode,
                               "redirect_uri": self.redirectUri,
@@ -17,9 +23,15 @@ class Auth:
                             "client_secret": self.appClientSecret})
         return request.json()
     def refreshToken(self, refreshToken, baseUri = EndPoints.TOKEN_URI):
-        request = requests.get(baseUri, params=
+        request = self._getSession().get(baseUri, params=
                                {"grant_type": "refresh_token",
                                "refresh_token": refreshToken,
                              "client_id": self.appClientId,
                             "client_secret": self.appClientSecret})
         return request.json()
+    def getTokenAsync(self, authCode, baseUri = EndPoints.TOKEN_URI):
+        from twisted.internet import threads
+        return threads.deferToThread(self.getToken, authCode, baseUri)
+    def refreshTokenAsync(self, refreshToken, baseUri = EndPoints.TOKEN_URI):
+        from twisted.internet import threads
+        return threads.deferToThread(self.refreshToken, refreshToken, baseUri)
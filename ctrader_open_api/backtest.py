@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+
+import bisect
+from concurrent import futures
+from twisted.internet import defer, task
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (ProtoOANewOrderReq, ProtoOAClosePositionReq, ProtoOAReconcileReq, ProtoOAReconcileRes,
+                                                           ProtoOAExecutionEvent, ProtoOAOrderErrorEvent, ProtoOASpotEvent)
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import (ProtoOAPosition, ProtoOAOrder, ProtoOADeal, ProtoOATradeSide, ProtoOAOrderType,
+                                                                ProtoOAOrderStatus, ProtoOAPositionStatus, ProtoOADealStatus,
+                                                                ProtoOAExecutionType)
+
+class UnsupportedMessageError(Exception):
+    def __init__(self, request):
+        super().__init__(f"{type(request).__name__} is not simulated")
+        self.request = request
+
+class SimulatedClient:
+    """Client replacement for backtests, fills market orders against the current tick of a Backtester and emits execution events."""
+    NEW_ORDER_REQ_PAYLOAD_TYPE = ProtoOANewOrderReq().payloadType
+    CLOSE_POSITION_REQ_PAYLOAD_TYPE = ProtoOAClosePositionReq().payloadType
+    RECONCILE_REQ_PAYLOAD_TYPE = ProtoOAReconcileReq().payloadType
+    MONEY_DIGITS = 2
+
+    def __init__(self, backtester, accountId=1, initialBalance=10000, slippageInPrice=0, commissionPerMillion=0):
+        self.backtester = backtester
+        self.accountId = accountId
+        self.slippageInPrice = slippageInPrice
+        self.commissionPerMillion = commissionPerMillion
+        self.balance = round(initialBalance * 10 ** self.MONEY_DIGITS)
+        self.isConnected = True
+        self.timingWheel = None
+        self.positions = dict()
+        self.deals = []
+        self._exposures = dict()
+        self.rejectedCount = 0
+        self._nextId = 0
+        self._messageListeners = []
+
+    def addMessageListener(self, listener):
+        self._messageListeners.append(listener)
+
+    def removeMessageListener(self, listener):
+        self._messageListeners.remove(listener)
+
+    def send(self, message, clientMsgId=None, responseTimeoutInSeconds=5, **params):
+        if type(message) in [str, int]:
+            message = Protobuf.get(message, **params)
+        if message.payloadType == self.NEW_ORDER_REQ_PAYLOAD_TYPE:
+            response = self._onNewOrderReq(message)
+        elif message.payloadType == self.CLOSE_POSITION_REQ_PAYLOAD_TYPE:
+            response = self._onClosePositionReq(message)
+        elif message.payloadType == self.RECONCILE_REQ_PAYLOAD_TYPE:
+            response = ProtoOAReconcileRes(ctidTraderAccountId=self.accountId, position=self.positions.values())
+        else:
+            return defer.fail(UnsupportedMessageError(message))
+        return defer.succeed(self._dispatch(response, clientMsgId))
+
+    def getBalance(self):
+        return self.balance / 10 ** self.MONEY_DIGITS
+
+    def getEquity(self):
+        # Open positions are aggregated per symbol so equity doesn't depend on the number of positions
+        profit = 0
+        for symbolId, (buyVolume, buyCost, sellVolume, sellCost) in self._exposures.items():
+            quote = self.backtester.getQuote(symbolId)
+            if quote is not None:
+                profit += (buyVolume * quote[0] - buyCost + sellCost - sellVolume * quote[1]) / 100
+        return self.balance / 10 ** self.MONEY_DIGITS + profit
+
+    def _onNewOrderReq(self, request):
+        if request.orderType != ProtoOAOrderType.MARKET:
+            return self._reject(request, "ORDER_TYPE_NOT_SIMULATED")
+        if request.HasField("positionId"):
+            position = self.positions.get(request.positionId)
+            if position is None or request.tradeSide == position.tradeData.tradeSide:
+                return self._reject(request, "POSITION_NOT_FOUND")
+            return self._close(position, min(request.volume, position.tradeData.volume))
+        price = self.backtester.getFillPrice(request.symbolId, request.tradeSide == ProtoOATradeSide.BUY, self.slippageInPrice)
+        if price is None:
+            return self._reject(request, "NO_QUOTE")
+        position = ProtoOAPosition(positionId=self._getNextId(), positionStatus=ProtoOAPositionStatus.POSITION_STATUS_OPEN, swap=0, price=price,
+                                   moneyDigits=self.MONEY_DIGITS, commission=self._getCommission(request.volume, price))
+        position.tradeData.symbolId = request.symbolId
+        position.tradeData.volume = request.volume
+        position.tradeData.tradeSide = request.tradeSide
+        position.tradeData.openTimestamp = self.backtester.getTimestamp()
+        position.tradeData.label = request.label
+        self.positions[position.positionId] = position
+        self._addExposure(position, request.volume)
+        self.balance += position.commission
+        return self._fill(position, request.volume, request.tradeSide, price, position.commission)
+
+    def _onClosePositionReq(self, request):
+        position = self.positions.get(request.positionId)
+        if position is None:
+            return self._reject(request, "POSITION_NOT_FOUND")
+        return self._close(position, min(request.volume or position.tradeData.volume, position.tradeData.volume))
+
+    def _close(self, position, volume):
+        tradeData = position.tradeData
+        isBuy = tradeData.tradeSide == ProtoOATradeSide.BUY
+        price = self.backtester.getFillPrice(tradeData.symbolId, not isBuy, self.slippageInPrice)
+        if price is None:
+            return self._reject(position, "NO_QUOTE")
+        grossProfit = self._getProfit(position, volume, price)
+        commission = self._getCommission(volume, price)
+        self.balance += grossProfit + commission
+        self._addExposure(position, -volume)
+        remaining = tradeData.volume - volume
+        closed = ProtoOAPosition()
+        closed.CopyFrom(position)
+        if remaining:
+            tradeData.volume = remaining
+            closed.tradeData.volume = remaining
+        else:
+            del self.positions[position.positionId]
+            closed.positionStatus = ProtoOAPositionStatus.POSITION_STATUS_CLOSED
+        side = ProtoOATradeSide.SELL if isBuy else ProtoOATradeSide.BUY
+        event = self._fill(closed, volume, side, price, commission)
+        detail = event.deal.closePositionDetail
+        detail.entryPrice = position.price
+        detail.grossProfit = grossProfit
+        detail.swap = 0
+        detail.commission = commission
+        detail.balance = self.balance
+        detail.closedVolume = volume
+        detail.moneyDigits = self.MONEY_DIGITS
+        event.order.closingOrder = True
+        return event
+
+    def _fill(self, position, volume, tradeSide, price, commission):
+        timestamp = self.backtester.getTimestamp()
+        order = ProtoOAOrder(orderId=self._getNextId(), orderType=ProtoOAOrderType.MARKET, orderStatus=ProtoOAOrderStatus.ORDER_STATUS_FILLED,
+                             executionPrice=price, executedVolume=volume, positionId=position.positionId, utcLastUpdateTimestamp=timestamp)
+        order.tradeData.CopyFrom(position.tradeData)
+        order.tradeData.volume = volume
+        order.tradeData.tradeSide = tradeSide
+        deal = ProtoOADeal(dealId=self._getNextId(), orderId=order.orderId, positionId=position.positionId, volume=volume, filledVolume=volume,
+                           symbolId=position.tradeData.symbolId, createTimestamp=timestamp, executionTimestamp=timestamp, executionPrice=price,
+                           tradeSide=tradeSide, dealStatus=ProtoOADealStatus.FILLED, commission=commission, moneyDigits=self.MONEY_DIGITS)
+        self.deals.append(deal)
+        return ProtoOAExecutionEvent(ctidTraderAccountId=self.accountId, executionType=ProtoOAExecutionType.ORDER_FILLED, position=position,
+                                     order=order, deal=deal)
+
+    def _reject(self, request, errorCode):
+        self.rejectedCount += 1
+        return ProtoOAOrderErrorEvent(ctidTraderAccountId=self.accountId, errorCode=errorCode,
+                                      positionId=getattr(request, "positionId", 0))
+
+    def _addExposure(self, position, volume):
+        exposure = self._exposures.setdefault(position.tradeData.symbolId, [0, 0.0, 0, 0.0])
+        offset = 0 if position.tradeData.tradeSide == ProtoOATradeSide.BUY else 2
+        exposure[offset] += volume
+        exposure[offset + 1] += volume * position.price
+
+    def _getProfit(self, position, volume, price):
+        tradeData = position.tradeData
+        isBuy = tradeData.tradeSide == ProtoOATradeSide.BUY
+        difference = price - position.price if isBuy else position.price - price
+        return round(difference * volume / 100 * 10 ** self.MONEY_DIGITS)
+
+    def _getCommission(self, volume, price):
+        return -round(volume / 100 * price * self.commissionPerMillion / 1000000 * 10 ** self.MONEY_DIGITS)
+
+    def _getNextId(self):
+        self._nextId += 1
+        return self._nextId
+
+    def _dispatch(self, payload, clientMsgId=None):
+        message = ProtoMessage(payloadType=payload.payloadType, payload=payload.SerializeToString(), clientMsgId=clientMsgId)
+        for listener in list(self._messageListeners):
+            listener(self, message)
+        return message
+
+class Backtester:
+    """Replays ticks of symbols on a simulated clock, scheduled strategy calls see the last tick before their time.
+
+    timestamps are in milliseconds, bids and asks are prices, they can be lists, array.array or NumPy arrays. If asks is None
+    (ex: for bar close prices) asks are bids plus spreadInPrice.
+    """
+    SPOT_EVENT_PAYLOAD_TYPE = ProtoOASpotEvent().payloadType
+    PRICE_MULTIPLIER = 100000
+
+    def __init__(self, emitSpotEvents=False, **clientParams):
+        self.emitSpotEvents = emitSpotEvents
+        self.clock = task.Clock()
+        self.client = SimulatedClient(self, **clientParams)
+        self.equityCurve = []
+        self._symbols = dict()
+        self._indexes = dict()
+
+    def addSymbol(self, symbolId, timestamps, bids, asks=None, spreadInPrice=0):
+        self._symbols[symbolId] = (timestamps, bids, asks, spreadInPrice)
+        self._indexes[symbolId] = -1
+        if len(self._symbols) == 1:
+            self.clock.advance(timestamps[0] / 1000)
+        self._seek(self.getTimestamp())
+
+    def getTimestamp(self):
+        return int(self.clock.seconds() * 1000)
+
+    def getQuote(self, symbolId):
+        index = self._indexes.get(symbolId, -1)
+        if index < 0:
+            return None
+        _, bids, asks, spreadInPrice = self._symbols[symbolId]
+        bid = float(bids[index])
+        return bid, (bid + spreadInPrice if asks is None else float(asks[index]))
+
+    def getFillPrice(self, symbolId, isBuy, slippageInPrice=0):
+        quote = self.getQuote(symbolId)
+        if quote is None:
+            return None
+        return quote[1] + slippageInPrice if isBuy else quote[0] - slippageInPrice
+
+    def run(self, untilTimestamp=None):
+        """Runs scheduled calls of the clock until the end of ticks, only the ticks at their times are looked at unless spot events are emitted."""
+        if untilTimestamp is None:
+            untilTimestamp = max(timestamps[len(timestamps) - 1] for timestamps, _, _, _ in self._symbols.values())
+        if self.emitSpotEvents:
+            self._runTicks(untilTimestamp)
+        while True:
+            calls = self.clock.getDelayedCalls()
+            if not calls:
+                break
+            nextTime = min(call.getTime() for call in calls)
+            if nextTime * 1000 > untilTimestamp:
+                break
+            self._seek(nextTime * 1000)
+            self.clock.advance(nextTime - self.clock.seconds())
+            self.equityCurve.append((self.getTimestamp(), self.client.getEquity()))
+        self._seek(untilTimestamp)
+        return self.getResult()
+
+    def getResult(self):
+        equities = [equity for _, equity in self.equityCurve] or [self.client.getEquity()]
+        maxDrawdown, peak = 0, equities[0]
+        for equity in equities:
+            peak = max(peak, equity)
+            maxDrawdown = max(maxDrawdown, peak - equity)
+        return {"balance": self.client.getBalance(), "equity": self.client.getEquity(), "dealsCount": len(self.client.deals),
+                "openPositionsCount": len(self.client.positions), "rejectedCount": self.client.rejectedCount, "maxDrawdown": maxDrawdown}
+
+    def _seek(self, timestamp):
+        for symbolId, (timestamps, _, _, _) in self._symbols.items():
+            self._indexes[symbolId] = bisect.bisect_right(timestamps, timestamp, lo=max(0, self._indexes[symbolId])) - 1
+
+    def _runTicks(self, untilTimestamp):
+        events = sorted((timestamp, symbolId, index) for symbolId, (timestamps, _, _, _) in self._symbols.items()
+                        for index, timestamp in enumerate(timestamps) if timestamp <= untilTimestamp)
+        for timestamp, symbolId, index in events:
+            if timestamp / 1000 > self.clock.seconds():
+                self._seek(timestamp - 1)
+                self.clock.advance(timestamp / 1000 - self.clock.seconds())
+            self._indexes[symbolId] = index
+            bid, ask = self.getQuote(symbolId)
+            self.client._dispatch(ProtoOASpotEvent(ctidTraderAccountId=self.client.accountId, symbolId=symbolId, timestamp=int(timestamp),
+                                                   bid=round(bid * self.PRICE_MULTIPLIER), ask=round(ask * self.PRICE_MULTIPLIER)))
+
+def sweep(function, paramsList, maxWorkers=None):
+    """Calls function(params) for each params in a process pool and returns results in the same order, function must be importable."""
+    with futures.ProcessPoolExecutor(maxWorkers) as executor:
+        return list(executor.map(function, paramsList))
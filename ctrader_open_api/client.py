@@ -4,22 +4,62 @@ from twisted.internet.endpoints import clientFromString
 from twisted.application.internet import ClientService
 from ctrader_open_api.protobuf import Protobuf
 from ctrader_open_api.factory import Factory
+from ctrader_open_api.liveness import LivenessMonitor
+from ctrader_open_api.fanOut import FanOut
+from ctrader_open_api.timingWheel import TimingWheel
+from ctrader_open_api.correlation import CorrelationTable
+from ctrader_open_api.metrics import MetricsRegistry
+from ctrader_open_api.protobufBackend import ProtobufBackend
 from twisted.internet import reactor, defer
 
+class Superseded:
+    def __init__(self, clientMsgId, supersedingClientMsgId):
+        self.clientMsgId = clientMsgId
+        self.supersedingClientMsgId = supersedingClientMsgId
+
 class Client(ClientService):
-    def __init__(self, host, port, protocol, retryPolicy=None, clock=None, prepareConnection=None, numberOfMessagesToSendPerSecond=5):
+    def __init__(self, host, port, protocol, retryPolicy=None, clock=None, prepareConnection=None, numberOfMessagesToSendPerSecond=5, heartbeatIntervalInSeconds=20, deadPeerTimeoutInMilliseconds=None, coalesceAmendments=False):
         self._runningReactor = reactor
         self.numberOfMessagesToSendPerSecond = numberOfMessagesToSendPerSecond
+        self.heartbeatIntervalInSeconds = heartbeatIntervalInSeconds
+        self.coalesceAmendments = coalesceAmendments
+        self.liveness = LivenessMonitor(deadPeerTimeoutInMilliseconds, clock=self._runningReactor)
         endpoint = clientFromString(self._runningReactor, f"ssl:{host}:{port}")
         factory = Factory.forProtocol(protocol, client=self)
         super().__init__(endpoint, factory, retryPolicy=retryPolicy, clock=clock, prepareConnection=prepareConnection)
         self._events = dict()
-        self._responseDeferreds = dict()
+        self.timingWheel = TimingWheel(clock=self._runningReactor)
+        self._responseDeferreds = CorrelationTable(self.timingWheel)
+        self._messageListeners = []
+        self._protocol = None
         self.isConnected = False
+        # A StageProfiler to measure each stage of received messages, see ctrader_open_api.profiler
+        self.stageProfiler = None
+        # An EventLog that records the response time of each response, set by EventLog.addClient
+        self.eventLog = None
+        self.protobufBackend = ProtobufBackend.getActive()
+        self.metrics = MetricsRegistry()
+        self._receivedMessagesCounter = self.metrics.counter("ctrader_received_messages", "Received messages", ("payload_type",))
+        self._receivedBytesCounter = self.metrics.counter("ctrader_received_payload_bytes", "Received payload bytes")
+        self._sentMessagesCounter = self.metrics.counter("ctrader_sent_messages", "Sent messages")
+        self._canceledMessagesCounter = self.metrics.counter("ctrader_canceled_messages", "Messages removed from the send queue before being sent")
+        self._supersededMessagesCounter = self.metrics.counter("ctrader_superseded_messages", "Amendments replaced by a newer one before being sent")
+        self._responseTimeoutsCounter = self.metrics.counter("ctrader_response_timeouts", "Requests that got no response in time")
+        self._connectionsCounter = self.metrics.counter("ctrader_connections", "Connections made, including reconnections")
+        self._disconnectionsCounter = self.metrics.counter("ctrader_disconnections", "Connections lost")
+        self._responseTimeHistogram = self.metrics.histogram("ctrader_response_time_seconds", "Time between sending a request and receiving its response")
+        # Gauges are read only when metrics are collected, nothing is done for them on the hot path
+        self.metrics.gauge("ctrader_send_queue_length", "Messages waiting in the send queue",
+                           lambda: 0 if self._protocol is None else len(self._protocol._send_queue))
+        self.metrics.gauge("ctrader_pending_responses", "Requests waiting for their response", lambda: len(self._responseDeferreds))
+        self.metrics.gauge("ctrader_connected", "1 if the client is connected", lambda: int(self.isConnected))
+        self.metrics.gauge("ctrader_protobuf_accelerated", "1 if protobuf uses its upb or cpp backend", lambda: int(self.protobufBackend != ProtobufBackend.PYTHON))
+        self.liveness.setRttSampleCallback(lambda sample: self._responseTimeHistogram.observe(sample / 1000))
 
     def startService(self):
         if self.running:
             return
+        ProtobufBackend.warnIfSlow()
         ClientService.startService(self)
 
     def stopService(self):
@@ -28,37 +68,85 @@ class Client(ClientService):
 
     def _connected(self, protocol):
         self.isConnected = True
+        self._protocol = protocol
+        self._connectionsCounter.inc()
+        self.liveness.connectionMade(protocol)
         if hasattr(self, "_connectedCallback"):
             self._connectedCallback(self)
 
     def _disconnected(self, reason):
         self.isConnected = False
+        self._protocol = None
+        self._disconnectionsCounter.inc()
+        self.liveness.connectionLost()
         self._responseDeferreds.clear()
         if hasattr(self, "_disconnectedCallback"):
             self._disconnectedCallback(self, reason)
 
+    def _sent(self, clientMsgId):
+        self._sentMessagesCounter.inc()
+        self.liveness.messageSent(clientMsgId)
+
+    def _canceled(self, clientMsgId):
+        self._canceledMessagesCounter.inc()
+
+    def _superseded(self, clientMsgId, supersedingClientMsgId):
+        self._supersededMessagesCounter.inc()
+        if clientMsgId in self._responseDeferreds:
+            self._responseDeferreds.pop(clientMsgId).callback(Superseded(clientMsgId, supersedingClientMsgId))
+
     def _received(self, message):
+        profiler = self.stageProfiler
+        if profiler is not None and profiler.isSampling:
+            profiler.measure("dispatch", message.payloadType, self._dispatch, message, profiler.measure)
+        else:
+            self._dispatch(message, None)
+
+    def _dispatch(self, message, measure):
+        self._receivedMessagesCounter.inc(1, (message.payloadType,))
+        self._receivedBytesCounter.inc(len(message.payload))
+        rttInMilliseconds = self.liveness.messageReceived(message)
+        if rttInMilliseconds is not None and self.eventLog is not None:
+            self.eventLog.recordResponse(message, rttInMilliseconds)
         if hasattr(self, "_messageReceivedCallback"):
-            self._messageReceivedCallback(self, message)
-        if (message.clientMsgId is not None and message.clientMsgId in self._responseDeferreds):
-            responseDeferred = self._responseDeferreds[message.clientMsgId]
-            self._responseDeferreds.pop(message.clientMsgId)
-            responseDeferred.callback(message)
+            if measure is None:
+                self._messageReceivedCallback(self, message)
+            else:
+                measure("callback", message.payloadType, self._messageReceivedCallback, self, message)
+        for listener in self._messageListeners:
+            if measure is None:
+                listener(self, message)
+            else:
+                measure("listener " + getattr(listener, "__qualname__", type(listener).__name__), message.payloadType, listener, self, message)
+        if message.clientMsgId:
+            responseDeferred = self._responseDeferreds.pop(message.clientMsgId)
+            if responseDeferred is not None:
+                if measure is None:
+                    responseDeferred.callback(message)
+                else:
+                    measure("response", message.payloadType, responseDeferred.callback, message)
 
     def send(self, message, clientMsgId=None, responseTimeoutInSeconds=5, **params):
         if type(message) in [str, int]:
             message = Protobuf.get(message, **params)
-        responseDeferred = defer.Deferred(self._cancelMessageDiferred)
         if clientMsgId is None:
-            clientMsgId = str(id(responseDeferred))
-        if clientMsgId is not None:
-            self._responseDeferreds[clientMsgId] = responseDeferred
-        responseDeferred.addErrback(lambda failure: self._onResponseFailure(failure, clientMsgId))
-        responseDeferred.addTimeout(responseTimeoutInSeconds, self._runningReactor)
+            clientMsgId = self._responseDeferreds.nextId()
+        # A newer message can reuse clientMsgId, so entries are removed only if they are still of this message
+        responseDeferred = defer.Deferred(lambda deferred: self._responseDeferreds.discard(clientMsgId, deferred))
+        self._responseDeferreds.add(clientMsgId, responseDeferred, responseTimeoutInSeconds)
+        responseDeferred.addErrback(lambda failure: self._onResponseFailure(failure, clientMsgId, responseDeferred))
         protocolDiferred = self.whenConnected(failAfterFailures=1)       
-        protocolDiferred.addCallbacks(lambda protocol: protocol.send(message, clientMsgId=clientMsgId, isCanceled=lambda: clientMsgId not in self._responseDeferreds), responseDeferred.errback)
+        protocolDiferred.addCallbacks(lambda protocol: protocol.send(message, clientMsgId=clientMsgId, isCanceled=lambda: self._responseDeferreds.get(clientMsgId) is not responseDeferred), responseDeferred.errback)
         return responseDeferred
 
+    def sendWithRetry(self, message, maxAttempts=3, initialDelayInSeconds=0.5, backoffMultiplier=2, maxDelayInSeconds=30, responseTimeoutInSeconds=5, **params):
+        return self.timingWheel.callWithBackoff(lambda: self.send(message, responseTimeoutInSeconds=responseTimeoutInSeconds, **params),
+                                                maxAttempts=maxAttempts, initialDelayInSeconds=initialDelayInSeconds, multiplier=backoffMultiplier,
+                                                maxDelayInSeconds=maxDelayInSeconds, retryOn=(defer.TimeoutError,))
+
+    def sendMany(self, messages, maxInFlight=10, responseTimeoutInSeconds=5):
+        return FanOut(self, messages, maxInFlight=maxInFlight, responseTimeoutInSeconds=responseTimeoutInSeconds).start()
+
     def setConnectedCallback(self, callback):
         self._connectedCallback = callback
 
@@ -68,12 +156,16 @@ class Client(ClientService):
     def setMessageReceivedCallback(self, callback):
         self._messageReceivedCallback = callback
 
-    def _onResponseFailure(self, failure, msgId):
-        if (msgId is not None and msgId in self._responseDeferreds):
-            self._responseDeferreds.pop(msgId)
-        return failure
+    def addMessageListener(self, listener):
+        self._messageListeners.append(listener)
 
-    def _cancelMessageDiferred(self, deferred):
-        deferredIdString = str(id(deferred))
-        if (deferredIdString in self._responseDeferreds):
-            self._responseDeferreds.pop(deferredIdString)
+    def removeMessageListener(self, listener):
+        if listener in self._messageListeners:
+            self._messageListeners.remove(listener)
+
+    def _onResponseFailure(self, failure, msgId, responseDeferred=None):
+        if failure.check(defer.TimeoutError):
+            self._responseTimeoutsCounter.inc()
+        self._responseDeferreds.discard(msgId, responseDeferred)
+        self.liveness.messageForgotten(msgId)
+        return failure
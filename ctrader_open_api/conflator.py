@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+import itertools
+from collections import OrderedDict
+from twisted.internet import reactor, task
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage, ProtoHeartbeatEvent
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent
+
+class Conflator:
+    """Delivers the messages of a client to one slow consumer in frames, keeping only the latest message of each key.
+
+    Messages that have no key (by default all except spot events and heartbeats) are never dropped. A spot event has only
+    the prices that changed, so it's merged into the pending one of its symbol instead of replacing it. A frame is a list
+    of the pending messages in the order of their latest update, it's delivered framesPerSecond times per second if there
+    are pending messages, or when the consumer calls flush or takePending.
+    """
+    SPOT_EVENT_PAYLOAD_TYPE = ProtoOASpotEvent().payloadType
+    HEARTBEAT_EVENT_PAYLOAD_TYPE = ProtoHeartbeatEvent().payloadType
+    SPOT_EVENT_SYMBOL_ID_FIELD_NUMBER = ProtoOASpotEvent.DESCRIPTOR.fields_by_name["symbolId"].number
+
+    def __init__(self, client, callback=None, framesPerSecond=10, keyFunction=None, mergeFunction=None, clock=None):
+        self.client = client
+        self.callback = callback
+        self.keyFunction = self.getDefaultKey if keyFunction is None else keyFunction
+        # Called with the pending and the new message of a key, returns the message that replaces the pending one
+        self.mergeFunction = self.mergeMessages if mergeFunction is None else mergeFunction
+        self.receivedCount = 0
+        self.conflatedCount = 0
+        self.framesCount = 0
+        self._clock = reactor if clock is None else clock
+        self._pending = OrderedDict()
+        self._sequence = itertools.count()
+        self._frameTask = None
+        client.addMessageListener(self._onMessageReceived)
+        if framesPerSecond:
+            self._frameTask = task.LoopingCall(self.flush)
+            self._frameTask.clock = self._clock
+            self._frameTask.start(1 / framesPerSecond, now=False)
+
+    @classmethod
+    def getDefaultKey(cls, message):
+        if message.payloadType == cls.SPOT_EVENT_PAYLOAD_TYPE:
+            return (message.payloadType, Protobuf.peek_varint(message.payload, cls.SPOT_EVENT_SYMBOL_ID_FIELD_NUMBER))
+        if message.payloadType == cls.HEARTBEAT_EVENT_PAYLOAD_TYPE:
+            return message.payloadType
+        return None
+
+    @classmethod
+    def mergeMessages(cls, previous, message):
+        if (message.payloadType != cls.SPOT_EVENT_PAYLOAD_TYPE or previous.payloadType != cls.SPOT_EVENT_PAYLOAD_TYPE
+                or Protobuf.peek_varint(message.payload, cls.SPOT_EVENT_SYMBOL_ID_FIELD_NUMBER)
+                != Protobuf.peek_varint(previous.payload, cls.SPOT_EVENT_SYMBOL_ID_FIELD_NUMBER)):
+            return message
+        event = cls.mergeSpotEvents(ProtoOASpotEvent.FromString(previous.payload), ProtoOASpotEvent.FromString(message.payload))
+        merged = ProtoMessage(payloadType=message.payloadType, payload=event.SerializePartialToString())
+        if message.HasField("clientMsgId"):
+            merged.clientMsgId = message.clientMsgId
+        return merged
+
+    @staticmethod
+    def mergeSpotEvents(previous, event):
+        """Returns a spot event with the fields of event and the prices of previous that event doesn't have."""
+        merged = ProtoOASpotEvent()
+        merged.CopyFrom(previous)
+        if event.trendbar:
+            # Trend bars of the latest event replace the previous ones instead of being appended
+            del merged.trendbar[:]
+        merged.MergeFrom(event)
+        return merged
+
+    @property
+    def pendingCount(self):
+        return len(self._pending)
+
+    def takePending(self):
+        """Returns the pending messages for consumers that pull them when they are ready, instead of using a callback."""
+        if not self._pending:
+            return []
+        messages = list(self._pending.values())
+        self._pending.clear()
+        self.framesCount += 1
+        return messages
+
+    def flush(self):
+        if self._pending and self.callback is not None:
+            self.callback(self.takePending())
+
+    def stop(self):
+        self.client.removeMessageListener(self._onMessageReceived)
+        if self._frameTask is not None and self._frameTask.running:
+            self._frameTask.stop()
+        self._frameTask = None
+        self._pending.clear()
+
+    def _onMessageReceived(self, client, message):
+        self.receivedCount += 1
+        key = self.keyFunction(message)
+        if key is None:
+            self._pending[(None, next(self._sequence))] = message
+            return
+        previous = self._pending.pop(key, None)
+        if previous is not None:
+            self.conflatedCount += 1
+            message = self.mergeFunction(previous, message)
+        self._pending[key] = message
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+from twisted.internet import defer
+
+class ClientMsgIdCollisionError(Exception):
+    pass
+
+class CorrelationTable:
+    """Maps clientMsgIds of sent messages to their response deferreds and times them out on a shared timing wheel."""
+    ID_PREFIX = "~"
+
+    def __init__(self, timingWheel):
+        self.timingWheel = timingWheel
+        self.staleResponsesCount = 0
+        self.timedOutCount = 0
+        self._sequence = 0
+        self._entries = dict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, clientMsgId):
+        return clientMsgId in self._entries
+
+    def nextId(self):
+        self._sequence += 1
+        return f"{self.ID_PREFIX}{self._sequence:x}"
+
+    def add(self, clientMsgId, deferred, timeoutInSeconds):
+        previous = self._entries.pop(clientMsgId, None)
+        handle = self.timingWheel.callLater(timeoutInSeconds, self._timeout, clientMsgId, deferred, timeoutInSeconds)
+        self._entries[clientMsgId] = (deferred, handle)
+        if previous is not None:
+            previous[1].cancel()
+            previous[0].errback(ClientMsgIdCollisionError(f"clientMsgId {clientMsgId} is used by a newer message"))
+
+    def pop(self, clientMsgId):
+        entry = self._entries.pop(clientMsgId, None)
+        if entry is None:
+            if clientMsgId.startswith(self.ID_PREFIX):
+                self.staleResponsesCount += 1
+            return None
+        entry[1].cancel()
+        return entry[0]
+
+    def get(self, clientMsgId):
+        entry = self._entries.get(clientMsgId)
+        return None if entry is None else entry[0]
+
+    def discard(self, clientMsgId, deferred=None):
+        """Removes the entry of clientMsgId, if deferred is set only if it's still the entry of clientMsgId."""
+        entry = self._entries.get(clientMsgId)
+        if entry is None or (deferred is not None and entry[0] is not deferred):
+            return
+        del self._entries[clientMsgId]
+        entry[1].cancel()
+
+    def clear(self):
+        # Timers are kept so the cleared deferreds still time out
+        self._entries.clear()
+
+    def _timeout(self, clientMsgId, deferred, timeoutInSeconds):
+        entry = self._entries.get(clientMsgId)
+        if entry is not None and entry[0] is deferred:
+            del self._entries[clientMsgId]
+        if not deferred.called:
+            self.timedOutCount += 1
+            deferred.errback(defer.TimeoutError(timeoutInSeconds, "Deferred"))
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+"""Decode-only entry point for captured messages, it doesn't import Twisted or requests."""
+
+import struct
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+
+LENGTH = struct.Struct(">I")
+
+def iterFrames(data):
+    """Yields the ProtoMessage of each length prefixed frame of data, an incomplete last frame is ignored."""
+    offset = 0
+    size = len(data)
+    while offset + LENGTH.size <= size:
+        length = LENGTH.unpack_from(data, offset)[0]
+        start = offset + LENGTH.size
+        if start + length > size:
+            return
+        yield ProtoMessage.FromString(data[start:start + length])
+        offset = start + length
+
+def readSession(path):
+    """Returns the messages of a file in the wire framing, like the ones written by SessionRecorder."""
+    with open(path, "rb") as file:
+        return list(iterFrames(file.read()))
+
+def decode(message):
+    """Returns the payload message of a ProtoMessage."""
+    return Protobuf.extract(message)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+import datetime
+import struct
+from concurrent import futures
+from twisted.internet import reactor, task
+from ctrader_open_api.protobuf import Protobuf
+
+class EventLog:
+    """Records fixed layout events in a preallocated ring, they are formatted only when read and written to a file in batches.
+
+    Recording an event packs a few numbers into the ring, so it can be done for every message on the reactor thread.
+    Events below level are ignored before anything else is done.
+    """
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+    LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+    # timestamp, level, kind, payloadType, accountId, objectId, value
+    RECORD = struct.Struct("<dBxHIqqq")
+    FIELDS = ("timestamp", "level", "kind", "payloadType", "accountId", "objectId", "value")
+    MESSAGE_RECEIVED = 1
+    RESPONSE_RECEIVED = 2
+    ORDER_SENT = 3
+    ORDER_FAILED = 4
+    SIGNAL = 5
+    SIGNAL_DROPPED = 6
+    KIND_FORMATS = {
+        MESSAGE_RECEIVED: "Received {payloadName} of account {accountId}, {value} bytes",
+        RESPONSE_RECEIVED: "Received {payloadName} of account {accountId} after {value} us",
+        ORDER_SENT: "Sent order of account {accountId} for symbol {objectId}, volume {value}",
+        ORDER_FAILED: "Order of account {accountId} for symbol {objectId} failed with {payloadName}",
+        SIGNAL: "Signal for symbol {objectId} of account {accountId}, trade side {value}",
+        SIGNAL_DROPPED: "Dropped signal for symbol {objectId} of account {accountId}",
+    }
+
+    def __init__(self, capacity=65536, level=INFO, path=None, flushIntervalInSeconds=1, clock=None):
+        self.capacity = capacity
+        self.level = level
+        self.kindFormats = dict(self.KIND_FORMATS)
+        self.recordsCount = 0
+        self.droppedCount = 0
+        self._clock = reactor if clock is None else clock
+        self._buffer = bytearray(capacity * self.RECORD.size)
+        self._flushedCount = 0
+        self._clients = []
+        self._file = None
+        self._writer = None
+        self._flushTask = None
+        if path is not None:
+            self._file = open(path, "ab")
+            # One thread keeps the batches in order
+            self._writer = futures.ThreadPoolExecutor(1)
+            self._flushTask = task.LoopingCall(self.flush)
+            self._flushTask.clock = self._clock
+            self._flushTask.start(flushIntervalInSeconds, now=False)
+
+    def isEnabledFor(self, level):
+        return level >= self.level
+
+    def registerKind(self, kind, format):
+        """Adds an event kind, format can use the FIELDS names and payloadName."""
+        self.kindFormats[kind] = format
+
+    def record(self, level, kind, payloadType=0, accountId=0, objectId=0, value=0):
+        if level < self.level:
+            return
+        self.RECORD.pack_into(self._buffer, (self.recordsCount % self.capacity) * self.RECORD.size,
+                              self._clock.seconds(), level, kind, payloadType, accountId, objectId, value)
+        self.recordsCount += 1
+
+    def getRecords(self, count=None):
+        """Returns the latest records in the ring, oldest first."""
+        available = min(self.recordsCount, self.capacity)
+        count = available if count is None else min(count, available)
+        size = self.RECORD.size
+        return [self.RECORD.unpack_from(self._buffer, (index % self.capacity) * size)
+                for index in range(self.recordsCount - count, self.recordsCount)]
+
+    def format(self, record):
+        timestamp, level, kind, payloadType, accountId, objectId, value = record
+        payload = Protobuf.get(payloadType, fail=False) if payloadType else None
+        payloadName = "-" if not payloadType else (payloadType if payload is None else type(payload).__name__)
+        fields = dict(zip(self.FIELDS, record), payloadName=payloadName)
+        text = self.kindFormats.get(kind, "Event {kind}").format(**fields)
+        return f"{datetime.datetime.fromtimestamp(timestamp).isoformat()} {self.LEVEL_NAMES.get(level, level)} {text}"
+
+    def addClient(self, client):
+        """Records a MESSAGE_RECEIVED debug event for each message received by client and a RESPONSE_RECEIVED event for each response."""
+        client.addMessageListener(self._onMessageReceived)
+        client.eventLog = self
+        self._clients.append(client)
+
+    def recordResponse(self, message, responseTimeInMilliseconds):
+        if self.INFO < self.level:
+            return
+        self.record(self.INFO, self.RESPONSE_RECEIVED, message.payloadType, self._getAccountId(message), value=int(responseTimeInMilliseconds * 1000))
+
+    def flush(self):
+        if self._file is None or self._flushedCount == self.recordsCount:
+            return
+        pending = self.recordsCount - self._flushedCount
+        if pending > self.capacity:
+            # The ring was overwritten before it could be flushed
+            self.droppedCount += pending - self.capacity
+            pending = self.capacity
+        size = self.RECORD.size
+        start = ((self.recordsCount - pending) % self.capacity) * size
+        end = start + pending * size
+        data = bytes(self._buffer[start:end]) if end <= len(self._buffer) else bytes(self._buffer[start:]) + bytes(self._buffer[:end - len(self._buffer)])
+        self._flushedCount = self.recordsCount
+        self._writer.submit(self._file.write, data)
+
+    def close(self):
+        for client in self._clients:
+            client.removeMessageListener(self._onMessageReceived)
+            if client.eventLog is self:
+                client.eventLog = None
+        self._clients.clear()
+        if self._file is None:
+            return
+        if self._flushTask.running:
+            self._flushTask.stop()
+        self.flush()
+        self._writer.shutdown(wait=True)
+        self._file.close()
+        self._file = None
+
+    @classmethod
+    def read(cls, path):
+        with open(path, "rb") as file:
+            data = file.read()
+        return list(cls.RECORD.iter_unpack(data[:len(data) - len(data) % cls.RECORD.size]))
+
+    def _onMessageReceived(self, client, message):
+        if self.DEBUG < self.level:
+            return
+        self.record(self.DEBUG, self.MESSAGE_RECEIVED, message.payloadType, self._getAccountId(message), value=len(message.payload))
+
+    @staticmethod
+    def _getAccountId(message):
+        fieldNumber = Protobuf.get_field_number(message.payloadType, "ctidTraderAccountId")
+        return 0 if fieldNumber is None else Protobuf.peek_varint(message.payload, fieldNumber) or 0
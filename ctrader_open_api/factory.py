@@ -7,9 +7,20 @@ class Factory(ClientFactory):
         super().__init__()
         self.client = kwargs['client']
         self.numberOfMessagesToSendPerSecond = self.client.numberOfMessagesToSendPerSecond
+        self.heartbeatIntervalInSeconds = self.client.heartbeatIntervalInSeconds
+        self.coalesceAmendments = self.client.coalesceAmendments
+    @property
+    def stageProfiler(self):
+        return self.client.stageProfiler
     def connected(self, protocol):
         self.client._connected(protocol)
     def disconnected(self, reason):
         self.client._disconnected(reason)
+    def sent(self, clientMsgId):
+        self.client._sent(clientMsgId)
+    def canceled(self, clientMsgId):
+        self.client._canceled(clientMsgId)
+    def superseded(self, clientMsgId, supersedingClientMsgId):
+        self.client._superseded(clientMsgId, supersedingClientMsgId)
     def received(self, message):
         self.client._received(message)
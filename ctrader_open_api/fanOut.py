@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+from twisted.internet import defer
+
+class FanOut:
+    """Sends many requests through a client while keeping a bounded number of them waiting for response."""
+
+    def __init__(self, client, requests, maxInFlight=10, responseTimeoutInSeconds=5):
+        self.client = client
+        self.maxInFlight = maxInFlight
+        self.responseTimeoutInSeconds = responseTimeoutInSeconds
+        self.deferred = defer.Deferred(lambda deferred: self.cancel())
+        self.isCanceled = False
+        self._requests = enumerate(requests)
+        self._results = []
+        self._inFlight = dict()
+        self._isExhausted = False
+        self._isSending = False
+        self._resultCallbacks = []
+
+    def addResultCallback(self, callback):
+        self._resultCallbacks.append(callback)
+
+    def start(self):
+        self._sendNext()
+        return self
+
+    @property
+    def inFlightCount(self):
+        return len(self._inFlight)
+
+    @property
+    def completedCount(self):
+        return len(self._results) - len(self._inFlight)
+
+    def cancel(self):
+        if self.isCanceled or self.deferred.called:
+            return
+        self.isCanceled = True
+        self._isExhausted = True
+        for deferred in list(self._inFlight.values()):
+            deferred.cancel()
+        self._fireIfDone()
+
+    def _sendNext(self):
+        # Responses that are already fired call back while sending, the running loop sends the next requests instead of recursing
+        if self._isSending:
+            return
+        self._isSending = True
+        try:
+            self._sendRequests()
+        finally:
+            self._isSending = False
+        self._fireIfDone()
+
+    def _sendRequests(self):
+        while not self.isCanceled and not self._isExhausted and len(self._inFlight) < self.maxInFlight:
+            try:
+                index, request = next(self._requests)
+            except StopIteration:
+                self._isExhausted = True
+                break
+            self._results.append(None)
+            deferred = self.client.send(request, responseTimeoutInSeconds=self.responseTimeoutInSeconds)
+            self._inFlight[index] = deferred
+            deferred.addCallbacks(self._onResponse, self._onFailure, callbackArgs=(index,), errbackArgs=(index,))
+
+    def _onResponse(self, response, index):
+        self._inFlight.pop(index, None)
+        self._setResult(index, (True, response))
+        self._sendNext()
+
+    def _onFailure(self, failure, index):
+        self._inFlight.pop(index, None)
+        self._setResult(index, (False, failure))
+        self._sendNext()
+
+    def _setResult(self, index, result):
+        self._results[index] = result
+        for callback in self._resultCallbacks:
+            callback(index, *result)
+
+    def _fireIfDone(self):
+        if self._isExhausted and not self._inFlight and not self.deferred.called:
+            self.deferred.callback(self._results)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+
+import array
+import ast
+import os
+from twisted.internet import defer
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (ProtoOADealListReq, ProtoOADealListRes, ProtoOACashFlowHistoryListReq,
+                                                           ProtoOACashFlowHistoryListRes)
+
+DEAL_COLUMNS = [
+    ("dealId", "q", lambda deal: deal.dealId),
+    ("orderId", "q", lambda deal: deal.orderId),
+    ("positionId", "q", lambda deal: deal.positionId),
+    ("symbolId", "q", lambda deal: deal.symbolId),
+    ("volume", "q", lambda deal: deal.volume),
+    ("filledVolume", "q", lambda deal: deal.filledVolume),
+    ("createTimestamp", "q", lambda deal: deal.createTimestamp),
+    ("executionTimestamp", "q", lambda deal: deal.executionTimestamp),
+    ("utcLastUpdateTimestamp", "q", lambda deal: deal.utcLastUpdateTimestamp),
+    ("executionPrice", "d", lambda deal: deal.executionPrice),
+    ("tradeSide", "i", lambda deal: deal.tradeSide),
+    ("dealStatus", "i", lambda deal: deal.dealStatus),
+    ("marginRate", "d", lambda deal: deal.marginRate),
+    ("commission", "q", lambda deal: deal.commission),
+    ("baseToUsdConversionRate", "d", lambda deal: deal.baseToUsdConversionRate),
+    ("moneyDigits", "i", lambda deal: deal.moneyDigits),
+    ("isClosing", "b", lambda deal: deal.HasField("closePositionDetail")),
+    ("closeEntryPrice", "d", lambda deal: deal.closePositionDetail.entryPrice),
+    ("closeGrossProfit", "q", lambda deal: deal.closePositionDetail.grossProfit),
+    ("closeSwap", "q", lambda deal: deal.closePositionDetail.swap),
+    ("closeCommission", "q", lambda deal: deal.closePositionDetail.commission),
+    ("closeBalance", "q", lambda deal: deal.closePositionDetail.balance),
+    ("closeQuoteToDepositConversionRate", "d", lambda deal: deal.closePositionDetail.quoteToDepositConversionRate),
+    ("closeClosedVolume", "q", lambda deal: deal.closePositionDetail.closedVolume),
+    ("closePnlConversionFee", "q", lambda deal: deal.closePositionDetail.pnlConversionFee),
+]
+
+CASH_FLOW_COLUMNS = [
+    ("balanceHistoryId", "q", lambda depositWithdraw: depositWithdraw.balanceHistoryId),
+    ("operationType", "i", lambda depositWithdraw: depositWithdraw.operationType),
+    ("balance", "q", lambda depositWithdraw: depositWithdraw.balance),
+    ("delta", "q", lambda depositWithdraw: depositWithdraw.delta),
+    ("changeBalanceTimestamp", "q", lambda depositWithdraw: depositWithdraw.changeBalanceTimestamp),
+    ("balanceVersion", "q", lambda depositWithdraw: depositWithdraw.balanceVersion),
+    ("equity", "q", lambda depositWithdraw: depositWithdraw.equity),
+    ("moneyDigits", "i", lambda depositWithdraw: depositWithdraw.moneyDigits),
+    ("externalNote", None, lambda depositWithdraw: depositWithdraw.externalNote),
+]
+
+class HistoryExportError(Exception):
+    def __init__(self, response):
+        super().__init__(f"Unexpected response {Protobuf.extract(response)}")
+        self.response = response
+
+class ColumnBatch:
+    """Rows of one page or more kept as typed columns, numeric columns are array.array and text columns are lists."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.rowsCount = 0
+        self.data = {name: (list() if typecode is None else array.array(typecode)) for name, typecode, _ in columns}
+
+    def append(self, row):
+        for name, _, getter in self.columns:
+            self.data[name].append(getter(row))
+        self.rowsCount += 1
+
+    def __len__(self):
+        return self.rowsCount
+
+class NpyChunkWriter:
+    """Writes every batch as one .npy file per column under directory/name/chunk, readable with numpy.load without needing numpy here."""
+    DTYPES = {"q": "<i8", "i": "<i4", "d": "<f8", "b": "|i1"}
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._chunkIndexes = dict()
+
+    def writeBatch(self, name, batch):
+        chunkIndex = self._chunkIndexes.get(name, 0)
+        self._chunkIndexes[name] = chunkIndex + 1
+        chunkDirectory = os.path.join(self.directory, name, f"{chunkIndex:06d}")
+        os.makedirs(chunkDirectory, exist_ok=True)
+        for columnName, column in batch.data.items():
+            with open(os.path.join(chunkDirectory, f"{columnName}.npy"), "wb") as file:
+                self._writeColumn(file, column, batch.rowsCount)
+
+    def close(self):
+        pass
+
+    def _writeColumn(self, file, column, rowsCount):
+        if isinstance(column, array.array):
+            data = self._getLittleEndian(column)
+            dtype = self.DTYPES[column.typecode]
+        else:
+            width = max([len(value) for value in column] + [1])
+            data = b"".join(value.ljust(width, "\0").encode("utf-32-le") for value in column)
+            dtype = f"<U{width}"
+        header = repr({"descr": dtype, "fortran_order": False, "shape": (rowsCount,)})
+        headerLength = 10 + len(header) + 1
+        header += " " * (-headerLength % 64) + "\n"
+        file.write(b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin1"))
+        file.write(data)
+
+    @staticmethod
+    def _getLittleEndian(column):
+        if column.itemsize == 1 or array.array("H", [1]).tobytes()[0] == 1:
+            return column.tobytes()
+        column = array.array(column.typecode, column)
+        column.byteswap()
+        return column.tobytes()
+
+    @staticmethod
+    def read(path):
+        """Reads back a column written by this writer as a list, for environments without numpy."""
+        with open(path, "rb") as file:
+            file.read(8)
+            header = ast.literal_eval(file.read(int.from_bytes(file.read(2), "little")).decode("latin1"))
+            data = file.read()
+        dtype = header["descr"]
+        if dtype.startswith("<U"):
+            width = int(dtype[2:])
+            values = data.decode("utf-32-le")
+            return [values[i:i + width].rstrip("\0") for i in range(0, len(values), width)]
+        typecode = {value: key for key, value in NpyChunkWriter.DTYPES.items()}[dtype]
+        column = array.array(typecode)
+        column.frombytes(data)
+        if column.itemsize > 1 and array.array("H", [1]).tobytes()[0] != 1:
+            column.byteswap()
+        return column.tolist()
+
+class ParquetWriter:
+    """Appends every batch as a row group of directory/name.parquet, needs pyarrow."""
+
+    def __init__(self, directory, compression="snappy"):
+        import pyarrow
+        import pyarrow.parquet
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self.directory = directory
+        self.compression = compression
+        self._writers = dict()
+        self._types = {"q": pyarrow.int64(), "i": pyarrow.int32(), "d": pyarrow.float64(), "b": pyarrow.int8()}
+        os.makedirs(directory, exist_ok=True)
+
+    def writeBatch(self, name, batch):
+        pyarrow = self._pyarrow
+        arrays = []
+        for column in batch.data.values():
+            if isinstance(column, array.array):
+                arrays.append(pyarrow.Array.from_buffers(self._types[column.typecode], len(column), [None, pyarrow.py_buffer(column)]))
+            else:
+                arrays.append(pyarrow.array(column, type=pyarrow.string()))
+        table = pyarrow.Table.from_arrays(arrays, names=list(batch.data))
+        if name not in self._writers:
+            self._writers[name] = self._parquet.ParquetWriter(os.path.join(self.directory, f"{name}.parquet"), table.schema,
+                                                              compression=self.compression)
+        self._writers[name].write_table(table)
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+class HistoryExporter:
+    """Walks deal and cash flow history of an account window by window and streams each page into a columnar writer."""
+    DEALS = "deals"
+    CASH_FLOW = "cashFlow"
+    DEAL_LIST_RES_PAYLOAD_TYPE = ProtoOADealListRes().payloadType
+    CASH_FLOW_HISTORY_LIST_RES_PAYLOAD_TYPE = ProtoOACashFlowHistoryListRes().payloadType
+    MAX_WINDOW_IN_MILLISECONDS = 604800000
+
+    def __init__(self, client, accountId, writer, windowInMilliseconds=MAX_WINDOW_IN_MILLISECONDS, maxRows=None, batchRows=10000,
+                 responseTimeoutInSeconds=30):
+        self.client = client
+        self.accountId = int(accountId)
+        self.writer = writer
+        self.windowInMilliseconds = min(windowInMilliseconds, self.MAX_WINDOW_IN_MILLISECONDS)
+        self.maxRows = maxRows
+        self.batchRows = batchRows
+        self.responseTimeoutInSeconds = responseTimeoutInSeconds
+        self.requestsCount = 0
+        self.rowsCount = {self.DEALS: 0, self.CASH_FLOW: 0}
+
+    @defer.inlineCallbacks
+    def exportDeals(self, fromTimestamp, toTimestamp):
+        batch = ColumnBatch(DEAL_COLUMNS)
+        for windowFrom, windowTo in self._getWindows(fromTimestamp, toTimestamp):
+            boundaryTimestamp, boundaryIds = None, set()
+            while True:
+                request = ProtoOADealListReq(ctidTraderAccountId=self.accountId, fromTimestamp=windowFrom, toTimestamp=windowTo)
+                if self.maxRows is not None:
+                    request.maxRows = self.maxRows
+                response = yield self._send(request, self.DEAL_LIST_RES_PAYLOAD_TYPE)
+                deals = response.deal
+                rowsCount = len(batch)
+                for deal in deals:
+                    if deal.executionTimestamp == boundaryTimestamp and deal.dealId in boundaryIds:
+                        continue
+                    batch.append(deal)
+                isAscending = not deals or deals[0].executionTimestamp <= deals[-1].executionTimestamp
+                hasNewDeals = len(batch) > rowsCount
+                batch = self._flushIfFull(self.DEALS, batch)
+                if not response.hasMore or not deals:
+                    break
+                # Next page continues from the last deal timestamp and deals of that millisecond are skipped by id,
+                # if a whole page was already seen the millisecond has more deals than a page and is stepped over
+                nextTimestamp = deals[-1].executionTimestamp
+                if not hasNewDeals:
+                    nextTimestamp += 1 if isAscending else -1
+                if isAscending:
+                    windowFrom = nextTimestamp
+                else:
+                    windowTo = nextTimestamp
+                if nextTimestamp != boundaryTimestamp:
+                    boundaryTimestamp, boundaryIds = nextTimestamp, set()
+                boundaryIds.update(deal.dealId for deal in deals if deal.executionTimestamp == boundaryTimestamp)
+        self._flush(self.DEALS, batch)
+        return self.rowsCount[self.DEALS]
+
+    @defer.inlineCallbacks
+    def exportCashFlow(self, fromTimestamp, toTimestamp):
+        batch = ColumnBatch(CASH_FLOW_COLUMNS)
+        for windowFrom, windowTo in self._getWindows(fromTimestamp, toTimestamp):
+            request = ProtoOACashFlowHistoryListReq(ctidTraderAccountId=self.accountId, fromTimestamp=windowFrom, toTimestamp=windowTo)
+            response = yield self._send(request, self.CASH_FLOW_HISTORY_LIST_RES_PAYLOAD_TYPE)
+            for depositWithdraw in response.depositWithdraw:
+                batch.append(depositWithdraw)
+            batch = self._flushIfFull(self.CASH_FLOW, batch)
+        self._flush(self.CASH_FLOW, batch)
+        return self.rowsCount[self.CASH_FLOW]
+
+    @defer.inlineCallbacks
+    def exportAll(self, fromTimestamp, toTimestamp):
+        try:
+            deals = yield self.exportDeals(fromTimestamp, toTimestamp)
+            cashFlow = yield self.exportCashFlow(fromTimestamp, toTimestamp)
+        finally:
+            self.writer.close()
+        return {self.DEALS: deals, self.CASH_FLOW: cashFlow}
+
+    def _getWindows(self, fromTimestamp, toTimestamp):
+        while fromTimestamp < toTimestamp:
+            windowTo = min(fromTimestamp + self.windowInMilliseconds, toTimestamp)
+            yield fromTimestamp, windowTo
+            fromTimestamp = windowTo
+
+    def _send(self, request, expectedPayloadType):
+        self.requestsCount += 1
+        deferred = self.client.send(request, responseTimeoutInSeconds=self.responseTimeoutInSeconds)
+        deferred.addCallback(self._extract, expectedPayloadType)
+        return deferred
+
+    def _extract(self, response, expectedPayloadType):
+        if response.payloadType != expectedPayloadType:
+            raise HistoryExportError(response)
+        return Protobuf.extract(response)
+
+    def _flushIfFull(self, name, batch):
+        if len(batch) < self.batchRows:
+            return batch
+        self._flush(name, batch)
+        return ColumnBatch(batch.columns)
+
+    def _flush(self, name, batch):
+        if not len(batch):
+            return
+        self.writer.writeBatch(name, batch)
+        self.rowsCount[name] += len(batch)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+import base64
+import math
+from json.encoder import encode_basestring_ascii
+from google.protobuf.descriptor import FieldDescriptor
+
+class JsonEncoder:
+    """Encodes protobuf messages to the same JSON as MessageToJson, with encoders that are built once per message type.
+
+    Field names, enum names and value converters are looked up from the descriptors only the first time a message type is
+    encoded, after that each set field costs one dictionary lookup and one converter call.
+    """
+    INT64_TYPES = frozenset((FieldDescriptor.TYPE_INT64, FieldDescriptor.TYPE_UINT64, FieldDescriptor.TYPE_SINT64,
+                             FieldDescriptor.TYPE_FIXED64, FieldDescriptor.TYPE_SFIXED64))
+    FLOAT_TYPES = frozenset((FieldDescriptor.TYPE_DOUBLE, FieldDescriptor.TYPE_FLOAT))
+
+    def __init__(self):
+        self._encoders = dict()
+
+    def encode(self, message):
+        parts = []
+        self._encodeMessage(message, parts)
+        return "".join(parts)
+
+    def iterEncode(self, message, chunkSizeInParts=10000):
+        """Yields the JSON of message in chunks, elements of its repeated message fields are encoded chunk by chunk."""
+        fieldEncoders = self._getFieldEncoders(message.DESCRIPTOR)
+        parts = ["{"]
+        separator = ""
+        for field, value in message.ListFields():
+            prefix, encodeValue = fieldEncoders[field.number]
+            parts.append(separator)
+            parts.append(prefix)
+            separator = ","
+            if field.label != FieldDescriptor.LABEL_REPEATED or field.type != FieldDescriptor.TYPE_MESSAGE:
+                encodeValue(value, parts)
+                continue
+            elementSeparator = "["
+            for element in value:
+                parts.append(elementSeparator)
+                self._encodeMessage(element, parts)
+                elementSeparator = ","
+                if len(parts) >= chunkSizeInParts:
+                    yield "".join(parts)
+                    parts = []
+            parts.append("]")
+        parts.append("}")
+        yield "".join(parts)
+
+    def _encodeMessage(self, message, parts):
+        fieldEncoders = self._encoders.get(message.DESCRIPTOR)
+        if fieldEncoders is None:
+            fieldEncoders = self._getFieldEncoders(message.DESCRIPTOR)
+        separator = "{"
+        for field, value in message.ListFields():
+            prefix, encodeValue = fieldEncoders[field.number]
+            parts.append(separator)
+            parts.append(prefix)
+            encodeValue(value, parts)
+            separator = ","
+        parts.append("}" if separator == "," else "{}")
+
+    def _getFieldEncoders(self, descriptor):
+        fieldEncoders = self._encoders.get(descriptor)
+        if fieldEncoders is None:
+            fieldEncoders = self._encoders[descriptor] = dict()
+            for field in descriptor.fields:
+                fieldEncoders[field.number] = (encode_basestring_ascii(field.json_name) + ":", self._getValueEncoder(field))
+        return fieldEncoders
+
+    def _getValueEncoder(self, field):
+        if field.type == FieldDescriptor.TYPE_MESSAGE:
+            encodeMessage = self._encodeMessage
+            if field.label != FieldDescriptor.LABEL_REPEATED:
+                return encodeMessage
+            def encodeMessages(values, parts):
+                separator = "["
+                for value in values:
+                    parts.append(separator)
+                    encodeMessage(value, parts)
+                    separator = ","
+                parts.append("]")
+            return encodeMessages
+        convert = self._getConverter(field)
+        if field.label == FieldDescriptor.LABEL_REPEATED:
+            return lambda values, parts: parts.append("[" + ",".join([convert(value) for value in values]) + "]")
+        return lambda value, parts: parts.append(convert(value))
+
+    def _getConverter(self, field):
+        if field.type == FieldDescriptor.TYPE_STRING:
+            return encode_basestring_ascii
+        if field.type == FieldDescriptor.TYPE_BOOL:
+            return lambda value: "true" if value else "false"
+        if field.type in self.INT64_TYPES:
+            # Like MessageToJson, 64 bits integers are strings as JavaScript numbers can't represent all of them
+            return lambda value: f'"{value}"'
+        if field.type in self.FLOAT_TYPES:
+            return self._convertFloat
+        if field.type == FieldDescriptor.TYPE_ENUM:
+            names = {value.number: f'"{value.name}"' for value in field.enum_type.values}
+            return lambda value: names.get(value) or str(value)
+        if field.type == FieldDescriptor.TYPE_BYTES:
+            return lambda value: '"' + base64.b64encode(value).decode() + '"'
+        return str
+
+    @staticmethod
+    def _convertFloat(value):
+        if math.isfinite(value):
+            return repr(value)
+        if math.isnan(value):
+            return '"NaN"'
+        return '"Infinity"' if value > 0 else '"-Infinity"'
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+from twisted.internet import reactor, task
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAVersionReq, ProtoOASpotEvent, ProtoOADepthEvent
+
+class LivenessMonitor:
+    """Tracks inbound silence and round trip time of a client connection and drops dead peers."""
+    PROBE_CLIENT_MSG_ID_PREFIX = "liveness-"
+    STREAM_PAYLOAD_TYPES = (ProtoOASpotEvent().payloadType, ProtoOADepthEvent().payloadType)
+    STREAM_SYMBOL_ID_FIELD_NUMBERS = {
+        ProtoOASpotEvent().payloadType: ProtoOASpotEvent.DESCRIPTOR.fields_by_name["symbolId"].number,
+        ProtoOADepthEvent().payloadType: ProtoOADepthEvent.DESCRIPTOR.fields_by_name["symbolId"].number,
+    }
+
+    def __init__(self, deadPeerTimeoutInMilliseconds=None, clock=None, trackStreamSymbols=True):
+        self.deadPeerTimeoutInMilliseconds = deadPeerTimeoutInMilliseconds
+        self.trackStreamSymbols = trackStreamSymbols
+        self._clock = reactor if clock is None else clock
+        self._protocol = None
+        self._checkTask = None
+        self._sentTimes = dict()
+        self._streams = dict()
+        self._probeNumber = 0
+        self._probeSentTime = None
+        self.lastReceivedTime = None
+        self.lastSentTime = None
+        self.smoothedRttInMilliseconds = None
+        self.rttVarianceInMilliseconds = None
+        self.deadPeerCount = 0
+
+    def setDeadPeerCallback(self, callback):
+        self._deadPeerCallback = callback
+
+    def setRttSampleCallback(self, callback):
+        self._rttSampleCallback = callback
+
+    def connectionMade(self, protocol):
+        self._protocol = protocol
+        self._sentTimes.clear()
+        self._probeSentTime = None
+        self.lastReceivedTime = self._clock.seconds()
+        if self.deadPeerTimeoutInMilliseconds is None:
+            return
+        self._checkTask = task.LoopingCall(self._check)
+        self._checkTask.clock = self._clock
+        self._checkTask.start(self.getCheckIntervalInMilliseconds() / 1000, now=False)
+
+    def connectionLost(self):
+        self._protocol = None
+        self._sentTimes.clear()
+        if self._checkTask is not None and self._checkTask.running:
+            self._checkTask.stop()
+        self._checkTask = None
+
+    def messageSent(self, clientMsgId=None):
+        now = self._clock.seconds()
+        self.lastSentTime = now
+        if clientMsgId:
+            self._sentTimes[clientMsgId] = now
+
+    def messageForgotten(self, clientMsgId):
+        self._sentTimes.pop(clientMsgId, None)
+
+    def messageReceived(self, message):
+        """Returns the round trip time in milliseconds if message is the response of a sent message, otherwise None."""
+        now = self._clock.seconds()
+        self.lastReceivedTime = now
+        self._probeSentTime = None
+        rttInMilliseconds = None
+        if message.clientMsgId:
+            sentTime = self._sentTimes.pop(message.clientMsgId, None)
+            if sentTime is not None:
+                rttInMilliseconds = (now - sentTime) * 1000
+                self._addRttSample(rttInMilliseconds)
+        if message.payloadType in self.STREAM_PAYLOAD_TYPES:
+            key = message.payloadType
+            if self.trackStreamSymbols:
+                key = (message.payloadType, Protobuf.peek_varint(message.payload, self.STREAM_SYMBOL_ID_FIELD_NUMBERS[message.payloadType]))
+            self._streams[key] = now
+        return rttInMilliseconds
+
+    def getRetransmissionTimeoutInMilliseconds(self):
+        if self.smoothedRttInMilliseconds is None:
+            return None
+        return self.smoothedRttInMilliseconds + 4 * self.rttVarianceInMilliseconds
+
+    def getCheckIntervalInMilliseconds(self):
+        return max(10, self.deadPeerTimeoutInMilliseconds / 10)
+
+    def getProbeAfterInMilliseconds(self):
+        margin = self.deadPeerTimeoutInMilliseconds / 2
+        rto = self.getRetransmissionTimeoutInMilliseconds()
+        if rto is not None:
+            margin = max(margin, rto + self.getCheckIntervalInMilliseconds())
+        return max(0, self.deadPeerTimeoutInMilliseconds - margin)
+
+    def getSilenceInMilliseconds(self):
+        if self.lastReceivedTime is None:
+            return None
+        return (self._clock.seconds() - self.lastReceivedTime) * 1000
+
+    def getStreamFreshness(self):
+        now = self._clock.seconds()
+        return {key: (now - receivedTime) * 1000 for key, receivedTime in self._streams.items()}
+
+    def forgetStream(self, key):
+        self._streams.pop(key, None)
+
+    def _addRttSample(self, sample):
+        if hasattr(self, "_rttSampleCallback"):
+            self._rttSampleCallback(sample)
+        if self.smoothedRttInMilliseconds is None:
+            self.smoothedRttInMilliseconds = sample
+            self.rttVarianceInMilliseconds = sample / 2
+            return
+        self.rttVarianceInMilliseconds = 0.75 * self.rttVarianceInMilliseconds + 0.25 * abs(self.smoothedRttInMilliseconds - sample)
+        self.smoothedRttInMilliseconds = 0.875 * self.smoothedRttInMilliseconds + 0.125 * sample
+
+    def _check(self):
+        if self._protocol is None:
+            return
+        silence = self.getSilenceInMilliseconds()
+        if silence >= self.deadPeerTimeoutInMilliseconds:
+            self._declareDead(silence)
+        elif silence >= self.getProbeAfterInMilliseconds() and self._probeSentTime is None:
+            self._probe()
+
+    def _probe(self):
+        self._probeNumber += 1
+        clientMsgId = f"{self.PROBE_CLIENT_MSG_ID_PREFIX}{self._probeNumber}"
+        self._probeSentTime = self._clock.seconds()
+        self._protocol.send(ProtoOAVersionReq(), instant=True, clientMsgId=clientMsgId)
+        self._sentTimes[clientMsgId] = self._probeSentTime
+
+    def _declareDead(self, silence):
+        protocol = self._protocol
+        self.deadPeerCount += 1
+        self.connectionLost()
+        if hasattr(self, "_deadPeerCallback"):
+            self._deadPeerCallback(silence)
+        if protocol.transport is not None:
+            protocol.transport.abortConnection()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+from bisect import bisect_left
+from twisted.web.resource import Resource
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+    TYPE = "counter"
+
+    def __init__(self, name, help, labelNames=()):
+        self.name = name
+        self.help = help
+        self.labelNames = tuple(labelNames)
+        self.values = {(): 0} if not labelNames else dict()
+
+    def inc(self, amount=1, labelValues=()):
+        values = self.values
+        values[labelValues] = values.get(labelValues, 0) + amount
+
+    def getValue(self, labelValues=()):
+        return self.values.get(labelValues, 0)
+
+    def collect(self):
+        return [(self.name + "_total", labelValues, value) for labelValues, value in self.values.items()]
+
+class Gauge:
+    """Value that can go up and down, if function is set it's called only when the gauge is collected."""
+    TYPE = "gauge"
+
+    def __init__(self, name, help, function=None):
+        self.name = name
+        self.help = help
+        self.labelNames = ()
+        self.function = function
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def getValue(self):
+        return self.value if self.function is None else self.function()
+
+    def collect(self):
+        return [(self.name, (), self.getValue())]
+
+class Histogram:
+    """Counts observed values in buckets, buckets are the upper bounds of each bucket in ascending order."""
+    TYPE = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelNames = ()
+        self.buckets = tuple(buckets)
+        # The last count is for values above the last bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def collect(self):
+        samples = []
+        cumulativeCount = 0
+        for bucket, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulativeCount += count
+            samples.append((self.name + "_bucket", (("le", "+Inf" if bucket == float("inf") else repr(float(bucket))),), cumulativeCount))
+        samples.append((self.name + "_sum", (), self.sum))
+        samples.append((self.name + "_count", (), self.count))
+        return samples
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.metrics = dict()
+
+    def counter(self, name, help, labelNames=()):
+        return self._register(Counter(name, help, labelNames))
+
+    def gauge(self, name, help, function=None):
+        return self._register(Gauge(name, help, function))
+
+    def histogram(self, name, help, buckets=Histogram.DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, buckets))
+
+    def get(self, name):
+        return self.metrics[name]
+
+    def collect(self):
+        """Returns {name: value} for counters without labels and gauges, {name: {labelValues: value}} for labeled counters."""
+        result = dict()
+        for name, metric in self.metrics.items():
+            if isinstance(metric, Histogram):
+                result[name] = {"buckets": dict(zip(metric.buckets, metric.counts)), "sum": metric.sum, "count": metric.count}
+            elif metric.labelNames:
+                result[name] = dict(metric.values)
+            else:
+                result[name] = metric.getValue()
+        return result
+
+    def render(self):
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.TYPE}")
+            for sampleName, labelValues, value in metric.collect():
+                if labelValues and not isinstance(labelValues[0], tuple):
+                    labelValues = tuple(zip(metric.labelNames, labelValues))
+                labels = ",".join(f'{labelName}="{labelValue}"' for labelName, labelValue in labelValues)
+                lines.append(f"{sampleName}{{{labels}}} {value}" if labels else f"{sampleName} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+class MetricsResource(Resource):
+    """Twisted web resource that returns the metrics of a registry for Prometheus to scrape."""
+    isLeaf = True
+
+    def __init__(self, registry):
+        super().__init__()
+        self.registry = registry
+
+    def render_GET(self, request):
+        request.setHeader(b"content-type", b"text/plain; version=0.0.4; charset=utf-8")
+        return self.registry.render().encode()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+from concurrent import futures
+from twisted.internet import reactor, defer
+
+class StaleResultError(Exception):
+    pass
+
+class Offloader:
+    """Runs CPU heavy functions in a process or thread pool and returns their results as deferreds on the reactor thread.
+
+    Only one evaluation per key runs at a time, a newer submit for a busy key replaces the waiting one, and results that
+    arrive after their deadline fail with StaleResultError instead of being used.
+    """
+
+    def __init__(self, executor=None, maxWorkers=None, useProcesses=True, clock=None):
+        if executor is None:
+            executor = futures.ProcessPoolExecutor(maxWorkers) if useProcesses else futures.ThreadPoolExecutor(maxWorkers)
+        self.executor = executor
+        self.staleCount = 0
+        self.replacedCount = 0
+        self._clock = reactor if clock is None else clock
+        self._running = dict()
+        self._waiting = dict()
+
+    def submit(self, key, function, *args, deadlineInSeconds=None):
+        """Calls function(*args) in the pool, args are pickled for a process pool so they should be compact snapshots."""
+        deferred = defer.Deferred()
+        deadline = None if deadlineInSeconds is None else self._clock.seconds() + deadlineInSeconds
+        if key in self._running:
+            previous = self._waiting.pop(key, None)
+            self._waiting[key] = (deferred, function, args, deadline)
+            if previous is not None:
+                self.replacedCount += 1
+                previous[0].errback(StaleResultError(f"Replaced by a newer evaluation of {key}"))
+            return deferred
+        self._start(key, deferred, function, args, deadline)
+        return deferred
+
+    def isBusy(self, key):
+        return key in self._running
+
+    def shutdown(self, wait=False):
+        for deferred, _, _, _ in self._waiting.values():
+            deferred.errback(StaleResultError("Offloader is shut down"))
+        self._waiting.clear()
+        self.executor.shutdown(wait=wait)
+
+    def _start(self, key, deferred, function, args, deadline):
+        self._running[key] = deferred
+        try:
+            future = self.executor.submit(function, *args)
+        except Exception as e:
+            self._running.pop(key, None)
+            deferred.errback(e)
+            return
+        future.add_done_callback(lambda future: self._clock.callFromThread(self._onDone, key, deferred, future, deadline))
+
+    def _onDone(self, key, deferred, future, deadline):
+        del self._running[key]
+        waiting = self._waiting.pop(key, None)
+        if waiting is not None:
+            self._start(key, *waiting)
+        if deadline is not None and self._clock.seconds() > deadline:
+            self.staleCount += 1
+            deferred.errback(StaleResultError(f"Evaluation of {key} finished after its deadline"))
+            return
+        if future.cancelled():
+            deferred.errback(defer.CancelledError())
+            return
+        exception = future.exception()
+        if exception is not None:
+            deferred.errback(exception)
+        else:
+            deferred.callback(future.result())
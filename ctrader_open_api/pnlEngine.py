@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+
+from twisted.internet import defer, task
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (ProtoOASpotEvent, ProtoOASymbolsForConversionReq, ProtoOASymbolsForConversionRes,
+                                                           ProtoOAGetPositionUnrealizedPnLReq, ProtoOAGetPositionUnrealizedPnLRes)
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOATradeSide
+
+class PnlEngine:
+    """Computes unrealized PnL of an AccountState open positions from live spot quotes."""
+    SPOT_EVENT_PAYLOAD_TYPE = ProtoOASpotEvent().payloadType
+    SPOT_EVENT_SYMBOL_ID_FIELD_NUMBER = ProtoOASpotEvent.DESCRIPTOR.fields_by_name["symbolId"].number
+    PRICE_DIVISOR = 100000
+    VOLUME_DIVISOR = 100
+
+    def __init__(self, accountState, client=None, depositAssetId=None):
+        self.accountState = accountState
+        self.client = client if client is not None else accountState.client
+        self.depositAssetId = depositAssetId
+        self.lastServerPnl = None
+        self.lastDrift = None
+        self._symbolAssets = dict()
+        self._conversionChains = dict()
+        self._quotes = dict()
+        self._aggregates = dict()
+        self._conversionSymbolIds = set()
+        self._pnlCallbacks = []
+        self._crossCheckTask = None
+        accountState.addUpdateCallback(self._onAccountStateUpdated)
+        self.rebuild()
+        if self.client is not None:
+            self.client.addMessageListener(self._onMessageReceived)
+
+    def addPnlCallback(self, callback):
+        self._pnlCallbacks.append(callback)
+
+    def setSymbols(self, symbols):
+        for symbol in symbols:
+            self._symbolAssets[symbol.symbolId] = (symbol.baseAssetId, symbol.quoteAssetId)
+
+    def setConversionChain(self, fromAssetId, symbols):
+        self._conversionChains[fromAssetId] = [(symbol.symbolId, symbol.baseAssetId, symbol.quoteAssetId) for symbol in symbols]
+        self._conversionSymbolIds = {symbolId for chain in self._conversionChains.values() for symbolId, _, _ in chain}
+
+    def getRequiredSymbolIds(self):
+        return set(self._aggregates) | self._conversionSymbolIds
+
+    def loadConversionChains(self):
+        depositAssetId = self._getDepositAssetId()
+        deferreds = []
+        for quoteAssetId in {self._symbolAssets[symbolId][1] for symbolId in self._aggregates if symbolId in self._symbolAssets}:
+            if quoteAssetId == depositAssetId or quoteAssetId in self._conversionChains:
+                continue
+            request = ProtoOASymbolsForConversionReq(ctidTraderAccountId=self.accountState.accountId, firstAssetId=quoteAssetId, lastAssetId=depositAssetId)
+            deferred = self.client.send(request)
+            deferred.addCallback(self._onSymbolsForConversionRes, quoteAssetId)
+            deferreds.append(deferred)
+        return defer.gatherResults(deferreds, consumeErrors=True)
+
+    def setQuote(self, symbolId, bid=None, ask=None):
+        quote = self._quotes.get(symbolId)
+        if quote is None:
+            quote = self._quotes[symbolId] = [bid, ask]
+        if bid:
+            quote[0] = bid
+        if ask:
+            quote[1] = ask
+
+    def rebuild(self, symbolIds=None):
+        if symbolIds is None:
+            self._aggregates.clear()
+            symbolIds = {position.tradeData.symbolId for position in self.accountState.getPositions()}
+        for symbolId in symbolIds:
+            aggregate = [0, 0.0, 0, 0.0]
+            for position in self.accountState.getPositionsBySymbol(symbolId):
+                offset = 0 if position.tradeData.tradeSide == ProtoOATradeSide.BUY else 2
+                aggregate[offset] += position.tradeData.volume
+                aggregate[offset + 1] += position.tradeData.volume * position.price
+            if aggregate[0] or aggregate[2]:
+                self._aggregates[symbolId] = aggregate
+            else:
+                self._aggregates.pop(symbolId, None)
+
+    def getSymbolPnl(self, symbolId):
+        aggregate = self._aggregates.get(symbolId)
+        quote = self._quotes.get(symbolId)
+        if aggregate is None:
+            return 0.0
+        if quote is None or (aggregate[0] and not quote[0]) or (aggregate[2] and not quote[1]):
+            return None
+        buyVolume, buyCost, sellVolume, sellCost = aggregate
+        bid = quote[0] or 0
+        ask = quote[1] or 0
+        return (buyVolume * bid - buyCost + sellCost - sellVolume * ask) / self.VOLUME_DIVISOR
+
+    def getPositionPnl(self, positionId):
+        position = self.accountState.getPosition(positionId)
+        quote = None if position is None else self._quotes.get(position.tradeData.symbolId)
+        if quote is None:
+            return None
+        tradeData = position.tradeData
+        if tradeData.tradeSide == ProtoOATradeSide.BUY:
+            pnl = (quote[0] - position.price) * tradeData.volume if quote[0] else None
+        else:
+            pnl = (position.price - quote[1]) * tradeData.volume if quote[1] else None
+        rate = self.getConversionRate(tradeData.symbolId)
+        if pnl is None or rate is None:
+            return None
+        return pnl / self.VOLUME_DIVISOR * rate
+
+    def getUnrealizedPnl(self):
+        total = 0.0
+        for symbolId in self._aggregates:
+            pnl = self.getSymbolPnl(symbolId)
+            rate = self.getConversionRate(symbolId)
+            if pnl is None or rate is None:
+                return None
+            total += pnl * rate
+        return total
+
+    def getConversionRate(self, symbolId):
+        if symbolId not in self._symbolAssets:
+            return None
+        quoteAssetId = self._symbolAssets[symbolId][1]
+        if quoteAssetId == self._getDepositAssetId():
+            return 1.0
+        chain = self._conversionChains.get(quoteAssetId)
+        if chain is None:
+            return None
+        rate = 1.0
+        assetId = quoteAssetId
+        for conversionSymbolId, baseAssetId, conversionQuoteAssetId in chain:
+            price = self._getMidPrice(conversionSymbolId)
+            if price is None:
+                return None
+            if assetId == baseAssetId:
+                rate *= price
+                assetId = conversionQuoteAssetId
+            else:
+                rate /= price
+                assetId = baseAssetId
+        return rate
+
+    def crossCheck(self):
+        request = ProtoOAGetPositionUnrealizedPnLReq(ctidTraderAccountId=self.accountState.accountId)
+        deferred = self.client.send(request)
+        deferred.addCallback(self._onUnrealizedPnLRes)
+        return deferred
+
+    def startCrossCheck(self, intervalInSeconds=60):
+        self.stopCrossCheck()
+        self._crossCheckTask = task.LoopingCall(lambda: self.crossCheck().addErrback(lambda failure: None))
+        self._crossCheckTask.start(intervalInSeconds, now=False)
+
+    def stopCrossCheck(self):
+        if self._crossCheckTask is not None and self._crossCheckTask.running:
+            self._crossCheckTask.stop()
+        self._crossCheckTask = None
+
+    def stop(self):
+        self.stopCrossCheck()
+        if self.client is not None:
+            self.client.removeMessageListener(self._onMessageReceived)
+
+    def _getDepositAssetId(self):
+        if self.depositAssetId is None and self.accountState.trader is not None:
+            return self.accountState.trader.depositAssetId
+        return self.depositAssetId
+
+    def _getMidPrice(self, symbolId):
+        quote = self._quotes.get(symbolId)
+        if quote is None or not quote[0] or not quote[1]:
+            return None
+        return (quote[0] + quote[1]) / 2
+
+    def _onSymbolsForConversionRes(self, message, quoteAssetId):
+        if message.payloadType == ProtoOASymbolsForConversionRes().payloadType:
+            self.setConversionChain(quoteAssetId, Protobuf.extract(message).symbol)
+        return message
+
+    def _onUnrealizedPnLRes(self, message):
+        if message.payloadType != ProtoOAGetPositionUnrealizedPnLRes().payloadType:
+            return message
+        response = Protobuf.extract(message)
+        self.lastServerPnl = sum(pnl.grossUnrealizedPnL for pnl in response.positionUnrealizedPnL) / 10 ** response.moneyDigits
+        localPnl = self.getUnrealizedPnl()
+        self.lastDrift = None if localPnl is None else localPnl - self.lastServerPnl
+        return self.lastDrift
+
+    def _onAccountStateUpdated(self, accountState, payload):
+        if payload.payloadType == accountState.EXECUTION_EVENT_PAYLOAD_TYPE:
+            if payload.HasField("position"):
+                self.rebuild([payload.position.tradeData.symbolId])
+        elif payload.payloadType == accountState.RECONCILE_RES_PAYLOAD_TYPE:
+            self.rebuild()
+
+    def _onMessageReceived(self, client, message):
+        if message.payloadType != self.SPOT_EVENT_PAYLOAD_TYPE:
+            return
+        symbolId = Protobuf.peek_varint(message.payload, self.SPOT_EVENT_SYMBOL_ID_FIELD_NUMBER)
+        if symbolId not in self._aggregates and symbolId not in self._conversionSymbolIds:
+            return
+        spotEvent = Protobuf.extract(message)
+        if spotEvent.ctidTraderAccountId != self.accountState.accountId:
+            return
+        self.setQuote(symbolId, spotEvent.bid / self.PRICE_DIVISOR, spotEvent.ask / self.PRICE_DIVISOR)
+        if self._pnlCallbacks:
+            pnl = self.getUnrealizedPnl()
+            for callback in self._pnlCallbacks:
+                callback(self, pnl)
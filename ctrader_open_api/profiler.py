@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""Stage profiling of received messages.
+
+To profile a captured session run: python -m ctrader_open_api.profiler session.bin [--setup module:function] [--sample-every N]
+"""
+
+import argparse
+import importlib
+import sys
+import time
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.decode import LENGTH
+
+class StageProfiler:
+    """Records the time and allocated memory blocks of each stage of received messages per payload type.
+
+    Stages are nested: frame (Int32StringReceiver.dataReceived of a chunk) includes parse (ProtoMessage.ParseFromString)
+    and dispatch (Factory.received and Client._received), which includes callback, each listener and response callbacks.
+    Only one of every sampleEvery received chunks is measured.
+    """
+    HEADER = ("payload type", "stage", "count", "total ms", "mean us", "max us", "blocks")
+
+    def __init__(self, sampleEvery=1, trackAllocations=True):
+        self.sampleEvery = sampleEvery
+        self.trackAllocations = trackAllocations
+        self.isSampling = False
+        self.stats = dict()
+        self._chunksCount = 0
+
+    def startSample(self):
+        self._chunksCount += 1
+        self.isSampling = self._chunksCount % self.sampleEvery == 0
+        return self.isSampling
+
+    def stopSample(self):
+        self.isSampling = False
+
+    def start(self):
+        return time.perf_counter_ns(), sys.getallocatedblocks() if self.trackAllocations else 0
+
+    def stop(self, stage, payloadType, started):
+        nanoseconds = time.perf_counter_ns() - started[0]
+        blocks = sys.getallocatedblocks() - started[1] if self.trackAllocations else 0
+        key = (payloadType, stage)
+        stats = self.stats.get(key)
+        if stats is None:
+            self.stats[key] = [1, nanoseconds, nanoseconds, blocks]
+            return
+        stats[0] += 1
+        stats[1] += nanoseconds
+        if nanoseconds > stats[2]:
+            stats[2] = nanoseconds
+        stats[3] += blocks
+
+    def measure(self, stage, payloadType, function, *args):
+        started = self.start()
+        try:
+            return function(*args)
+        finally:
+            self.stop(stage, payloadType, started)
+
+    def reset(self):
+        self.stats.clear()
+
+    def getReport(self):
+        """Returns rows of HEADER values sorted by total time, blocks is the mean count of memory blocks left allocated."""
+        rows = []
+        for (payloadType, stage), (count, nanoseconds, maxNanoseconds, blocks) in self.stats.items():
+            payload = Protobuf.get(payloadType, fail=False) if payloadType else None
+            payloadName = "-" if not payloadType else (payloadType if payload is None else type(payload).__name__)
+            rows.append((payloadName, stage, count, nanoseconds / 1e6, nanoseconds / count / 1e3, maxNanoseconds / 1e3, blocks / count))
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows
+
+    def formatReport(self):
+        lines = ["{:<34} {:<40} {:>8} {:>10} {:>10} {:>10} {:>8}".format(*self.HEADER)]
+        for row in self.getReport():
+            lines.append("{:<34} {:<40} {:>8} {:>10.3f} {:>10.2f} {:>10.2f} {:>8.1f}".format(*row))
+        return "\n".join(lines)
+
+class SessionRecorder:
+    """Writes each message received by a client to a file in the same framing as the wire, to replay it with the profiler."""
+
+    def __init__(self, client, path):
+        self.client = client
+        self._file = open(path, "wb")
+        client.addMessageListener(self._onMessageReceived)
+
+    def stop(self):
+        self.client.removeMessageListener(self._onMessageReceived)
+        self._file.close()
+
+    def _onMessageReceived(self, client, message):
+        data = message.SerializeToString()
+        self._file.write(LENGTH.pack(len(data)) + data)
+
+def replay(path, client, profiler, chunkSizeInBytes=65536):
+    """Feeds a recorded session to a TcpProtocol of client in chunks and returns the number of bytes replayed."""
+    from twisted.internet.testing import StringTransport
+    from ctrader_open_api.factory import Factory
+    from ctrader_open_api.tcpProtocol import TcpProtocol
+    client.stageProfiler = profiler
+    protocol = TcpProtocol()
+    protocol.factory = Factory(client=client)
+    protocol.makeConnection(StringTransport())
+    with open(path, "rb") as file:
+        data = file.read()
+    try:
+        for offset in range(0, len(data), chunkSizeInBytes):
+            protocol.dataReceived(data[offset:offset + chunkSizeInBytes])
+    finally:
+        protocol._send_task.stop()
+    return len(data)
+
+def main(arguments=None):
+    from ctrader_open_api.client import Client
+    from ctrader_open_api.tcpProtocol import TcpProtocol
+    parser = argparse.ArgumentParser(description="Replays a session recorded with SessionRecorder and shows where the time of each stage goes.")
+    parser.add_argument("path")
+    parser.add_argument("--setup", help="module:function called with the client before replaying, to add listeners")
+    parser.add_argument("--sample-every", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    parser.add_argument("--no-allocations", action="store_true")
+    arguments = parser.parse_args(arguments)
+    client = Client("localhost", 5035, TcpProtocol)
+    if arguments.setup:
+        moduleName, functionName = arguments.setup.split(":")
+        getattr(importlib.import_module(moduleName), functionName)(client)
+    profiler = StageProfiler(arguments.sample_every, not arguments.no_allocations)
+    size = replay(arguments.path, client, profiler, arguments.chunk_size)
+    print(f"Replayed {size} bytes")
+    print(profiler.formatReport())
+
+if __name__ == "__main__":
+    main()
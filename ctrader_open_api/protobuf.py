@@ -4,6 +4,7 @@ class Protobuf(object):
     _protos = dict()
     _names = dict()
     _abbr_names = dict()
+    _field_numbers = dict()
 
     @classmethod
     def populate(cls):
@@ -49,3 +50,47 @@ class Protobuf(object):
         payload = cls.get(message.payloadType)
         payload.ParseFromString(message.payload)
         return payload
+
+    @classmethod
+    def get_field_number(cls, payloadType, fieldName):
+        key = (payloadType, fieldName)
+        if key not in cls._field_numbers:
+            message = cls.get(payloadType, fail=False)
+            field = None if message is None else message.DESCRIPTOR.fields_by_name.get(fieldName)
+            cls._field_numbers[key] = None if field is None else field.number
+        return cls._field_numbers[key]
+
+    @classmethod
+    def peek_varint(cls, data, fieldNumber):
+        """Reads the first varint value of a field from serialized bytes without decoding the message."""
+        pos = 0
+        size = len(data)
+        while pos < size:
+            key, pos = cls._read_varint(data, pos)
+            wireType = key & 7
+            if wireType == 0:
+                value, pos = cls._read_varint(data, pos)
+                if key >> 3 == fieldNumber:
+                    return value
+            elif wireType == 2:
+                length, pos = cls._read_varint(data, pos)
+                pos += length
+            elif wireType == 1:
+                pos += 8
+            elif wireType == 5:
+                pos += 4
+            else:
+                return None
+        return None
+
+    @staticmethod
+    def _read_varint(data, pos):
+        result = 0
+        shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7f) << shift
+            if not byte & 0x80:
+                return result, pos
+            shift += 7
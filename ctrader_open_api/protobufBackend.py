@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+import importlib.util
+import os
+import sys
+import warnings
+
+class SlowProtobufWarning(RuntimeWarning):
+    pass
+
+class ProtobufBackend:
+    """Detects the protobuf implementation that parses and serializes messages, the pure Python one is many times slower.
+
+    The implementation is chosen when protobuf is imported first, so enableFastMode must be called before any message
+    module (or a class that uses them like Client) is imported.
+    """
+    PYTHON = "python"
+    CPP = "cpp"
+    UPB = "upb"
+    ENVIRONMENT_VARIABLE = "PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION"
+    EXTENSION_MODULES = {UPB: "google._upb._message", CPP: "google.protobuf.pyext._message"}
+    _isWarned = False
+
+    @classmethod
+    def getActive(cls):
+        from google.protobuf.internal import api_implementation
+        return api_implementation.Type()
+
+    @classmethod
+    def isAccelerated(cls):
+        return cls.getActive() != cls.PYTHON
+
+    @classmethod
+    def isSelected(cls):
+        return "google.protobuf.internal.api_implementation" in sys.modules
+
+    @classmethod
+    def getAvailable(cls):
+        """Returns the backends that can be used, fastest first, without importing protobuf messages."""
+        return [backend for backend, moduleName in cls.EXTENSION_MODULES.items() if cls._isImportable(moduleName)] + [cls.PYTHON]
+
+    @classmethod
+    def enableFastMode(cls):
+        """Selects the fastest available backend and returns it, or returns the active backend if it's already selected."""
+        if cls.isSelected():
+            return cls.getActive()
+        backend = cls.getAvailable()[0]
+        if backend != cls.PYTHON:
+            os.environ[cls.ENVIRONMENT_VARIABLE] = backend
+        return backend
+
+    @classmethod
+    def warnIfSlow(cls):
+        if cls._isWarned or cls.isAccelerated():
+            return
+        cls._isWarned = True
+        warnings.warn("protobuf uses its pure Python implementation, parsing and serializing messages is many times slower. "
+                      "Install a protobuf version that has the upb or cpp extension for your Python version and platform, "
+                      "and call ProtobufBackend.enableFastMode() before importing Client.", SlowProtobufWarning, stacklevel=2)
+
+    @staticmethod
+    def _isImportable(moduleName):
+        try:
+            return importlib.util.find_spec(moduleName) is not None
+        except ImportError:
+            return False
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+import json
+from collections import OrderedDict, deque
+from zope.interface import implementer
+from twisted.internet.interfaces import IPushProducer
+from twisted.web.resource import Resource
+from twisted.web.server import NOT_DONE_YET
+from google.protobuf.json_format import MessageToDict
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.conflator import Conflator
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent, ProtoOADepthEvent, ProtoOAExecutionEvent
+
+@implementer(IPushProducer)
+class _Subscriber:
+    """One Server-Sent Events connection, spot and depth updates are conflated per symbol while its transport is paused."""
+
+    def __init__(self, gateway, request, symbolIds):
+        self.gateway = gateway
+        self.request = request
+        self.symbolIds = symbolIds
+        self.isPaused = False
+        self.conflatedCount = 0
+        self._spots = OrderedDict()
+        self._depths = OrderedDict()
+        self._events = deque()
+
+    def wants(self, symbolId):
+        return self.symbolIds is None or symbolId in self.symbolIds
+
+    def pushSpot(self, symbolId, data, event):
+        if not self.isPaused:
+            self.request.write(data)
+            return
+        previous = self._spots.get(symbolId)
+        if previous is not None:
+            self.conflatedCount += 1
+            event = Conflator.mergeSpotEvents(previous, event)
+        self._spots[symbolId] = event
+
+    def pushDepth(self, symbolId, data, newQuotes, deletedQuotes):
+        if not self.isPaused:
+            self.request.write(data)
+            return
+        pending = self._depths.get(symbolId)
+        if pending is None:
+            pending = self._depths[symbolId] = (dict(), set())
+        else:
+            self.conflatedCount += 1
+        for quote in newQuotes:
+            pending[0][quote["id"]] = quote
+            pending[1].discard(quote["id"])
+        for quoteId in deletedQuotes:
+            pending[0].pop(quoteId, None)
+            pending[1].add(quoteId)
+
+    def pushEvent(self, data):
+        if not self.isPaused and not self._events:
+            self.request.write(data)
+            return
+        if len(self._events) >= self.gateway.maxQueuedEvents:
+            # Events that can't be conflated are never dropped, a consumer that is too slow for them is disconnected
+            self.gateway.slowConsumersCount += 1
+            self.request.loseConnection()
+            return
+        self._events.append(data)
+
+    def pauseProducing(self):
+        self.isPaused = True
+
+    def resumeProducing(self):
+        self.isPaused = False
+        while self._events and not self.isPaused:
+            self.request.write(self._events.popleft())
+        while self._depths and not self.isPaused:
+            symbolId, (newQuotes, deletedQuotes) = self._depths.popitem(last=False)
+            self.request.write(self.gateway.encodeDepth(symbolId, list(newQuotes.values()), sorted(deletedQuotes)))
+        while self._spots and not self.isPaused:
+            symbolId, event = self._spots.popitem(last=False)
+            self.request.write(self.gateway.encodeSpot(symbolId, event.bid, event.ask, event.timestamp))
+
+    def stopProducing(self):
+        self.gateway._removeSubscriber(self)
+
+class PushGateway(Resource):
+    """Server-Sent Events resource that fans out spot, depth and execution events of one client to many HTTP clients.
+
+    Each event is decoded and serialized once, every subscriber gets the same bytes. Slow subscribers are paused by
+    their transport and get only the latest spot and merged depth changes of each symbol once they catch up.
+    """
+    isLeaf = True
+    SPOT_EVENT_PAYLOAD_TYPE = ProtoOASpotEvent().payloadType
+    DEPTH_EVENT_PAYLOAD_TYPE = ProtoOADepthEvent().payloadType
+    EXECUTION_EVENT_PAYLOAD_TYPE = ProtoOAExecutionEvent().payloadType
+
+    def __init__(self, client, accountId=None, maxQueuedEvents=1000, eventPayloadTypes=(EXECUTION_EVENT_PAYLOAD_TYPE,)):
+        super().__init__()
+        self.client = client
+        self.accountId = accountId
+        self.maxQueuedEvents = maxQueuedEvents
+        self.eventPayloadTypes = frozenset(eventPayloadTypes)
+        self.slowConsumersCount = 0
+        self.subscribers = set()
+        client.addMessageListener(self._onMessageReceived)
+
+    def render_GET(self, request):
+        symbols = request.args.get(b"symbols", [b""])[0]
+        symbolIds = {int(symbolId) for symbolId in symbols.split(b",")} if symbols else None
+        request.setHeader(b"content-type", b"text/event-stream")
+        request.setHeader(b"cache-control", b"no-cache")
+        subscriber = _Subscriber(self, request, symbolIds)
+        request.registerProducer(subscriber, True)
+        request.notifyFinish().addBoth(lambda result: self._removeSubscriber(subscriber))
+        self.subscribers.add(subscriber)
+        request.write(b": connected\n\n")
+        return NOT_DONE_YET
+
+    def stop(self):
+        self.client.removeMessageListener(self._onMessageReceived)
+        for subscriber in list(self.subscribers):
+            subscriber.request.finish()
+        self.subscribers.clear()
+
+    def getConflatedCount(self):
+        return sum(subscriber.conflatedCount for subscriber in self.subscribers)
+
+    @staticmethod
+    def encode(eventName, data):
+        return b"event: " + eventName + b"\ndata: " + json.dumps(data, separators=(",", ":")).encode() + b"\n\n"
+
+    def encodeSpot(self, symbolId, bid, ask, timestamp):
+        return self.encode(b"spot", {"symbolId": symbolId, "bid": bid, "ask": ask, "timestamp": timestamp})
+
+    def encodeDepth(self, symbolId, newQuotes, deletedQuotes):
+        return self.encode(b"depth", {"symbolId": symbolId, "new": newQuotes, "deleted": deletedQuotes})
+
+    def _removeSubscriber(self, subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.discard(subscriber)
+            if subscriber.request.channel is not None:
+                subscriber.request.unregisterProducer()
+
+    def _onMessageReceived(self, client, message):
+        payloadType = message.payloadType
+        if not self.subscribers or (payloadType != self.SPOT_EVENT_PAYLOAD_TYPE and payloadType != self.DEPTH_EVENT_PAYLOAD_TYPE
+                                    and payloadType not in self.eventPayloadTypes):
+            return
+        event = Protobuf.extract(message)
+        if self.accountId is not None and getattr(event, "ctidTraderAccountId", self.accountId) != self.accountId:
+            return
+        if payloadType == self.SPOT_EVENT_PAYLOAD_TYPE:
+            symbolId = event.symbolId
+            data = self.encodeSpot(symbolId, event.bid, event.ask, event.timestamp)
+            for subscriber in list(self.subscribers):
+                if subscriber.wants(symbolId):
+                    subscriber.pushSpot(symbolId, data, event)
+        elif payloadType == self.DEPTH_EVENT_PAYLOAD_TYPE:
+            symbolId = event.symbolId
+            newQuotes = [{"id": quote.id, "size": quote.size, "bid": quote.bid, "ask": quote.ask} for quote in event.newQuotes]
+            deletedQuotes = list(event.deletedQuotes)
+            data = self.encodeDepth(symbolId, newQuotes, deletedQuotes)
+            for subscriber in list(self.subscribers):
+                if subscriber.wants(symbolId):
+                    subscriber.pushDepth(symbolId, data, newQuotes, deletedQuotes)
+        else:
+            data = self.encode(type(event).__name__.encode(), MessageToDict(event))
+            for subscriber in list(self.subscribers):
+                subscriber.pushEvent(data)
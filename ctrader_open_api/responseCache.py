@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+from collections import OrderedDict
+from twisted.internet import reactor, defer
+from twisted.python import failure
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage, ProtoErrorRes
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (ProtoOAErrorRes, ProtoOAVersionReq, ProtoOAAssetListReq, ProtoOAAssetClassListReq,
+                                                          ProtoOASymbolCategoryListReq, ProtoOASymbolsListReq, ProtoOASymbolByIdReq,
+                                                          ProtoOATraderReq, ProtoOASymbolChangedEvent, ProtoOATraderUpdatedEvent)
+
+class ResponseCache:
+    """Caches responses of read-only requests sent through a client and merges identical requests that are waiting for response.
+
+    Entries expire after the TTL of their request payload type and the least recently used ones are evicted when the cached
+    responses size exceeds maxSizeInBytes. Symbol and trader entries of an account are dropped when its symbols or trader change.
+    """
+    ERROR_PAYLOAD_TYPES = frozenset((ProtoErrorRes().payloadType, ProtoOAErrorRes().payloadType))
+    SYMBOL_CHANGED_EVENT_PAYLOAD_TYPE = ProtoOASymbolChangedEvent().payloadType
+    TRADER_UPDATED_EVENT_PAYLOAD_TYPE = ProtoOATraderUpdatedEvent().payloadType
+    DEFAULT_TTLS_IN_SECONDS = {
+        ProtoOAVersionReq().payloadType: 3600,
+        ProtoOAAssetListReq().payloadType: 300,
+        ProtoOAAssetClassListReq().payloadType: 300,
+        ProtoOASymbolCategoryListReq().payloadType: 300,
+        ProtoOASymbolsListReq().payloadType: 300,
+        ProtoOASymbolByIdReq().payloadType: 300,
+        ProtoOATraderReq().payloadType: 10,
+    }
+    INVALIDATED_PAYLOAD_TYPES = {
+        SYMBOL_CHANGED_EVENT_PAYLOAD_TYPE: frozenset((ProtoOASymbolsListReq().payloadType, ProtoOASymbolByIdReq().payloadType,
+                                                      ProtoOASymbolCategoryListReq().payloadType)),
+        TRADER_UPDATED_EVENT_PAYLOAD_TYPE: frozenset((ProtoOATraderReq().payloadType,)),
+    }
+
+    def __init__(self, client, ttlsInSeconds=None, maxSizeInBytes=16 * 1024 * 1024, clock=None):
+        self.client = client
+        self.ttlsInSeconds = dict(self.DEFAULT_TTLS_IN_SECONDS if ttlsInSeconds is None else ttlsInSeconds)
+        self.maxSizeInBytes = maxSizeInBytes
+        self.sizeInBytes = 0
+        self.hitsCount = 0
+        self.missesCount = 0
+        self.mergedCount = 0
+        self.evictionsCount = 0
+        self.invalidationsCount = 0
+        self._clock = reactor if clock is None else clock
+        self._entries = OrderedDict()
+        self._inFlight = dict()
+        # Invalidations of all accounts and of each account, a response is cached only if none happened while it was awaited
+        self._generation = 0
+        self._accountGenerations = dict()
+        client.addMessageListener(self._onMessageReceived)
+
+    def send(self, message, clientMsgId=None, responseTimeoutInSeconds=5, **params):
+        """Same as client.send, responses of payload types that have a TTL are shared so they must not be modified.
+
+        A request with a clientMsgId is sent with it and its response is not cached, since a shared response can't have it.
+        """
+        if type(message) in [str, int]:
+            message = Protobuf.get(message, **params)
+        ttl = self.ttlsInSeconds.get(message.payloadType)
+        if ttl is None or clientMsgId is not None:
+            return self.client.send(message, clientMsgId=clientMsgId, responseTimeoutInSeconds=responseTimeoutInSeconds)
+        key = (message.payloadType, message.SerializeToString(deterministic=True))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > self._clock.seconds():
+                self._entries.move_to_end(key)
+                self.hitsCount += 1
+                return defer.succeed(entry[0])
+            self._removeEntry(key)
+        waiters = self._inFlight.get(key)
+        if waiters is not None:
+            self.mergedCount += 1
+        else:
+            self.missesCount += 1
+            waiters = self._inFlight[key] = []
+            accountId = getattr(message, "ctidTraderAccountId", None)
+            upstream = self.client.send(message, responseTimeoutInSeconds=responseTimeoutInSeconds)
+            upstream.addBoth(self._onResponse, key, ttl, accountId, self._getGeneration(accountId))
+        deferred = defer.Deferred(lambda deferred: waiters.remove(deferred))
+        waiters.append(deferred)
+        return deferred
+
+    def invalidate(self, accountId=None, payloadTypes=None):
+        """Drops cached entries of an account (or all accounts) and payload types (or all types)."""
+        if accountId is None:
+            self._generation += 1
+        else:
+            self._accountGenerations[accountId] = self._accountGenerations.get(accountId, 0) + 1
+        for key, entry in list(self._entries.items()):
+            if (accountId is None or entry[3] == accountId) and (payloadTypes is None or key[0] in payloadTypes):
+                self._removeEntry(key)
+                self.invalidationsCount += 1
+
+    def getHitRatio(self):
+        requestsCount = self.hitsCount + self.mergedCount + self.missesCount
+        return (self.hitsCount + self.mergedCount) / requestsCount if requestsCount else 0
+
+    @property
+    def savedRequestsCount(self):
+        # Each saved request is one message less in the client send rate limit
+        return self.hitsCount + self.mergedCount
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stop(self):
+        self.client.removeMessageListener(self._onMessageReceived)
+        self._entries.clear()
+        self.sizeInBytes = 0
+
+    def _onResponse(self, response, key, ttl, accountId, generation):
+        waiters = self._inFlight.pop(key)
+        if (isinstance(response, ProtoMessage) and response.payloadType not in self.ERROR_PAYLOAD_TYPES
+                and generation == self._getGeneration(accountId)):
+            # A response to a request sent before an invalidation may be stale, it's returned but not cached
+            self._store(key, response, ttl, accountId)
+        for deferred in waiters:
+            if isinstance(response, failure.Failure):
+                deferred.errback(response)
+            else:
+                deferred.callback(response)
+
+    def _getGeneration(self, accountId):
+        return self._generation, self._accountGenerations.get(accountId, 0)
+
+    def _store(self, key, response, ttl, accountId):
+        sizeInBytes = len(key[1]) + response.ByteSize()
+        if sizeInBytes > self.maxSizeInBytes:
+            return
+        self._entries[key] = (response, self._clock.seconds() + ttl, sizeInBytes, accountId)
+        self.sizeInBytes += sizeInBytes
+        while self.sizeInBytes > self.maxSizeInBytes:
+            self._removeEntry(next(iter(self._entries)))
+            self.evictionsCount += 1
+
+    def _removeEntry(self, key):
+        self.sizeInBytes -= self._entries.pop(key)[2]
+
+    def _onMessageReceived(self, client, message):
+        payloadTypes = self.INVALIDATED_PAYLOAD_TYPES.get(message.payloadType)
+        if payloadTypes is None:
+            return
+        self.invalidate(Protobuf.extract(message).ctidTraderAccountId, payloadTypes)
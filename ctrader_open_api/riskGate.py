@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+from twisted.internet import reactor, defer
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOANewOrderReq, ProtoOASpotEvent
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOATradeSide, ProtoOAOrderType
+
+class RiskCheckError(Exception):
+    def __init__(self, reason, request):
+        super().__init__(reason)
+        self.reason = reason
+        self.request = request
+
+class SymbolLimits:
+    """Pre-trade limits of one symbol, volumes are in cents like ProtoOANewOrderReq volume."""
+    def __init__(self, maxPositionVolume=None, maxOrderVolume=None, maxNotional=None, maxPriceDeviation=None):
+        self.maxPositionVolume = maxPositionVolume
+        self.maxOrderVolume = maxOrderVolume
+        self.maxNotional = maxNotional
+        self.maxPriceDeviation = maxPriceDeviation
+        self.maxNotionalVolume = None if maxNotional is None else maxNotional * 100
+
+class RiskGate:
+    """Checks new orders against local limits before they are queued by the client."""
+    NEW_ORDER_REQ_PAYLOAD_TYPE = ProtoOANewOrderReq().payloadType
+    SPOT_EVENT_PAYLOAD_TYPE = ProtoOASpotEvent().payloadType
+    SPOT_EVENT_SYMBOL_ID_FIELD_NUMBER = ProtoOASpotEvent.DESCRIPTOR.fields_by_name["symbolId"].number
+    PRICE_DIVISOR = 100000
+
+    def __init__(self, client, accountState=None, maxOrdersPerSecond=None, defaultLimits=None, clock=None):
+        self.client = client
+        self.accountState = accountState
+        self.maxOrdersPerSecond = maxOrdersPerSecond
+        self.defaultLimits = defaultLimits
+        self.rejectedCount = 0
+        self._clock = reactor if clock is None else clock
+        self._limits = dict()
+        self._quotes = dict()
+        self._inFlightVolumes = dict()
+        self._tokens = maxOrdersPerSecond
+        self._tokensTime = None
+        client.addMessageListener(self._onMessageReceived)
+
+    def setSymbolLimits(self, symbolId, limits):
+        self._limits[symbolId] = limits
+
+    def setQuote(self, symbolId, bid, ask):
+        self._quotes[symbolId] = (bid, ask)
+
+    def check(self, request):
+        symbolId = request.symbolId
+        limits = self._limits.get(symbolId, self.defaultLimits)
+        isBuy = request.tradeSide == ProtoOATradeSide.BUY
+        volume = request.volume
+        if limits is not None:
+            if limits.maxOrderVolume is not None and volume > limits.maxOrderVolume:
+                return f"Order volume {volume} is more than {limits.maxOrderVolume}"
+            quote = self._quotes.get(symbolId)
+            if limits.maxPriceDeviation is not None:
+                reason = self._checkPrice(request, quote, isBuy, limits.maxPriceDeviation)
+                if reason is not None:
+                    return reason
+            if limits.maxPositionVolume is not None or limits.maxNotionalVolume is not None:
+                exposure = abs(self._getExposure(symbolId) + (volume if isBuy else -volume))
+                if limits.maxPositionVolume is not None and exposure > limits.maxPositionVolume:
+                    return f"Symbol {symbolId} volume {exposure} would be more than {limits.maxPositionVolume}"
+                if limits.maxNotionalVolume is not None:
+                    if quote is None:
+                        return f"No quote for symbol {symbolId}"
+                    if exposure * (quote[1] if isBuy else quote[0]) > limits.maxNotionalVolume:
+                        return f"Symbol {symbolId} notional would be more than {limits.maxNotional}"
+        if self.maxOrdersPerSecond is not None and not self._takeToken():
+            return f"More than {self.maxOrdersPerSecond} orders per second"
+        return None
+
+    def send(self, message, clientMsgId=None, responseTimeoutInSeconds=5, **params):
+        if type(message) in [str, int]:
+            message = Protobuf.get(message, **params)
+        if message.payloadType != self.NEW_ORDER_REQ_PAYLOAD_TYPE:
+            return self.client.send(message, clientMsgId=clientMsgId, responseTimeoutInSeconds=responseTimeoutInSeconds)
+        reason = self.check(message)
+        if reason is not None:
+            self.rejectedCount += 1
+            return defer.fail(RiskCheckError(reason, message))
+        symbolId = message.symbolId
+        signedVolume = message.volume if message.tradeSide == ProtoOATradeSide.BUY else -message.volume
+        self._inFlightVolumes[symbolId] = self._inFlightVolumes.get(symbolId, 0) + signedVolume
+        deferred = self.client.send(message, clientMsgId=clientMsgId, responseTimeoutInSeconds=responseTimeoutInSeconds)
+        deferred.addBoth(self._onOrderResponse, symbolId, signedVolume)
+        return deferred
+
+    def stop(self):
+        self.client.removeMessageListener(self._onMessageReceived)
+
+    def _getExposure(self, symbolId):
+        exposure = self._inFlightVolumes.get(symbolId, 0)
+        if self.accountState is not None:
+            exposure += self.accountState.getNetVolume(symbolId) + self.accountState.getPendingNetVolume(symbolId)
+        return exposure
+
+    def _checkPrice(self, request, quote, isBuy, maxPriceDeviation):
+        if request.orderType == ProtoOAOrderType.LIMIT:
+            price = request.limitPrice
+        elif request.orderType in (ProtoOAOrderType.STOP, ProtoOAOrderType.STOP_LIMIT):
+            price = request.stopPrice
+        else:
+            return None
+        if quote is None:
+            return f"No quote for symbol {request.symbolId}"
+        reference = quote[1] if isBuy else quote[0]
+        if abs(price - reference) > reference * maxPriceDeviation:
+            return f"Order price {price} is too far from current price {reference}"
+        return None
+
+    def _takeToken(self):
+        now = self._clock.seconds()
+        if self._tokensTime is not None:
+            self._tokens = min(self.maxOrdersPerSecond, self._tokens + (now - self._tokensTime) * self.maxOrdersPerSecond)
+        self._tokensTime = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _onOrderResponse(self, result, symbolId, signedVolume):
+        self._inFlightVolumes[symbolId] -= signedVolume
+        if not self._inFlightVolumes[symbolId]:
+            del self._inFlightVolumes[symbolId]
+        return result
+
+    def _onMessageReceived(self, client, message):
+        if message.payloadType != self.SPOT_EVENT_PAYLOAD_TYPE:
+            return
+        symbolId = Protobuf.peek_varint(message.payload, self.SPOT_EVENT_SYMBOL_ID_FIELD_NUMBER)
+        if symbolId not in self._limits and self.defaultLimits is None:
+            return
+        spotEvent = Protobuf.extract(message)
+        bid, ask = self._quotes.get(symbolId, (None, None))
+        self._quotes[symbolId] = (spotEvent.bid / self.PRICE_DIVISOR if spotEvent.bid else bid,
+                                  spotEvent.ask / self.PRICE_DIVISOR if spotEvent.ask else ask)
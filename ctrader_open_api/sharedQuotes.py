@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+import struct
+import sys
+from multiprocessing import resource_tracker, shared_memory
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent, ProtoOADepthEvent
+
+class QuoteRing:
+    """Fixed layout ring buffer of quotes in shared memory, written by one process and read by any number of processes.
+
+    Each slot keeps its sequence number, readers compare it before and after reading a slot to detect it was overwritten.
+    Prices are raw API prices (1/100000 of unit) and sizes are in cents like depth quotes.
+    """
+    MAGIC = 0x51524E47
+    VERSION = 1
+    HEADER = struct.Struct("<IIQQ")
+    HEADER_SIZE = 64
+    WRITE_SEQUENCE_OFFSET = HEADER.size
+    SEQUENCE = struct.Struct("<Q")
+    SLOT = struct.Struct("<Qqqqqqq")
+    FIELDS = ("sequence", "kind", "symbolId", "bid", "ask", "value", "quoteId")
+    # Can be used with numpy.frombuffer(ring.getSlotsBuffer(), dtype=QuoteRing.NUMPY_DTYPE) for zero copy reads
+    NUMPY_DTYPE = [("sequence", "<u8"), ("kind", "<i8"), ("symbolId", "<i8"), ("bid", "<i8"), ("ask", "<i8"), ("value", "<i8"), ("quoteId", "<i8")]
+    SPOT = 1
+    DEPTH_NEW = 2
+    DEPTH_DELETED = 3
+
+    def __init__(self, name=None, capacity=65536, create=True):
+        if create:
+            self.capacity = capacity
+            self._memory = shared_memory.SharedMemory(name=name, create=True, size=self.HEADER_SIZE + capacity * self.SLOT.size)
+            self.HEADER.pack_into(self._memory.buf, 0, self.MAGIC, self.VERSION, capacity, 0)
+        else:
+            self._memory = self._attach(name)
+            magic, version, self.capacity, _ = self.HEADER.unpack_from(self._memory.buf, 0)
+            if magic != self.MAGIC or version != self.VERSION:
+                self._memory.close()
+                raise ValueError(f"Shared memory {name} is not a quote ring")
+        self.isOwner = create
+        self.name = self._memory.name
+        self.overrunCount = 0
+        self._buffer = self._memory.buf
+        self._writeSequence = self.getWriteSequence()
+
+    @classmethod
+    def attach(cls, name):
+        return cls(name, create=False)
+
+    def getWriteSequence(self):
+        return self.SEQUENCE.unpack_from(self._buffer, self.WRITE_SEQUENCE_OFFSET)[0]
+
+    def getSlotsBuffer(self):
+        return self._buffer[self.HEADER_SIZE:self.HEADER_SIZE + self.capacity * self.SLOT.size]
+
+    def write(self, kind, symbolId, bid=0, ask=0, value=0, quoteId=0):
+        sequence = self._writeSequence + 1
+        offset = self.HEADER_SIZE + (sequence % self.capacity) * self.SLOT.size
+        buffer = self._buffer
+        self.SEQUENCE.pack_into(buffer, offset, 0)
+        self.SLOT.pack_into(buffer, offset, 0, kind, symbolId, bid, ask, value, quoteId)
+        self.SEQUENCE.pack_into(buffer, offset, sequence)
+        self.SEQUENCE.pack_into(buffer, self.WRITE_SEQUENCE_OFFSET, sequence)
+        self._writeSequence = sequence
+        return sequence
+
+    def read(self, afterSequence, maxCount=None):
+        """Returns (records, lastSequence), records are SLOT tuples written after afterSequence.
+
+        If the writer lapped the reader, the overwritten records are skipped and counted in overrunCount.
+        """
+        writeSequence = self.getWriteSequence()
+        oldest = writeSequence - self.capacity + 1
+        if afterSequence + 1 < oldest:
+            self.overrunCount += oldest - afterSequence - 1
+            afterSequence = oldest - 1
+        lastSequence = writeSequence if maxCount is None else min(writeSequence, afterSequence + maxCount)
+        records = []
+        slot, buffer, capacity, headerSize, slotSize = self.SLOT, self._buffer, self.capacity, self.HEADER_SIZE, self.SLOT.size
+        for sequence in range(afterSequence + 1, lastSequence + 1):
+            offset = headerSize + (sequence % capacity) * slotSize
+            record = slot.unpack_from(buffer, offset)
+            if record[0] != sequence or self.SEQUENCE.unpack_from(buffer, offset)[0] != sequence:
+                self.overrunCount += 1
+                continue
+            records.append(record)
+        return records, lastSequence
+
+    def close(self):
+        self._buffer = None
+        self._memory.close()
+        if self.isOwner:
+            self._memory.unlink()
+
+    @staticmethod
+    def _attach(name):
+        # Attached segments must not be registered to the resource tracker, which would unlink them when this process exits
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=name, track=False)
+        memory = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
+
+class SharedQuotePublisher:
+    """Writes spot and depth quotes received by a client into one shared memory QuoteRing per symbol group."""
+    SPOT_EVENT_PAYLOAD_TYPE = ProtoOASpotEvent().payloadType
+    DEPTH_EVENT_PAYLOAD_TYPE = ProtoOADepthEvent().payloadType
+    SYMBOL_ID_FIELD_NUMBERS = {
+        SPOT_EVENT_PAYLOAD_TYPE: ProtoOASpotEvent.DESCRIPTOR.fields_by_name["symbolId"].number,
+        DEPTH_EVENT_PAYLOAD_TYPE: ProtoOADepthEvent.DESCRIPTOR.fields_by_name["symbolId"].number,
+    }
+
+    def __init__(self, client, symbolGroups, capacity=65536, namePrefix=None):
+        self.client = client
+        self.rings = dict()
+        self._ringsBySymbol = dict()
+        for group, symbolIds in symbolGroups.items():
+            ring = QuoteRing(None if namePrefix is None else f"{namePrefix}-{group}", capacity)
+            self.rings[group] = ring
+            for symbolId in symbolIds:
+                self._ringsBySymbol[int(symbolId)] = ring
+        client.addMessageListener(self._onMessageReceived)
+
+    def getNames(self):
+        return {group: ring.name for group, ring in self.rings.items()}
+
+    def stop(self):
+        self.client.removeMessageListener(self._onMessageReceived)
+        for ring in self.rings.values():
+            ring.close()
+        self.rings.clear()
+        self._ringsBySymbol.clear()
+
+    def _onMessageReceived(self, client, message):
+        fieldNumber = self.SYMBOL_ID_FIELD_NUMBERS.get(message.payloadType)
+        if fieldNumber is None:
+            return
+        ring = self._ringsBySymbol.get(Protobuf.peek_varint(message.payload, fieldNumber))
+        if ring is None:
+            return
+        event = Protobuf.extract(message)
+        if message.payloadType == self.SPOT_EVENT_PAYLOAD_TYPE:
+            ring.write(QuoteRing.SPOT, event.symbolId, event.bid, event.ask, event.timestamp)
+            return
+        for quote in event.newQuotes:
+            ring.write(QuoteRing.DEPTH_NEW, event.symbolId, quote.bid, quote.ask, quote.size, quote.id)
+        for quoteId in event.deletedQuotes:
+            ring.write(QuoteRing.DEPTH_DELETED, event.symbolId, quoteId=quoteId)
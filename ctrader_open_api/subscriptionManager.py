@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+from twisted.internet import reactor, defer
+from twisted.python.failure import Failure
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (ProtoOASubscribeSpotsReq, ProtoOAUnsubscribeSpotsReq, ProtoOASubscribeDepthQuotesReq,
+                                                           ProtoOAUnsubscribeDepthQuotesReq, ProtoOASubscribeLiveTrendbarReq,
+                                                           ProtoOAUnsubscribeLiveTrendbarReq, ProtoOAAccountAuthRes)
+from ctrader_open_api.protobuf import Protobuf
+
+class _Subscriptions:
+    def __init__(self, subscribeRequest, unsubscribeRequest):
+        self.subscribeRequest = subscribeRequest
+        self.unsubscribeRequest = unsubscribeRequest
+        self.counts = dict()
+        self.pendingSubscribe = dict()
+        self.pendingUnsubscribe = set()
+
+class SubscriptionManager:
+    """Reference counts spot, depth and live trendbar subscriptions of an account and sends them in batches."""
+    SPOTS = "spots"
+    DEPTH = "depth"
+    ACCOUNT_AUTH_RES_PAYLOAD_TYPE = ProtoOAAccountAuthRes().payloadType
+
+    def __init__(self, client, accountId, batchWindowInSeconds=0.05, maxSymbolsPerRequest=None, subscribeToSpotTimestamp=False,
+                 resubscribeOnAccountAuth=True, clock=None, timingWheel=None):
+        self.client = client
+        self.accountId = int(accountId)
+        self.batchWindowInSeconds = batchWindowInSeconds
+        self.maxSymbolsPerRequest = maxSymbolsPerRequest
+        self.subscribeToSpotTimestamp = subscribeToSpotTimestamp
+        self.resubscribeOnAccountAuth = resubscribeOnAccountAuth
+        self.sentRequestsCount = 0
+        self._clock = reactor if clock is None else clock
+        self.timingWheel = client.timingWheel if timingWheel is None else timingWheel
+        self._flushCall = None
+        self._subscriptions = {
+            self.SPOTS: _Subscriptions(ProtoOASubscribeSpotsReq, ProtoOAUnsubscribeSpotsReq),
+            self.DEPTH: _Subscriptions(ProtoOASubscribeDepthQuotesReq, ProtoOAUnsubscribeDepthQuotesReq),
+        }
+        self._trendbars = _Subscriptions(ProtoOASubscribeLiveTrendbarReq, ProtoOAUnsubscribeLiveTrendbarReq)
+        client.addMessageListener(self._onMessageReceived)
+
+    def subscribeSpots(self, symbolIds):
+        return self._subscribe(self._subscriptions[self.SPOTS], symbolIds)
+
+    def unsubscribeSpots(self, symbolIds):
+        self._unsubscribe(self._subscriptions[self.SPOTS], symbolIds)
+
+    def subscribeDepth(self, symbolIds):
+        return self._subscribe(self._subscriptions[self.DEPTH], symbolIds)
+
+    def unsubscribeDepth(self, symbolIds):
+        self._unsubscribe(self._subscriptions[self.DEPTH], symbolIds)
+
+    def subscribeLiveTrendbar(self, symbolId, period):
+        return self._subscribe(self._trendbars, [(int(symbolId), period)])
+
+    def unsubscribeLiveTrendbar(self, symbolId, period):
+        self._unsubscribe(self._trendbars, [(int(symbolId), period)])
+
+    def unsubscribeSpotsLater(self, symbolIds, delayInSeconds):
+        return self.timingWheel.callLater(delayInSeconds, self.unsubscribeSpots, symbolIds)
+
+    def unsubscribeDepthLater(self, symbolIds, delayInSeconds):
+        return self.timingWheel.callLater(delayInSeconds, self.unsubscribeDepth, symbolIds)
+
+    def getSubscribedSpots(self):
+        return set(self._subscriptions[self.SPOTS].counts)
+
+    def getSubscribedDepth(self):
+        return set(self._subscriptions[self.DEPTH].counts)
+
+    def getSubscribedLiveTrendbars(self):
+        return set(self._trendbars.counts)
+
+    def resubscribeAll(self):
+        deferreds = []
+        for subscriptions in list(self._subscriptions.values()) + [self._trendbars]:
+            subscriptions.pendingUnsubscribe.clear()
+            for key in subscriptions.counts:
+                if key not in subscriptions.pendingSubscribe:
+                    subscriptions.pendingSubscribe[key] = defer.Deferred()
+                deferreds.append(subscriptions.pendingSubscribe[key])
+        self._scheduleFlush()
+        return defer.gatherResults(deferreds, consumeErrors=True)
+
+    def flush(self):
+        if self._flushCall is not None and self._flushCall.active():
+            self._flushCall.cancel()
+        self._flushCall = None
+        for subscriptions in self._subscriptions.values():
+            self._flushSymbols(subscriptions)
+        self._flushTrendbars()
+
+    def stop(self):
+        if self._flushCall is not None and self._flushCall.active():
+            self._flushCall.cancel()
+        self._flushCall = None
+        self.client.removeMessageListener(self._onMessageReceived)
+
+    def _subscribe(self, subscriptions, keys):
+        deferreds = []
+        for key in keys:
+            count = subscriptions.counts.get(key, 0)
+            subscriptions.counts[key] = count + 1
+            if count:
+                continue
+            if key in subscriptions.pendingUnsubscribe:
+                subscriptions.pendingUnsubscribe.discard(key)
+                continue
+            subscriptions.pendingSubscribe[key] = deferred = defer.Deferred()
+            deferreds.append(deferred)
+        self._scheduleFlush()
+        return defer.gatherResults(deferreds, consumeErrors=True)
+
+    def _unsubscribe(self, subscriptions, keys):
+        for key in keys:
+            count = subscriptions.counts.get(key, 0)
+            if count > 1:
+                subscriptions.counts[key] = count - 1
+                continue
+            if not count:
+                continue
+            del subscriptions.counts[key]
+            deferred = subscriptions.pendingSubscribe.pop(key, None)
+            if deferred is not None:
+                deferred.callback(None)
+            else:
+                subscriptions.pendingUnsubscribe.add(key)
+        self._scheduleFlush()
+
+    def _scheduleFlush(self):
+        if self._flushCall is None or not self._flushCall.active():
+            self._flushCall = self._clock.callLater(self.batchWindowInSeconds, self.flush)
+
+    def _getChunks(self, keys):
+        keys = sorted(keys)
+        size = self.maxSymbolsPerRequest or len(keys)
+        return [keys[i:i + size] for i in range(0, len(keys), size)]
+
+    def _flushSymbols(self, subscriptions):
+        if subscriptions.pendingUnsubscribe:
+            for symbolIds in self._getChunks(subscriptions.pendingUnsubscribe):
+                self._send(subscriptions.unsubscribeRequest(ctidTraderAccountId=self.accountId, symbolId=symbolIds))
+            subscriptions.pendingUnsubscribe.clear()
+        if subscriptions.pendingSubscribe:
+            pendingSubscribe, subscriptions.pendingSubscribe = subscriptions.pendingSubscribe, dict()
+            for symbolIds in self._getChunks(pendingSubscribe):
+                request = subscriptions.subscribeRequest(ctidTraderAccountId=self.accountId, symbolId=symbolIds)
+                if subscriptions.subscribeRequest is ProtoOASubscribeSpotsReq and self.subscribeToSpotTimestamp:
+                    request.subscribeToSpotTimestamp = True
+                self._send(request, [pendingSubscribe[symbolId] for symbolId in symbolIds])
+
+    def _flushTrendbars(self):
+        subscriptions = self._trendbars
+        for symbolId, period in sorted(subscriptions.pendingUnsubscribe):
+            self._send(subscriptions.unsubscribeRequest(ctidTraderAccountId=self.accountId, symbolId=symbolId, period=period))
+        subscriptions.pendingUnsubscribe.clear()
+        pendingSubscribe, subscriptions.pendingSubscribe = subscriptions.pendingSubscribe, dict()
+        for (symbolId, period), deferred in sorted(pendingSubscribe.items(), key=lambda item: item[0]):
+            self._send(subscriptions.subscribeRequest(ctidTraderAccountId=self.accountId, symbolId=symbolId, period=period), [deferred])
+
+    def _send(self, request, waitingDeferreds=()):
+        self.sentRequestsCount += 1
+        deferred = self.client.send(request)
+        deferred.addBoth(self._releaseWaiting, waitingDeferreds)
+        return deferred
+
+    def _releaseWaiting(self, result, waitingDeferreds):
+        for deferred in waitingDeferreds:
+            if deferred.called:
+                continue
+            if isinstance(result, Failure):
+                deferred.errback(result)
+            else:
+                deferred.callback(result)
+        return None
+
+    def _onMessageReceived(self, client, message):
+        if message.payloadType != self.ACCOUNT_AUTH_RES_PAYLOAD_TYPE or not self.resubscribeOnAccountAuth:
+            return
+        if Protobuf.extract(message).ctidTraderAccountId == self.accountId:
+            self.resubscribeAll().addErrback(lambda failure: None)
@@ -4,16 +4,19 @@ from collections import deque
 from twisted.protocols.basic import Int32StringReceiver
 from twisted.internet import task
 from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage, ProtoHeartbeatEvent
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAAmendPositionSLTPReq, ProtoOAAmendOrderReq
 import datetime
 
 class TcpProtocol(Int32StringReceiver):
     MAX_LENGTH = 15000000
-    _send_queue = deque([])
+    COALESCING_KEY_FIELDS = {ProtoOAAmendPositionSLTPReq().payloadType: "positionId", ProtoOAAmendOrderReq().payloadType: "orderId"}
     _send_task = None
     _lastSendMessageTime = None
 
     def connectionMade(self):
         super().connectionMade()
+        self._send_queue = deque([])
+        self._coalescing_index = dict()
 
         if not self._send_task:
             self._send_task = task.LoopingCall(self._sendStrings)
@@ -47,27 +50,66 @@ class TcpProtocol(Int32StringReceiver):
         if instant:
             self.sendString(data)
             self._lastSendMessageTime = datetime.datetime.now()
+            self.factory.sent(clientMsgId)
+        elif (self.factory.coalesceAmendments and isinstance(message, ProtoMessage.__base__) and not isinstance(message, ProtoMessage)
+              and message.payloadType in self.COALESCING_KEY_FIELDS):
+            self._coalesce(message, isCanceled, data, clientMsgId)
         else:
-            self._send_queue.append((isCanceled, data))
+            self._send_queue.append([isCanceled, data, clientMsgId, None])
+
+    def _coalesce(self, message, isCanceled, data, clientMsgId):
+        key = (message.payloadType, message.ctidTraderAccountId, getattr(message, self.COALESCING_KEY_FIELDS[message.payloadType]))
+        entry = self._coalescing_index.get(key)
+        if entry is None:
+            entry = [isCanceled, data, clientMsgId, key]
+            self._coalescing_index[key] = entry
+            self._send_queue.append(entry)
+            return
+        supersededClientMsgId = entry[2]
+        # The server keeps the fields an amendment doesn't set, so the fields set only by the superseded one are kept
+        merged = type(message).FromString(ProtoMessage.FromString(entry[1]).payload)
+        merged.MergeFrom(message)
+        data = ProtoMessage(payload=merged.SerializeToString(), clientMsgId=clientMsgId, payloadType=message.payloadType).SerializeToString()
+        entry[0], entry[1], entry[2] = isCanceled, data, clientMsgId
+        self.factory.superseded(supersededClientMsgId, clientMsgId)
 
     def _sendStrings(self):
         size = len(self._send_queue)
 
         if not size:
-            if self._lastSendMessageTime is None or (datetime.datetime.now() - self._lastSendMessageTime).total_seconds() > 20:
+            if self._lastSendMessageTime is None or (datetime.datetime.now() - self._lastSendMessageTime).total_seconds() > self.factory.heartbeatIntervalInSeconds:
                 self.heartbeat()
             return
 
         for _ in range(min(size, self.factory.numberOfMessagesToSendPerSecond)):
-            isCanceled, data = self._send_queue.popleft()
+            isCanceled, data, clientMsgId, key = self._send_queue.popleft()
+            if key is not None:
+                del self._coalescing_index[key]
             if isCanceled is not None and isCanceled():
+                self.factory.canceled(clientMsgId)
                 continue;
             self.sendString(data)
+            self.factory.sent(clientMsgId)
         self._lastSendMessageTime = datetime.datetime.now()
 
+    def dataReceived(self, data):
+        profiler = self.factory.stageProfiler
+        if profiler is None or not profiler.startSample():
+            return super().dataReceived(data)
+        try:
+            profiler.measure("frame", 0, super().dataReceived, data)
+        finally:
+            profiler.stopSample()
+
     def stringReceived(self, data):
+        profiler = self.factory.stageProfiler
         msg = ProtoMessage()
-        msg.ParseFromString(data)
+        if profiler is not None and profiler.isSampling:
+            started = profiler.start()
+            msg.ParseFromString(data)
+            profiler.stop("parse", msg.payloadType, started)
+        else:
+            msg.ParseFromString(data)
 
         if msg.payloadType == ProtoHeartbeatEvent().payloadType:
             self.heartbeat()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+from twisted.internet import reactor, task, defer
+
+class TimerHandle:
+    __slots__ = ("wheel", "callback", "args", "expiryTick", "bucket")
+
+    def __init__(self, wheel, callback, args, expiryTick):
+        self.wheel = wheel
+        self.callback = callback
+        self.args = args
+        self.expiryTick = expiryTick
+        self.bucket = None
+
+    def cancel(self):
+        if self.bucket is not None:
+            self.wheel._remove(self)
+        self.callback = None
+
+    def active(self):
+        return self.bucket is not None
+
+class TimingWheel:
+    """Hierarchical timing wheel, schedules and cancels timers in O(1) and is driven by a single reactor looping call.
+
+    Level 0 buckets are one tick wide, each upper level bucket covers a whole rotation of the level below it
+    and its timers are cascaded down when the lower level wraps around.
+    """
+
+    def __init__(self, tickInSeconds=0.1, wheelSize=256, levels=4, clock=None):
+        self.tickInSeconds = tickInSeconds
+        self.wheelSize = wheelSize
+        self.levels = levels
+        self._clock = reactor if clock is None else clock
+        self._wheels = [[set() for _ in range(wheelSize)] for _ in range(levels)]
+        self._spans = [wheelSize ** level for level in range(levels + 1)]
+        self._tick = 0
+        self._count = 0
+        self._tickTask = None
+
+    def __len__(self):
+        return self._count
+
+    def callLater(self, delayInSeconds, callback, *args):
+        ticks = max(1, int(-(-delayInSeconds // self.tickInSeconds)))
+        handle = TimerHandle(self, callback, args, self._tick + ticks)
+        self._insert(handle)
+        self._count += 1
+        if self._tickTask is None:
+            self._tickTask = task.LoopingCall.withCount(self._onTicks)
+            self._tickTask.clock = self._clock
+            self._tickTask.start(self.tickInSeconds, now=False)
+        return handle
+
+    def callWithBackoff(self, function, maxAttempts=3, initialDelayInSeconds=0.5, multiplier=2, maxDelayInSeconds=30, retryOn=(Exception,)):
+        """Calls a function that returns a deferred, and calls it again after a growing delay if it fails with one of retryOn exceptions."""
+        resultDeferred = defer.Deferred()
+
+        def attempt(number, delay):
+            deferred = defer.maybeDeferred(function)
+            deferred.addCallbacks(resultDeferred.callback, lambda failure: onFailure(failure, number, delay))
+
+        def onFailure(failure, number, delay):
+            if number >= maxAttempts or not failure.check(*retryOn):
+                resultDeferred.errback(failure)
+                return
+            self.callLater(delay, attempt, number + 1, min(delay * multiplier, maxDelayInSeconds))
+
+        attempt(1, initialDelayInSeconds)
+        return resultDeferred
+
+    def stop(self):
+        if self._tickTask is not None and self._tickTask.running:
+            self._tickTask.stop()
+        self._tickTask = None
+
+    def _insert(self, handle):
+        delta = handle.expiryTick - self._tick
+        level = 0
+        while level < self.levels - 1 and delta >= self._spans[level + 1]:
+            level += 1
+        if delta >= self._spans[level + 1]:
+            index = (self._tick // self._spans[level] - 1) % self.wheelSize
+        else:
+            index = (handle.expiryTick // self._spans[level]) % self.wheelSize
+        bucket = self._wheels[level][index]
+        bucket.add(handle)
+        handle.bucket = bucket
+
+    def _remove(self, handle):
+        handle.bucket.discard(handle)
+        handle.bucket = None
+        self._count -= 1
+
+    def _onTicks(self, count):
+        for _ in range(count):
+            self._advance()
+            if not self._count:
+                self.stop()
+                return
+
+    def _advance(self):
+        self._tick += 1
+        tick = self._tick
+        for level in range(self.levels - 1, 0, -1):
+            span = self._spans[level]
+            if tick % span:
+                continue
+            bucket = self._wheels[level][(tick // span) % self.wheelSize]
+            if bucket:
+                handles = list(bucket)
+                bucket.clear()
+                for handle in handles:
+                    self._insert(handle)
+        bucket = self._wheels[0][tick % self.wheelSize]
+        if not bucket:
+            return
+        expired = list(bucket)
+        bucket.clear()
+        for handle in expired:
+            handle.bucket = None
+        self._count -= len(expired)
+        for handle in expired:
+            if handle.callback is not None:
+                handle.callback(*handle.args)
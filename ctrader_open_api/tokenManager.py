@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+from twisted.internet import reactor, defer
+from twisted.python.failure import Failure
+from ctrader_open_api.protobuf import Protobuf
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOARefreshTokenReq, ProtoOARefreshTokenRes, ProtoOAAccountsTokenInvalidatedEvent
+
+class TokenManager:
+    """Keeps an access token fresh without blocking the reactor."""
+    TOKEN_INVALIDATED_PAYLOAD_TYPE = ProtoOAAccountsTokenInvalidatedEvent().payloadType
+
+    def __init__(self, auth, client=None, refreshBeforeExpiryInSeconds=300, useSocketRefresh=True, clock=None):
+        self.auth = auth
+        self.client = client
+        self.refreshBeforeExpiryInSeconds = refreshBeforeExpiryInSeconds
+        self.useSocketRefresh = useSocketRefresh
+        self._clock = reactor if clock is None else clock
+        self._refreshCall = None
+        self._waitingDeferreds = None
+        self._tokenRefreshedCallbacks = []
+        self.accessToken = None
+        self.refreshToken = None
+        self.expiryTime = None
+        if client is not None:
+            client.addMessageListener(self._onMessageReceived)
+
+    def addTokenRefreshedCallback(self, callback):
+        self._tokenRefreshedCallbacks.append(callback)
+
+    def setToken(self, token):
+        if token.get("errorCode"):
+            raise ValueError(f'{token["errorCode"]}: {token.get("description")}')
+        self.accessToken = token.get("accessToken", token.get("access_token"))
+        self.refreshToken = token.get("refreshToken", token.get("refresh_token", self.refreshToken))
+        expiresIn = token.get("expiresIn", token.get("expires_in"))
+        self.expiryTime = None if expiresIn is None else self._clock.seconds() + int(expiresIn)
+        self._scheduleRefresh()
+        for callback in self._tokenRefreshedCallbacks:
+            callback(self)
+
+    def getTokenFromAuthCode(self, authCode):
+        deferred = self.auth.getTokenAsync(authCode)
+        deferred.addCallback(self._onTokenReceived)
+        return deferred
+
+    def getSecondsToExpiry(self):
+        if self.expiryTime is None:
+            return None
+        return self.expiryTime - self._clock.seconds()
+
+    def refresh(self):
+        if self.refreshToken is None:
+            return defer.fail(ValueError("No refresh token available"))
+        deferred = defer.Deferred()
+        if self._waitingDeferreds is not None:
+            self._waitingDeferreds.append(deferred)
+            return deferred
+        self._waitingDeferreds = [deferred]
+        if self.useSocketRefresh and self.client is not None and self.client.isConnected:
+            refreshDeferred = self.client.send(ProtoOARefreshTokenReq(refreshToken=self.refreshToken))
+            refreshDeferred.addCallback(self._onRefreshTokenRes)
+        else:
+            refreshDeferred = self.auth.refreshTokenAsync(self.refreshToken)
+        refreshDeferred.addCallback(self._onTokenReceived)
+        refreshDeferred.addBoth(self._releaseWaiting)
+        return deferred
+
+    def stop(self):
+        if self._refreshCall is not None and self._refreshCall.active():
+            self._refreshCall.cancel()
+        self._refreshCall = None
+        if self.client is not None:
+            self.client.removeMessageListener(self._onMessageReceived)
+
+    def _scheduleRefresh(self):
+        if self._refreshCall is not None and self._refreshCall.active():
+            self._refreshCall.cancel()
+        self._refreshCall = None
+        if self.expiryTime is None or self.refreshToken is None:
+            return
+        delay = max(0, self.getSecondsToExpiry() - self.refreshBeforeExpiryInSeconds)
+        self._refreshCall = self._clock.callLater(delay, self._onRefreshDue)
+
+    def _onRefreshDue(self):
+        self._refreshCall = None
+        self.refresh().addErrback(lambda failure: None)
+
+    def _onRefreshTokenRes(self, message):
+        response = Protobuf.extract(message)
+        if not isinstance(response, ProtoOARefreshTokenRes):
+            raise ValueError(f"Token refresh failed: {response}")
+        return {"accessToken": response.accessToken, "refreshToken": response.refreshToken,
+                "expiresIn": response.expiresIn, "tokenType": response.tokenType}
+
+    def _onTokenReceived(self, token):
+        self.setToken(token)
+        return self.accessToken
+
+    def _releaseWaiting(self, result):
+        waitingDeferreds, self._waitingDeferreds = self._waitingDeferreds, None
+        for deferred in waitingDeferreds:
+            if isinstance(result, Failure):
+                deferred.errback(result)
+            else:
+                deferred.callback(result)
+        return None
+
+    def _onMessageReceived(self, client, message):
+        if message.payloadType != self.TOKEN_INVALIDATED_PAYLOAD_TYPE:
+            return
+        if self._waitingDeferreds is None:
+            self.refresh().addErrback(lambda failure: None)
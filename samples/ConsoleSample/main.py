@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 
-from ctrader_open_api import Client, Protobuf, TcpProtocol, Auth, EndPoints
+from ctrader_open_api.protobufBackend import ProtobufBackend
+# The protobuf backend is chosen when protobuf is imported first, so this must be done before importing the messages
+ProtobufBackend.enableFastMode()
+from ctrader_open_api import Client, Protobuf, TcpProtocol, Auth, EndPoints, AccountRouter
 from ctrader_open_api.endpoints import EndPoints
 from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import *
 from ctrader_open_api.messages.OpenApiMessages_pb2 import *
@@ -42,6 +45,9 @@ if __name__ == "__main__":
         accessToken = input("Access Token: ")
 
     client = Client(EndPoints.PROTOBUF_LIVE_HOST if hostType.lower() == "live" else EndPoints.PROTOBUF_DEMO_HOST, EndPoints.PROTOBUF_PORT, TcpProtocol)
+    print(f"protobuf backend: {client.protobufBackend}")
+    # Keeps every account set by setAccount authorized, and authorizes them again after reconnection
+    accountRouter = AccountRouter(client, accessToken)
 
     def connected(client): # Callback for client connection
         print("\nConnected")
@@ -62,7 +68,6 @@ if __name__ == "__main__":
             print("Please use setAccount command to set the authorized account before sending any other command, try help for more detail\n")
             print("To get account IDs use ProtoOAGetAccountListByAccessTokenReq command")
             if currentAccountId is not None:
-                sendProtoOAAccountAuthReq()
                 return
         elif message.payloadType == ProtoOAAccountAuthRes().payloadType:
             protoOAAccountAuthRes = Protobuf.extract(message)
@@ -105,10 +110,12 @@ if __name__ == "__main__":
 
     def setAccount(accountId):
         global currentAccountId
-        if currentAccountId is not None:
-            sendProtoOAAccountLogoutReq()
         currentAccountId = int(accountId)
-        sendProtoOAAccountAuthReq()
+        if accountRouter.isAuthorized(currentAccountId):
+            print(f"Account {currentAccountId} is already authorized and will be used for all future requests\n")
+            reactor.callLater(3, callable=executeUserCommand)
+            return
+        accountRouter.authorizeAccounts([currentAccountId]).addErrback(onError)
 
     def sendProtoOAVersionReq(clientMsgId = None):
         request = ProtoOAVersionReq()
@@ -179,7 +186,7 @@ if __name__ == "__main__":
         request.subscribeToSpotTimestamp = subscribeToSpotTimestamp if type(subscribeToSpotTimestamp) is bool else bool(subscribeToSpotTimestamp)
         deferred = client.send(request, clientMsgId = clientMsgId)
         deferred.addErrback(onError)
-        reactor.callLater(int(timeInSeconds), sendProtoOAUnsubscribeSpotsReq, symbolId)
+        client.timingWheel.callLater(int(timeInSeconds), sendProtoOAUnsubscribeSpotsReq, symbolId)
 
     def sendProtoOAReconcileReq(clientMsgId = None):
         request = ProtoOAReconcileReq()
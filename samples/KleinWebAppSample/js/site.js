@@ -3,15 +3,27 @@ $(document).ready(function () {
     const urlParams = new URLSearchParams(queryString);
     const token = urlParams.get("token");
 
+    const appendOutput = function (response) {
+        if ($("#outputTextarea").val() == "") {
+            $("#outputTextarea").val(response + "\n").change()
+        }
+        else {
+            $("#outputTextarea").val($("#outputTextarea").val() + "\n" + response + "\n").change()
+        }
+    };
+
+    // Subscribed spots and execution events are pushed by the server instead of polling
+    const stream = new EventSource("/stream");
+    ["spot", "depth", "ProtoOAExecutionEvent"].forEach(function (eventName) {
+        stream.addEventListener(eventName, function (event) {
+            appendOutput(`${eventName}: ${event.data}`);
+        });
+    });
+
     $("#sendButton").click(function () {
         $.getJSON(`/get-data?token=${token}&command=${$('#commandInput').val()}`, function (data, status, xhr) {
             response = "result" in data ? data["result"] : JSON.stringify(data)
-            if ($("#outputTextarea").val() == "") {
-                $("#outputTextarea").val(response + "\n").change()
-            }
-            else {
-                $("#outputTextarea").val($("#outputTextarea").val() + "\n" + response + "\n").change()
-            }
+            appendOutput(response)
         });
     });
 });
@@ -1,20 +1,19 @@
 #!/usr/bin/env python
 
 from klein import Klein
-from ctrader_open_api import Client, Protobuf, TcpProtocol, Auth, EndPoints
+from ctrader_open_api import Client, Protobuf, TcpProtocol, Auth, EndPoints, PushGateway, ResponseCache, JsonEncoder, EventLog, MetricsResource
 from ctrader_open_api.endpoints import EndPoints
 from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import *
 from ctrader_open_api.messages.OpenApiMessages_pb2 import *
 from ctrader_open_api.messages.OpenApiModelMessages_pb2 import *
 from templates import AddAccountsElement, ClientAreaElement
 import json
-from twisted.internet import endpoints, reactor
+from twisted.internet import endpoints, reactor, defer
 from twisted.web.server import Site
 import sys
 from twisted.python import log
 from twisted.web.static import File
 import datetime
-from google.protobuf.json_format import MessageToJson
 import calendar
 
 host = "localhost"
@@ -75,11 +74,6 @@ def connected(client):
 def disconnected(client, reason):
     print("Client Disconnected, reason: \n", reason)
 
-def onMessageReceived(client, message):
-    if message.payloadType == ProtoHeartbeatEvent().payloadType:
-        return
-    print("Client Received a Message: \n", message)
-
 authorizedAccounts = []
 
 def setAccount(accountId):
@@ -91,7 +85,7 @@ def setAccount(accountId):
 
 def sendProtoOAVersionReq(clientMsgId = None):
     request = ProtoOAVersionReq()
-    deferred = client.send(request, clientMsgId = clientMsgId)
+    deferred = responseCache.send(request)
     deferred.addErrback(onError)
     return deferred
 
@@ -120,21 +114,21 @@ def sendProtoOAAccountAuthReq(clientMsgId = None):
 def sendProtoOAAssetListReq(clientMsgId = None):
     request = ProtoOAAssetListReq()
     request.ctidTraderAccountId = currentAccountId
-    deferred = client.send(request, clientMsgId = clientMsgId)
+    deferred = responseCache.send(request)
     deferred.addErrback(onError)
     return deferred
 
 def sendProtoOAAssetClassListReq(clientMsgId = None):
     request = ProtoOAAssetClassListReq()
     request.ctidTraderAccountId = currentAccountId
-    deferred = client.send(request, clientMsgId = clientMsgId)
+    deferred = responseCache.send(request)
     deferred.addErrback(onError)
     return deferred
 
 def sendProtoOASymbolCategoryListReq(clientMsgId = None):
     request = ProtoOASymbolCategoryListReq()
     request.ctidTraderAccountId = currentAccountId
-    deferred = client.send(request, clientMsgId = clientMsgId)
+    deferred = responseCache.send(request)
     deferred.addErrback(onError)
     return deferred
 
@@ -142,13 +136,21 @@ def sendProtoOASymbolsListReq(includeArchivedSymbols = False, clientMsgId = None
     request = ProtoOASymbolsListReq()
     request.ctidTraderAccountId = currentAccountId
     request.includeArchivedSymbols = includeArchivedSymbols if type(includeArchivedSymbols) is bool else bool(includeArchivedSymbols)
-    deferred = client.send(request)
+    deferred = responseCache.send(request)
     deferred.addErrback(onError)
     return deferred
 
 def sendProtoOATraderReq(clientMsgId = None):
     request = ProtoOATraderReq()
     request.ctidTraderAccountId = currentAccountId
+    deferred = responseCache.send(request)
+    deferred.addErrback(onError)
+    return deferred
+
+def sendProtoOASubscribeSpotsReq(symbolId, clientMsgId = None):
+    request = ProtoOASubscribeSpotsReq()
+    request.ctidTraderAccountId = currentAccountId
+    request.symbolId.append(int(symbolId))
     deferred = client.send(request, clientMsgId = clientMsgId)
     deferred.addErrback(onError)
     return deferred
@@ -258,8 +260,12 @@ def sendProtoOAOrderListByPositionIdReq(positionId, fromTimestamp=None, toTimest
     deferred = client.send(request, fromTimestamp=fromTimestamp, toTimestamp=toTimestamp, clientMsgId=clientMsgId)
     deferred.addErrback(onError)
 
+def getCacheStats():
+    return defer.succeed(f"Cache hit ratio: {responseCache.getHitRatio():.2%}, saved requests: {responseCache.savedRequestsCount}, cached responses: {len(responseCache)}")
+
 commands = {
     "setAccount": setAccount,
+    "CacheStats": getCacheStats,
     "ProtoOAVersionReq": sendProtoOAVersionReq,
     "ProtoOAGetAccountListByAccessTokenReq": sendProtoOAGetAccountListByAccessTokenReq,
     "ProtoOAAssetListReq": sendProtoOAAssetListReq,
@@ -268,6 +274,8 @@ commands = {
     "ProtoOASymbolsListReq": sendProtoOASymbolsListReq,
     "ProtoOATraderReq": sendProtoOATraderReq,
     "ProtoOAReconcileReq": sendProtoOAReconcileReq,
+    "ProtoOASubscribeSpotsReq": sendProtoOASubscribeSpotsReq,
+    "ProtoOAUnsubscribeSpotsReq": sendProtoOAUnsubscribeSpotsReq,
     "ProtoOAGetTrendbarsReq": sendProtoOAGetTrendbarsReq,
     "ProtoOAGetTickDataReq": sendProtoOAGetTickDataReq,
     "NewMarketOrder": sendNewMarketOrder,
@@ -281,11 +289,31 @@ commands = {
     "OrderListByPositionId": sendProtoOAOrderListByPositionIdReq,
 }
 
+jsonEncoder = JsonEncoder()
+
 def encodeResult(result):
     if type(result) is str:
         return f'{{"result": "{result}"}}'.encode(encoding = 'UTF-8')
     else:
-        return MessageToJson(Protobuf.extract(result)).encode(encoding = 'UTF-8')
+        return jsonEncoder.encode(Protobuf.extract(result)).encode(encoding = 'UTF-8')
+
+def encodeBinaryResult(result, request):
+    # The protobuf payload is already encoded and several times smaller than its JSON
+    if type(result) is str:
+        return encodeResult(result)
+    request.responseHeaders.setRawHeaders(b"content-type", [b"application/x-protobuf"])
+    request.responseHeaders.addRawHeader(b"x-payload-type", str(result.payloadType).encode())
+    return result.payload
+
+@app.route('/stream')
+def stream(request):
+    # One upstream stream of spot, depth and execution events for all browsers, as Server-Sent Events
+    return gateway
+
+@app.route('/metrics')
+def metrics(request):
+    # Client send queue, pending responses, reconnections, response times and received messages for Prometheus
+    return metricsResource
 
 @app.route('/get-data')
 def getData(request):
@@ -305,7 +333,10 @@ def getData(request):
         parameters = commandSplit[1:]
         print(parameters)
         result = commands[commandSplit[0]](*parameters)
-        result.addCallback(encodeResult)
+        if request.args.get(b"format", [b"json"])[0] == b"protobuf":
+            result.addCallback(encodeBinaryResult, request)
+        else:
+            result.addCallback(encodeResult)
     if type(result) is str:
         result = encodeResult(result)
     print(result)
@@ -316,9 +347,17 @@ log.startLogging(sys.stdout)
 client = Client(EndPoints.PROTOBUF_LIVE_HOST if credentials["Host"].lower() == "live" else EndPoints.PROTOBUF_DEMO_HOST, EndPoints.PROTOBUF_PORT, TcpProtocol)
 client.setConnectedCallback(connected)
 client.setDisconnectedCallback(disconnected)
-client.setMessageReceivedCallback(onMessageReceived)
+# Received messages are recorded in a binary file instead of being printed, see EventLog.read to format it
+eventLog = EventLog(level=EventLog.DEBUG, path="events.bin")
+eventLog.addClient(client)
+reactor.addSystemEventTrigger("before", "shutdown", eventLog.close)
 client.startService()
 
+gateway = PushGateway(client)
+metricsResource = MetricsResource(client.metrics)
+# Lists and trader requests of all users are answered from this cache instead of going upstream every time
+responseCache = ResponseCache(client)
+
 endpoint_description = f"tcp6:port={port}:interface={host}"
 endpoint = endpoints.serverFromString(reactor, endpoint_description)
 site = Site(app.resource())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""Runs the sample strategies over a week of generated ticks, one strategy per worker process."""
+
+import array
+import random
+import time
+
+from ctrader_open_api import Backtester
+from ctrader_open_api.backtest import sweep
+from strategies import STRATEGIES, SYMBOL_IDS, StrategyManager
+
+PAIR = "EURUSD"
+DAYS = 7
+
+
+def generate_ticks(days, seed):
+    """One tick per second random walk, replace it with your cached history (ex: NumPy arrays loaded from .npy files)."""
+    rng = random.Random(seed)
+    count = days * 24 * 3600
+    timestamps = array.array("q", range(0, count * 1000, 1000))
+    bids = array.array("d", [1.1]) * count
+    for i in range(1, count):
+        bids[i] = bids[i - 1] + rng.gauss(0, 0.00005)
+    return timestamps, bids
+
+
+def run_strategy(params):
+    name, seed = params
+    random.seed(seed)
+    timestamps, bids = generate_ticks(DAYS, seed)
+    backtester = Backtester(initialBalance=10000, slippageInPrice=0.00001)
+    backtester.addSymbol(SYMBOL_IDS[PAIR], timestamps, bids, spreadInPrice=0.0001)
+    manager = StrategyManager(client=backtester.client, account_id=backtester.client.accountId, log=lambda message: None,
+                              clock=backtester.clock)
+    manager.start(name, PAIR)
+    return name, backtester.run()
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    for name, result in sweep(run_strategy, [(name, 1) for name in STRATEGIES]):
+        print(f"{name:>10}: balance {result['balance']:10.2f} equity {result['equity']:10.2f} deals {result['dealsCount']}")
+    print(f"{len(STRATEGIES)} strategies over {DAYS} days of ticks in {time.perf_counter() - start:.1f} s")
@@ -3,7 +3,7 @@
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-from ctrader_open_api import Client, TcpProtocol, EndPoints
+from ctrader_open_api import Client, TcpProtocol, EndPoints, RiskGate, SymbolLimits, Offloader, Conflator, EventLog
 from strategies import StrategyManager # Import StrategyManager
 
 from twisted.internet import reactor, tksupport
@@ -22,6 +22,12 @@ class ScalperGUI:
         self.root = root
         root.title("cTrader Scalper")
         self.client = None
+        self.risk_gate = None
+        self.conflator = None
+        # Signals are evaluated in worker processes so the reactor keeps serving network I/O and the GUI
+        self.offloader = Offloader(maxWorkers=2)
+        # Every received message and signal is recorded in a binary file, see EventLog.read to format it
+        self.event_log = EventLog(level=EventLog.DEBUG, path="scalper-events.bin")
         self.access_token = None # Will be fetched from entry
         self.account_id = None # Will be fetched from entry
         self.strategy_manager = None
@@ -120,7 +126,8 @@ class ScalperGUI:
 
         if self.client and self.account_id: # Ensure client and account_id are set
             try:
-                self.strategy_manager = StrategyManager(client=self.client, account_id=self.account_id, log=self.log_message)
+                self.strategy_manager = StrategyManager(client=self.risk_gate, account_id=self.account_id, log=self.log_message,
+                                                        offloader=self.offloader, event_log=self.event_log)
                 self.log_message("StrategyManager initialized and ready.")
                 self.start_scalp_button.config(state="normal")
                 self.stop_scalp_button.config(state="disabled")
@@ -175,7 +182,11 @@ class ScalperGUI:
                 self.client = Client(host, port, TcpProtocol)
                 self.client.setConnectedCallback(self.on_connected)
                 self.client.setDisconnectedCallback(self.on_disconnected)
-                self.client.setMessageReceivedCallback(self._on_message_received)
+                # The log only shows the latest spot of each symbol, at most 10 times per second, so bursts don't freeze the GUI
+                self.conflator = Conflator(self.client, self._on_messages_received, framesPerSecond=10)
+                self.event_log.addClient(self.client)
+                # Orders are checked locally before they enter the client send queue, created once as it listens to client messages
+                self.risk_gate = RiskGate(self.client, maxOrdersPerSecond=1, defaultLimits=SymbolLimits(maxOrderVolume=100 * 100))
                 self.log_message("Client initialized.")
             except Exception as e:
                 self.log_message(f"Fatal Error initializing client: {e}")
@@ -210,9 +221,9 @@ class ScalperGUI:
         # self.client = None # Or rely on ClientService to retry. If set to None, next connect re-instantiates.
                            # For now, allow ClientService to manage its state for retries.
 
-    def _on_message_received(self, client, message):
+    def _on_messages_received(self, messages):
         # This is a generic handler. Specific responses are handled by Deferreds.
-        self.log_message(f"RECV: {message.payloadType if hasattr(message, 'payloadType') else type(message)}")
+        self.log_message("\n".join(f"RECV: {message.payloadType}" for message in messages))
         # More detailed logging or processing can be added here if needed.
 
     def start_scalp(self):
@@ -248,5 +259,7 @@ if __name__ == "__main__":
     root = tk.Tk()
     tksupport.install(root)
     app = ScalperGUI(root)
+    reactor.addSystemEventTrigger("before", "shutdown", app.offloader.shutdown)
+    reactor.addSystemEventTrigger("before", "shutdown", app.event_log.close)
     reactor.run()
 
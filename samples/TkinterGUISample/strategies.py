@@ -4,8 +4,9 @@ from typing import Callable, Dict
 
 from twisted.internet.task import LoopingCall
 
-from ctrader_open_api.messages.OpenApiMessages_pb2 import (
-    ProtoOANewOrderReq,
+from ctrader_open_api import StaleResultError, EventLog
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOANewOrderReq, ProtoOAOrderErrorEvent, ProtoOAErrorRes
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import (
     ProtoOAOrderType,
     ProtoOATradeSide,
 )
@@ -23,73 +24,69 @@ SYMBOL_IDS: Dict[str, int] = {
 
 
 def evaluate_market(pair: str) -> str:
-    """Placeholder for future AI driven signal generation."""
+    """Placeholder for future AI driven signal generation.
+
+    It runs in a worker process when StrategyManager has an offloader, so it should only use its arguments.
+    """
     return random.choice(["BUY", "SELL"])
 
 
-# Individual strategy implementations
+# Responses of a new order request that mean it failed
+ORDER_ERROR_PAYLOAD_TYPES = frozenset((ProtoOAOrderErrorEvent().payloadType, ProtoOAErrorRes().payloadType))
+
 
-def safe(client, account_id: int, pair: str, log: Callable[[str], None]):
-    direction = evaluate_market(pair)
+def place_order(client, account_id: int, pair: str, log: Callable[[str], None], direction: str, volume: int, name: str,
+                event_log=None):
     req = ProtoOANewOrderReq()
     req.ctidTraderAccountId = int(account_id)
     req.symbolId = SYMBOL_IDS[pair]
     req.orderType = ProtoOAOrderType.MARKET
     req.tradeSide = ProtoOATradeSide.Value(direction)
-    req.volume = 10 * 100  # 0.1 lot
+    req.volume = volume
     d = client.send(req)
-    d.addCallbacks(lambda _: log(f"Safe {direction} order sent"), lambda f: log(str(f)))
+    if event_log is None:
+        d.addCallbacks(lambda _: log(f"{name} {direction} order sent"), lambda f: log(str(f)))
+        return d
+    # Orders are recorded as EventLog events, no text is built for them
+    event_log.record(EventLog.INFO, EventLog.ORDER_SENT, accountId=req.ctidTraderAccountId, objectId=req.symbolId, value=volume)
+    d.addCallbacks(_on_order_response, _on_order_failure, callbackArgs=(event_log, req), errbackArgs=(event_log, req))
+    return d
 
 
-def moderate(client, account_id: int, pair: str, log: Callable[[str], None]):
-    direction = evaluate_market(pair)
-    req = ProtoOANewOrderReq()
-    req.ctidTraderAccountId = int(account_id)
-    req.symbolId = SYMBOL_IDS[pair]
-    req.orderType = ProtoOAOrderType.MARKET
-    req.tradeSide = ProtoOATradeSide.Value(direction)
-    req.volume = 50 * 100  # 0.5 lot
-    d = client.send(req)
-    d.addCallbacks(lambda _: log(f"Moderate {direction} order sent"), lambda f: log(str(f)))
+def _on_order_response(message, event_log, req):
+    if message.payloadType in ORDER_ERROR_PAYLOAD_TYPES:
+        event_log.record(EventLog.ERROR, EventLog.ORDER_FAILED, message.payloadType, req.ctidTraderAccountId, req.symbolId)
+    return message
 
 
-def aggressive(client, account_id: int, pair: str, log: Callable[[str], None]):
-    direction = evaluate_market(pair)
-    req = ProtoOANewOrderReq()
-    req.ctidTraderAccountId = int(account_id)
-    req.symbolId = SYMBOL_IDS[pair]
-    req.orderType = ProtoOAOrderType.MARKET
-    req.tradeSide = ProtoOATradeSide.Value(direction)
-    req.volume = 100 * 100  # 1 lot
-    d = client.send(req)
-    d.addCallbacks(lambda _: log(f"Aggressive {direction} order sent"), lambda f: log(str(f)))
+def _on_order_failure(failure, event_log, req):
+    # Rejected by the risk gate or no response in time
+    event_log.record(EventLog.ERROR, EventLog.ORDER_FAILED, 0, req.ctidTraderAccountId, req.symbolId)
 
 
-def trends(client, account_id: int, pair: str, log: Callable[[str], None]):
-    direction = evaluate_market(pair)
-    req = ProtoOANewOrderReq()
-    req.ctidTraderAccountId = int(account_id)
-    req.symbolId = SYMBOL_IDS[pair]
-    req.orderType = ProtoOAOrderType.MARKET
-    req.tradeSide = ProtoOATradeSide.Value(direction)
-    req.volume = 20 * 100  # 0.2 lot
-    d = client.send(req)
-    d.addCallbacks(lambda _: log(f"Trend {direction} order sent"), lambda f: log(str(f)))
+# Individual strategy implementations
 
+def safe(client, account_id: int, pair: str, log: Callable[[str], None], direction: str = None, event_log=None):
+    place_order(client, account_id, pair, log, direction or evaluate_market(pair), 10 * 100, "Safe", event_log)  # 0.1 lot
 
-def scalping(client, account_id: int, pair: str, log: Callable[[str], None]):
-    direction = evaluate_market(pair)
-    req = ProtoOANewOrderReq()
-    req.ctidTraderAccountId = int(account_id)
-    req.symbolId = SYMBOL_IDS[pair]
-    req.orderType = ProtoOAOrderType.MARKET
-    req.tradeSide = ProtoOATradeSide.Value(direction)
-    req.volume = 5 * 100  # 0.05 lot
-    d = client.send(req)
-    d.addCallbacks(lambda _: log(f"Scalping {direction} order sent"), lambda f: log(str(f)))
 
+def moderate(client, account_id: int, pair: str, log: Callable[[str], None], direction: str = None, event_log=None):
+    place_order(client, account_id, pair, log, direction or evaluate_market(pair), 50 * 100, "Moderate", event_log)  # 0.5 lot
 
-STRATEGIES: Dict[str, Callable[[object, int, str, Callable[[str], None]], None]] = {
+
+def aggressive(client, account_id: int, pair: str, log: Callable[[str], None], direction: str = None, event_log=None):
+    place_order(client, account_id, pair, log, direction or evaluate_market(pair), 100 * 100, "Aggressive", event_log)  # 1 lot
+
+
+def trends(client, account_id: int, pair: str, log: Callable[[str], None], direction: str = None, event_log=None):
+    place_order(client, account_id, pair, log, direction or evaluate_market(pair), 20 * 100, "Trend", event_log)  # 0.2 lot
+
+
+def scalping(client, account_id: int, pair: str, log: Callable[[str], None], direction: str = None, event_log=None):
+    place_order(client, account_id, pair, log, direction or evaluate_market(pair), 5 * 100, "Scalping", event_log)  # 0.05 lot
+
+
+STRATEGIES: Dict[str, Callable[..., None]] = {
     "safe": safe,
     "moderate": moderate,
     "aggressive": aggressive,
@@ -103,19 +100,61 @@ class StrategyManager:
     client: object
     account_id: int
     log: Callable[[str], None]
+    # If set (ex: Offloader()) evaluate_market runs in a worker process and its result is used on the reactor thread
+    offloader: object = None
+    deadline_seconds: float = 5.0
+    # Reactor by default, a Backtester clock to run the strategies over history
+    clock: object = None
+    # If set signals and orders are recorded as EventLog events instead of text
+    event_log: object = None
     _loop: LoopingCall = None
+    # Changes on each start and stop, so signals of a previous run are dropped instead of placing orders
+    _run_token: int = 0
 
     def start(self, name: str, pair: str) -> None:
         self.stop()
+        self._run_token += 1
         func = STRATEGIES.get(name.lower())
         if not func:
             self.log(f"Unknown strategy: {name}")
             return
         self.log(f"Executing {name} strategy on {pair}")
-        self._loop = LoopingCall(func, self.client, self.account_id, pair, self.log)
+        if self.offloader is None:
+            self._loop = LoopingCall(func, self.client, self.account_id, pair, self.log, event_log=self.event_log)
+        else:
+            self._loop = LoopingCall(self._evaluate_offloaded, func, pair)
+        if self.clock is not None:
+            self._loop.clock = self.clock
         self._loop.start(10.0, now=True)
 
+    def _evaluate_offloaded(self, func, pair: str) -> None:
+        d = self.offloader.submit(pair, evaluate_market, pair, deadlineInSeconds=self.deadline_seconds)
+        d.addCallback(self._on_signal, func, pair, self._run_token)
+        d.addErrback(self._on_signal_failure, pair)
+
+    def _on_signal(self, direction: str, func, pair: str, run_token: int) -> None:
+        if run_token != self._run_token or not (self._loop and self._loop.running):
+            if self.event_log is not None:
+                self.event_log.record(EventLog.WARNING, EventLog.SIGNAL_DROPPED, accountId=int(self.account_id), objectId=SYMBOL_IDS[pair])
+            else:
+                self.log(f"Dropped {pair} signal of a stopped strategy")
+            return
+        if self.event_log is not None:
+            self.event_log.record(EventLog.INFO, EventLog.SIGNAL, accountId=int(self.account_id), objectId=SYMBOL_IDS[pair],
+                                  value=ProtoOATradeSide.Value(direction))
+        func(self.client, self.account_id, pair, self.log, direction=direction, event_log=self.event_log)
+
+    def _on_signal_failure(self, failure, pair: str) -> None:
+        if failure.check(StaleResultError):
+            if self.event_log is not None:
+                self.event_log.record(EventLog.WARNING, EventLog.SIGNAL_DROPPED, accountId=int(self.account_id), objectId=SYMBOL_IDS[pair])
+            else:
+                self.log(f"Dropped stale {pair} signal")
+        else:
+            self.log(str(failure))
+
     def stop(self) -> None:
+        self._run_token += 1
         if self._loop and self._loop.running:
             self._loop.stop()
             self.log("Strategy stopped")
@@ -0,0 +1,65 @@
+"""Tests for the account router."""
+
+from twisted.internet import defer
+
+from ctrader_open_api import AccountRouter, Protobuf
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (ProtoOAAccountAuthRes, ProtoOAExecutionEvent, ProtoOAOrderErrorEvent,
+                                                           ProtoOAAccountsTokenInvalidatedEvent)
+
+
+class FakeClient:
+    def __init__(self):
+        self.listeners = []
+        self.sent = []
+
+    def addMessageListener(self, listener):
+        self.listeners.append(listener)
+
+    def send(self, message, **kwargs):
+        self.sent.append(message)
+        response = ProtoOAAccountAuthRes(ctidTraderAccountId=message.ctidTraderAccountId)
+        return defer.succeed(ProtoMessage(payloadType=response.payloadType, payload=response.SerializeToString()))
+
+    def receive(self, payload):
+        message = ProtoMessage(payloadType=payload.payloadType, payload=payload.SerializeToString())
+        for listener in self.listeners:
+            listener(self, message)
+
+
+def test_routes_by_account_id():
+    client = FakeClient()
+    router = AccountRouter(client, "token")
+    router.authorizeAccounts([11, 22])
+    assert router.authorizedAccountIds == {11, 22}
+    received = {11: [], 22: []}
+    router.setAccountHandler(11, lambda c, m: received[11].append(Protobuf.extract(m)))
+    router.setAccountHandler(22, lambda c, m: received[22].append(Protobuf.extract(m)))
+    client.receive(ProtoOAExecutionEvent(ctidTraderAccountId=22, executionType=2))
+    client.receive(ProtoOAOrderErrorEvent(ctidTraderAccountId=11, errorCode="E", orderId=5))
+    assert [m.payloadType for m in received[22]] == [ProtoOAExecutionEvent().payloadType]
+    assert received[11][0].orderId == 5
+    unknown = ProtoMessage(payloadType=9999, payload=b"")
+    for listener in client.listeners:
+        listener(client, unknown)
+    assert router.getAccountId(unknown) is None
+
+
+class FakeTokenManager:
+    accessToken = "old"
+
+    def addTokenRefreshedCallback(self, callback):
+        self.callback = callback
+
+
+def test_reauthorizes_invalidated_accounts_with_refreshed_token():
+    client = FakeClient()
+    tokenManager = FakeTokenManager()
+    router = AccountRouter(client, tokenManager=tokenManager)
+    router.authorizeAccounts([11, 22])
+    client.receive(ProtoOAAccountsTokenInvalidatedEvent(ctidTraderAccountIds=[22], reason="expired"))
+    assert router.authorizedAccountIds == {11}
+    tokenManager.accessToken = "new"
+    tokenManager.callback(tokenManager)
+    assert router.authorizedAccountIds == {11, 22}
+    assert (client.sent[-1].ctidTraderAccountId, client.sent[-1].accessToken) == (22, "new")
@@ -0,0 +1,46 @@
+"""Tests for the local account state engine."""
+
+from ctrader_open_api import AccountState
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAExecutionEvent, ProtoOAReconcileRes, ProtoOAOrderErrorEvent
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import (ProtoOAPosition, ProtoOAPositionStatus, ProtoOATradeSide, ProtoOAOrder,
+                                                                ProtoOAOrderStatus)
+
+
+def makePosition(positionId, symbolId, volume, tradeSide, status=ProtoOAPositionStatus.POSITION_STATUS_OPEN):
+    position = ProtoOAPosition(positionId=positionId, positionStatus=status, swap=0)
+    position.tradeData.symbolId = symbolId
+    position.tradeData.volume = volume
+    position.tradeData.tradeSide = tradeSide
+    return position
+
+
+def test_seed_and_incremental_updates():
+    state = AccountState(1)
+    state.loadReconcile(ProtoOAReconcileRes(ctidTraderAccountId=1, position=[makePosition(10, 5, 1000, ProtoOATradeSide.BUY)]))
+    state.applyExecutionEvent(ProtoOAExecutionEvent(ctidTraderAccountId=1, executionType=3, position=makePosition(11, 5, 300, ProtoOATradeSide.SELL)))
+    assert state.getNetVolume(5) == 700
+    assert {p.positionId for p in state.getPositionsBySymbol(5)} == {10, 11}
+    closed = makePosition(10, 5, 1000, ProtoOATradeSide.BUY, ProtoOAPositionStatus.POSITION_STATUS_CLOSED)
+    state.applyExecutionEvent(ProtoOAExecutionEvent(ctidTraderAccountId=1, executionType=3, position=closed))
+    assert state.getNetVolume(5) == -300
+    assert state.getPosition(10) is None
+    state.loadReconcile(ProtoOAReconcileRes(ctidTraderAccountId=1))
+    assert state.driftCount == 1
+    assert state.getNetVolume(5) == 0
+
+
+def test_order_errors_are_pruned():
+    state = AccountState(1)
+    error = ProtoOAOrderErrorEvent(ctidTraderAccountId=1, errorCode="E", orderId=7)
+    state.onMessage(None, ProtoMessage(payloadType=error.payloadType, payload=error.SerializeToString()))
+    assert state.getOrderError(7).errorCode == "E"
+    order = ProtoOAOrder(orderId=7, orderStatus=ProtoOAOrderStatus.ORDER_STATUS_REJECTED)
+    order.tradeData.symbolId = 5
+    order.tradeData.volume = 100
+    order.tradeData.tradeSide = ProtoOATradeSide.BUY
+    state.applyExecutionEvent(ProtoOAExecutionEvent(ctidTraderAccountId=1, executionType=7, order=order))
+    assert state.getOrderError(7) is None
+    state.onMessage(None, ProtoMessage(payloadType=error.payloadType, payload=error.SerializeToString()))
+    state.loadReconcile(ProtoOAReconcileRes(ctidTraderAccountId=1))
+    assert state.getOrderError(7) is None
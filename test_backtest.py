@@ -0,0 +1,41 @@
+"""Tests for the backtester and simulated client."""
+
+import array
+
+from twisted.internet import task
+
+from ctrader_open_api import AccountState, Backtester, UnsupportedMessageError
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOANewOrderReq, ProtoOAClosePositionReq, ProtoOAVersionReq
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOAOrderType, ProtoOATradeSide
+
+
+def test_fills_against_ticks():
+    timestamps = array.array("q", range(0, 100000, 1000))
+    bids = array.array("d", [1.1 + i * 0.0001 for i in range(100)])
+    backtester = Backtester(slippageInPrice=0.00001)
+    backtester.addSymbol(1, timestamps, bids, spreadInPrice=0.0002)
+    client = backtester.client
+    state = AccountState(client.accountId, client)
+    responses = []
+
+    def trade():
+        if not client.positions:
+            request = ProtoOANewOrderReq(ctidTraderAccountId=1, symbolId=1, orderType=ProtoOAOrderType.MARKET,
+                                         tradeSide=ProtoOATradeSide.BUY, volume=100000)
+        else:
+            request = ProtoOAClosePositionReq(ctidTraderAccountId=1, positionId=next(iter(client.positions)), volume=100000)
+        client.send(request).addCallback(responses.append)
+
+    loop = task.LoopingCall(trade)
+    loop.clock = backtester.clock
+    loop.start(10, now=False)
+    result = backtester.run()
+    assert len(responses) == 9 and result["dealsCount"] == 9
+    assert result["openPositionsCount"] == 1 and state.getNetVolume(1) == 100000
+    # Each round trip buys at ask plus slippage at 10 s and sells at bid minus slippage at 20 s
+    assert round(result["balance"] - 10000, 2) == round(4 * 1000 * (0.0010 - 0.0002 - 0.00002), 2)
+    rejections, failures = [], []
+    client.send(ProtoOANewOrderReq(symbolId=2, orderType=ProtoOAOrderType.LIMIT)).addCallback(rejections.append)
+    client.send(ProtoOAVersionReq()).addErrback(failures.append)
+    assert rejections[0].payloadType != responses[0].payloadType
+    assert failures[0].check(UnsupportedMessageError) and isinstance(failures[0].value.request, ProtoOAVersionReq)
@@ -0,0 +1,74 @@
+"""Tests for the per consumer conflation stage."""
+
+from twisted.internet import task
+
+from ctrader_open_api.conflator import Conflator
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent, ProtoOAExecutionEvent
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOAExecutionType
+
+
+class FakeClient:
+    def __init__(self):
+        self.listeners = []
+
+    def addMessageListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeMessageListener(self, listener):
+        self.listeners.remove(listener)
+
+    def receive(self, event):
+        message = ProtoMessage(payloadType=event.payloadType, payload=event.SerializePartialToString())
+        for listener in list(self.listeners):
+            listener(self, message)
+        return message
+
+
+def spot(symbolId, bid):
+    return ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=symbolId, bid=bid)
+
+
+def test_latest_spot_per_symbol_is_delivered_per_frame():
+    client = FakeClient()
+    clock = task.Clock()
+    frames = []
+    conflator = Conflator(client, frames.append, framesPerSecond=10, clock=clock)
+    everyTick = []
+    client.addMessageListener(lambda client, message: everyTick.append(message))
+    for bid in range(100):
+        client.receive(spot(1, bid))
+        client.receive(spot(2, bid))
+    execution = client.receive(ProtoOAExecutionEvent(ctidTraderAccountId=1, executionType=ProtoOAExecutionType.ORDER_FILLED))
+    lastSpot = client.receive(spot(1, 1000))
+    assert len(everyTick) == 202
+    assert not frames
+    clock.advance(0.1)
+    assert len(frames) == 1 and frames[0][1:] == [execution, lastSpot]
+    assert ProtoOASpotEvent.FromString(frames[0][0].payload).symbolId == 2
+    assert (conflator.receivedCount, conflator.conflatedCount) == (202, 199)
+    clock.advance(0.1)
+    assert len(frames) == 1
+    conflator.stop()
+    assert len(client.listeners) == 1 and not clock.getDelayedCalls()
+
+
+def test_pull_consumer_and_custom_key():
+    client = FakeClient()
+    conflator = Conflator(client, framesPerSecond=None, keyFunction=lambda message: message.payloadType, clock=task.Clock())
+    for bid in range(5):
+        client.receive(spot(bid, bid))
+    messages = conflator.takePending()
+    assert len(messages) == 1 and ProtoOASpotEvent.FromString(messages[0].payload).bid == 4
+    assert conflator.takePending() == [] and conflator.framesCount == 1
+
+
+def test_spot_prices_missing_from_the_latest_event_are_kept():
+    client = FakeClient()
+    conflator = Conflator(client, framesPerSecond=None, clock=task.Clock())
+    client.receive(ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1, bid=100, ask=102, timestamp=1))
+    client.receive(ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1, ask=103, timestamp=2))
+    client.receive(ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1, bid=101))
+    messages = conflator.takePending()
+    event = ProtoOASpotEvent.FromString(messages[0].payload)
+    assert len(messages) == 1 and (event.bid, event.ask, event.timestamp) == (101, 103, 2)
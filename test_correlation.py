@@ -0,0 +1,65 @@
+"""Tests for the response correlation table and timing wheel."""
+
+from twisted.internet import defer, task
+
+from ctrader_open_api import Client, TcpProtocol
+from ctrader_open_api.correlation import ClientMsgIdCollisionError, CorrelationTable
+from ctrader_open_api.timingWheel import TimingWheel
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAVersionReq, ProtoOAVersionRes
+
+
+class FakeProtocol:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message, clientMsgId=None, isCanceled=None):
+        self.sent.append((clientMsgId, isCanceled))
+
+
+def test_ids_timeouts_and_stale_responses():
+    clock = task.Clock()
+    table = CorrelationTable(TimingWheel(tickInSeconds=0.1, wheelSize=8, clock=clock))
+    first, second = table.nextId(), table.nextId()
+    assert first != second and len(second) <= 3
+    answered, timedOut = defer.Deferred(), defer.Deferred()
+    failures = []
+    timedOut.addErrback(failures.append)
+    table.add(first, answered, 5)
+    table.add(second, timedOut, 2)
+    assert table.pop(first) is answered
+    clock.pump([0.1] * 19)
+    assert not failures
+    clock.pump([0.1] * 2)
+    assert failures[0].check(defer.TimeoutError)
+    assert table.pop(second) is None
+    assert table.staleResponsesCount == 1
+    assert len(table.timingWheel) == 0
+
+
+def test_colliding_user_ids():
+    table = CorrelationTable(TimingWheel(clock=task.Clock()))
+    older, newer = defer.Deferred(), defer.Deferred()
+    failures = []
+    older.addErrback(failures.append)
+    table.add("order", older, 5)
+    table.add("order", newer, 5)
+    assert failures[0].check(ClientMsgIdCollisionError)
+    assert table.pop("order") is newer
+
+
+def test_client_keeps_the_newer_request_of_a_colliding_id():
+    client = Client("localhost", 5035, TcpProtocol)
+    protocol = FakeProtocol()
+    client.whenConnected = lambda failAfterFailures=None: defer.succeed(protocol)
+    older = client.send(ProtoOAVersionReq(), clientMsgId="order")
+    newer = client.send(ProtoOAVersionReq(), clientMsgId="order")
+    failures, responses = [], []
+    older.addErrback(failures.append)
+    newer.addCallback(responses.append)
+    assert failures[0].check(ClientMsgIdCollisionError)
+    assert client._responseDeferreds.get("order") is newer and len(client.timingWheel) == 1
+    assert [isCanceled() for _, isCanceled in protocol.sent] == [True, False]
+    response = ProtoMessage(payloadType=ProtoOAVersionRes().payloadType, payload=ProtoOAVersionRes(version="1").SerializeToString(), clientMsgId="order")
+    client._received(response)
+    assert responses == [response] and len(client._responseDeferreds) == 0
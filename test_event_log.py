@@ -0,0 +1,76 @@
+"""Tests for the binary structured event log."""
+
+from twisted.internet import task
+
+from ctrader_open_api import Client, TcpProtocol
+from ctrader_open_api.eventLog import EventLog
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent, ProtoOAVersionRes, ProtoOATraderRes
+
+
+class FakeClient:
+    def __init__(self):
+        self.listeners = []
+
+    def addMessageListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeMessageListener(self, listener):
+        self.listeners.remove(listener)
+
+    def receive(self, event):
+        message = ProtoMessage(payloadType=event.payloadType, payload=event.SerializePartialToString())
+        for listener in list(self.listeners):
+            listener(self, message)
+
+
+def test_level_filter_ring_and_lazy_format():
+    clock = task.Clock()
+    log = EventLog(capacity=4, level=EventLog.INFO, clock=clock)
+    log.record(EventLog.DEBUG, EventLog.SIGNAL, objectId=1)
+    assert log.recordsCount == 0 and not log.isEnabledFor(EventLog.DEBUG)
+    for symbolId in range(6):
+        clock.advance(1)
+        log.record(EventLog.INFO, EventLog.SIGNAL, accountId=7, objectId=symbolId, value=1)
+    records = log.getRecords()
+    assert [record[5] for record in records] == [2, 3, 4, 5]
+    assert records[-1] == (6.0, EventLog.INFO, EventLog.SIGNAL, 0, 7, 5, 1)
+    assert log.format(records[-1]).endswith("INFO Signal for symbol 5 of account 7, trade side 1")
+    log.registerKind(100, "Custom {value}")
+    log.record(EventLog.ERROR, 100, value=-3)
+    assert log.format(log.getRecords(1)[0]).endswith("ERROR Custom -3")
+
+
+def test_client_messages_are_flushed_to_file_in_batches(tmp_path):
+    path = tmp_path / "events.bin"
+    clock = task.Clock()
+    client = FakeClient()
+    log = EventLog(capacity=8, level=EventLog.DEBUG, path=path, flushIntervalInSeconds=1, clock=clock)
+    log.addClient(client)
+    for bid in range(3):
+        client.receive(ProtoOASpotEvent(ctidTraderAccountId=42, symbolId=1, bid=bid))
+    client.receive(ProtoOAVersionRes(version="1"))
+    clock.advance(1)
+    for bid in range(10):
+        client.receive(ProtoOASpotEvent(ctidTraderAccountId=42, symbolId=1, bid=bid))
+    log.close()
+    assert not client.listeners and log.droppedCount == 2
+    records = EventLog.read(path)
+    assert len(records) == 12
+    assert records[0][3:5] == (ProtoOASpotEvent().payloadType, 42) and records[3][4] == 0
+    assert "ProtoOASpotEvent of account 42" in log.format(records[0])
+
+
+def test_client_response_times():
+    client = Client("localhost", 5035, TcpProtocol)
+    log = EventLog(clock=task.Clock())
+    log.addClient(client)
+    client._sent("~1")
+    response = ProtoOATraderRes(ctidTraderAccountId=42)
+    client._received(ProtoMessage(payloadType=response.payloadType, payload=response.SerializePartialToString(), clientMsgId="~1"))
+    client._received(ProtoMessage(payloadType=response.payloadType, payload=response.SerializePartialToString(), clientMsgId="~2"))
+    records = log.getRecords()
+    assert len(records) == 1 and records[0][2:5] == (EventLog.RESPONSE_RECEIVED, response.payloadType, 42) and records[0][6] >= 0
+    assert "Received ProtoOATraderRes of account 42 after" in log.format(records[0])
+    log.close()
+    assert client.eventLog is None
@@ -0,0 +1,57 @@
+"""Tests for the bounded request fan-out."""
+
+from twisted.internet import defer
+
+from ctrader_open_api.fanOut import FanOut
+
+
+class FakeClient:
+    def __init__(self):
+        self.pending = []
+
+    def send(self, message, **kwargs):
+        deferred = defer.Deferred()
+        self.pending.append((message, deferred))
+        return deferred
+
+
+def test_bounded_in_flight_and_ordered_results():
+    client = FakeClient()
+    fanOut = FanOut(client, iter(range(5)), maxInFlight=2).start()
+    completed = []
+    fanOut.addResultCallback(lambda index, success, result: completed.append(index))
+    assert len(client.pending) == 2
+    client.pending[1][1].callback("r1")
+    assert len(client.pending) == 3
+    for message, deferred in client.pending:
+        if not deferred.called:
+            deferred.callback(f"r{message}")
+    while not fanOut.deferred.called:
+        client.pending[-1][1].callback(f"r{client.pending[-1][0]}")
+    results = []
+    fanOut.deferred.addCallback(results.append)
+    assert [result for success, result in results[0]] == ["r0", "r1", "r2", "r3", "r4"]
+    assert completed[:2] == [1, 0]
+
+
+def test_cancel_stops_remaining():
+    client = FakeClient()
+    fanOut = FanOut(client, range(100), maxInFlight=3).start()
+    fanOut.cancel()
+    results = []
+    fanOut.deferred.addCallback(results.append)
+    assert len(client.pending) == 3
+    assert len(results[0]) == 3
+    assert not any(success for success, result in results[0])
+
+
+class FiredClient:
+    def send(self, message, **kwargs):
+        return defer.fail(ValueError(message)) if message % 2 else defer.succeed(message)
+
+
+def test_already_fired_responses_do_not_recurse():
+    results = []
+    FanOut(FiredClient(), range(5000), maxInFlight=10).start().deferred.addCallback(results.append)
+    assert len(results[0]) == 5000
+    assert results[0][4] == (True, 4) and not results[0][5][0]
@@ -0,0 +1,68 @@
+"""Tests for the streaming deal and cash flow history exporter."""
+
+from twisted.internet import defer
+
+from ctrader_open_api import HistoryExporter, NpyChunkWriter
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOADealListRes, ProtoOACashFlowHistoryListRes
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOADeal, ProtoOADepositWithdraw
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+
+
+def makeDeal(dealId, timestamp):
+    return ProtoOADeal(dealId=dealId, orderId=dealId, positionId=dealId, volume=100, filledVolume=100, symbolId=1,
+                       createTimestamp=timestamp, executionTimestamp=timestamp, tradeSide=1, dealStatus=2, executionPrice=1.5)
+
+
+class FakeClient:
+    def __init__(self, deals, pageSize):
+        self.deals = deals
+        self.pageSize = pageSize
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        if request.DESCRIPTOR.name == "ProtoOACashFlowHistoryListReq":
+            response = ProtoOACashFlowHistoryListRes(ctidTraderAccountId=1)
+            if request.fromTimestamp == 0:
+                response.depositWithdraw.append(ProtoOADepositWithdraw(operationType=0, balanceHistoryId=1, balance=100, delta=100,
+                                                                       changeBalanceTimestamp=5, externalNote="first deposit"))
+            return defer.succeed(ProtoMessage(payloadType=response.payloadType, payload=response.SerializeToString()))
+        deals = [deal for deal in self.deals if request.fromTimestamp <= deal.executionTimestamp <= request.toTimestamp]
+        response = ProtoOADealListRes(ctidTraderAccountId=1, hasMore=len(deals) > self.pageSize)
+        response.deal.extend(deals[:self.pageSize])
+        return defer.succeed(ProtoMessage(payloadType=response.payloadType, payload=response.SerializeToString()))
+
+
+class MemoryWriter:
+    def __init__(self):
+        self.batches = []
+        self.isClosed = False
+
+    def writeBatch(self, name, batch):
+        self.batches.append((name, list(batch.data["dealId" if name == "deals" else "balanceHistoryId"])))
+
+    def close(self):
+        self.isClosed = True
+
+
+def test_pages_windows_and_batches():
+    deals = [makeDeal(1, 10), makeDeal(2, 20), makeDeal(3, 20), makeDeal(4, 30), makeDeal(5, 700000000)]
+    client = FakeClient(deals, pageSize=2)
+    writer = MemoryWriter()
+    exporter = HistoryExporter(client, 1, writer, batchRows=2)
+    results = []
+    exporter.exportAll(0, 800000000).addCallback(results.append)
+    assert results == [{"deals": 5, "cashFlow": 1}]
+    assert writer.batches == [("deals", [1, 2]), ("deals", [3, 4]), ("deals", [5]), ("cashFlow", [1])]
+    assert writer.isClosed
+
+
+def test_npy_chunks(tmp_path):
+    client = FakeClient([makeDeal(1, 10), makeDeal(2, 20)], pageSize=10)
+    exporter = HistoryExporter(client, 1, NpyChunkWriter(str(tmp_path)))
+    exporter.exportAll(0, 100)
+    assert NpyChunkWriter.read(str(tmp_path / "deals" / "000000" / "dealId.npy")) == [1, 2]
+    assert NpyChunkWriter.read(str(tmp_path / "deals" / "000000" / "executionPrice.npy")) == [1.5, 1.5]
+    assert NpyChunkWriter.read(str(tmp_path / "cashFlow" / "000000" / "externalNote.npy")) == ["first deposit"]
+    with open(tmp_path / "deals" / "000000" / "dealId.npy", "rb") as file:
+        assert (10 + int.from_bytes(file.read(10)[8:], "little")) % 64 == 0
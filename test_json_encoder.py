@@ -0,0 +1,43 @@
+"""Tests for the precompiled protobuf to JSON encoder."""
+
+import json
+
+from google.protobuf.json_format import MessageToJson
+
+from ctrader_open_api.jsonEncoder import JsonEncoder
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOADealListRes, ProtoOASymbolsListRes, ProtoOAReconcileRes
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOATradeSide, ProtoOADealStatus
+
+
+def dealListRes():
+    response = ProtoOADealListRes(ctidTraderAccountId=2 ** 53 + 1, hasMore=True)
+    for dealId in range(5):
+        deal = response.deal.add(dealId=dealId, orderId=dealId, positionId=dealId, volume=100000, filledVolume=0,
+                                 symbolId=1, createTimestamp=1700000000000, executionPrice=1.08123 * dealId,
+                                 tradeSide=ProtoOATradeSide.SELL, dealStatus=ProtoOADealStatus.PARTIALLY_FILLED)
+        if dealId % 2:
+            deal.closePositionDetail.entryPrice = float("nan") if dealId == 3 else 1e-7
+            deal.closePositionDetail.grossProfit = -1200
+            deal.closePositionDetail.swap = 0
+            deal.closePositionDetail.commission = 0
+            deal.closePositionDetail.balance = 1
+    return response
+
+
+def test_same_json_as_message_to_json():
+    encoder = JsonEncoder()
+    symbols = ProtoOASymbolsListRes(ctidTraderAccountId=1)
+    symbols.symbol.add(symbolId=1, symbolName='EUR"USD é\n', enabled=False)
+    messages = [dealListRes(), symbols, ProtoOAReconcileRes(ctidTraderAccountId=1), ProtoMessage(payloadType=2100, payload=b"\x00\xff")]
+    for message in messages:
+        assert json.loads(encoder.encode(message)) == json.loads(MessageToJson(message))
+    assert json.loads(encoder.encode(ProtoOADealListRes())) == {}
+
+
+def test_iter_encode_yields_chunks_of_the_same_json():
+    encoder = JsonEncoder()
+    message = dealListRes()
+    chunks = list(encoder.iterEncode(message, chunkSizeInParts=20))
+    assert len(chunks) > 2
+    assert "".join(chunks) == encoder.encode(message)
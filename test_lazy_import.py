@@ -0,0 +1,41 @@
+"""Tests for lazy loading of the package and the decode-only entry point."""
+
+import subprocess
+import sys
+
+import pytest
+
+import ctrader_open_api
+from ctrader_open_api.decode import iterFrames, readSession, decode, LENGTH
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent
+
+
+def loadedModules(statement):
+    code = f"{statement}; import sys; print(' '.join(sys.modules))"
+    return set(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split())
+
+
+def test_package_and_decode_imports_are_lean():
+    for statement in ("import ctrader_open_api", "from ctrader_open_api.decode import readSession"):
+        modules = loadedModules(statement)
+        assert not any(module.split(".")[0] in ("twisted", "requests") for module in modules), statement
+    assert "twisted.application.internet" in loadedModules("from ctrader_open_api import Client")
+
+
+def test_lazy_names():
+    assert ctrader_open_api.Protobuf is ctrader_open_api.protobuf.Protobuf
+    assert "Client" in dir(ctrader_open_api) and "Client" in ctrader_open_api.__all__
+    with pytest.raises(AttributeError):
+        ctrader_open_api.Unknown
+
+
+def test_decode_frames(tmp_path):
+    event = ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=2, bid=3)
+    data = ProtoMessage(payloadType=event.payloadType, payload=event.SerializeToString()).SerializeToString()
+    frames = (LENGTH.pack(len(data)) + data) * 3
+    path = tmp_path / "session.bin"
+    path.write_bytes(frames + frames[:10])
+    messages = readSession(path)
+    assert len(messages) == 3 and decode(messages[-1]) == event
+    assert list(iterFrames(b"")) == []
@@ -0,0 +1,50 @@
+"""Tests for the connection liveness monitor."""
+
+from twisted.internet import task
+
+from ctrader_open_api.liveness import LivenessMonitor
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent, ProtoOAVersionRes
+
+
+class FakeTransport:
+    aborted = False
+
+    def abortConnection(self):
+        self.aborted = True
+
+
+class FakeProtocol:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.sent = []
+
+    def send(self, message, instant=False, clientMsgId=None, isCanceled=None):
+        self.sent.append((message, clientMsgId))
+
+
+def test_rtt_and_stream_freshness():
+    clock = task.Clock()
+    monitor = LivenessMonitor(clock=clock)
+    monitor.connectionMade(FakeProtocol())
+    monitor.messageSent("1")
+    clock.advance(0.02)
+    monitor.messageReceived(ProtoMessage(payloadType=ProtoOAVersionRes().payloadType, clientMsgId="1"))
+    assert round(monitor.smoothedRttInMilliseconds) == 20
+    spot = ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=7)
+    monitor.messageReceived(ProtoMessage(payloadType=spot.payloadType, payload=spot.SerializeToString()))
+    clock.advance(0.5)
+    assert round(monitor.getStreamFreshness()[(spot.payloadType, 7)]) == 500
+
+
+def test_probe_then_dead_peer():
+    clock = task.Clock()
+    protocol = FakeProtocol()
+    monitor = LivenessMonitor(deadPeerTimeoutInMilliseconds=1000, clock=clock)
+    monitor.connectionMade(protocol)
+    clock.pump([0.1] * 5)
+    assert len(protocol.sent) == 1
+    assert not protocol.transport.aborted
+    clock.pump([0.1] * 6)
+    assert protocol.transport.aborted
+    assert monitor.deadPeerCount == 1
@@ -0,0 +1,52 @@
+"""Tests for the metrics registry and the client metrics."""
+
+from twisted.internet import defer
+
+from ctrader_open_api import Client, TcpProtocol
+from ctrader_open_api.metrics import MetricsRegistry, MetricsResource
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent
+
+
+class FakeRequest:
+    def __init__(self):
+        self.headers = dict()
+
+    def setHeader(self, name, value):
+        self.headers[name] = value
+
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.counter("messages", "Messages", ("payload_type",))
+    counter.inc(1, (2131,))
+    counter.inc(2, (2131,))
+    registry.gauge("queue_length", "Queue", lambda: 7)
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value)
+    request = FakeRequest()
+    text = MetricsResource(registry).render_GET(request).decode()
+    assert request.headers[b"content-type"].startswith(b"text/plain")
+    lines = text.splitlines()
+    assert "# TYPE messages counter" in lines and 'messages_total{payload_type="2131"} 3' in lines
+    assert "queue_length 7" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines and 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_count 3" in lines
+    assert registry.collect()["messages"] == {(2131,): 3}
+
+
+def test_client_metrics():
+    client = Client("localhost", 5035, TcpProtocol)
+    event = ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1)
+    client._received(ProtoMessage(payloadType=event.payloadType, payload=event.SerializeToString()))
+    deferred = client.send(ProtoOASpotEvent(), responseTimeoutInSeconds=5)
+    metrics = client.metrics.collect()
+    assert metrics["ctrader_received_messages"] == {(event.payloadType,): 1}
+    assert metrics["ctrader_pending_responses"] == 1 and metrics["ctrader_send_queue_length"] == 0
+    deferred.addErrback(lambda failure: None)
+    deferred.errback(defer.TimeoutError())
+    assert len(client._responseDeferreds) == 0
+    assert client.metrics.get("ctrader_response_timeouts").getValue() == 1
+    client.liveness._addRttSample(20)
+    assert client.metrics.get("ctrader_response_time_seconds").count == 1
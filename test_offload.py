@@ -0,0 +1,56 @@
+"""Tests for the process pool offloader."""
+
+from concurrent import futures
+
+from twisted.internet import task
+
+from ctrader_open_api import Offloader, StaleResultError
+
+
+class ThreadlessClock(task.Clock):
+    def callFromThread(self, function, *args):
+        function(*args)
+
+
+class ManualExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, *args):
+        future = futures.Future()
+        self.submitted.append((future, function, args))
+        return future
+
+    def complete(self, index=0):
+        future, function, args = self.submitted.pop(index)
+        future.set_result(function(*args))
+
+    def shutdown(self, wait=False):
+        pass
+
+
+def test_one_evaluation_per_key_and_deadlines():
+    clock = ThreadlessClock()
+    executor = ManualExecutor()
+    offloader = Offloader(executor, clock=clock)
+    results, failures = [], []
+    offloader.submit("EURUSD", sum, [1, 2]).addCallback(results.append)
+    offloader.submit("EURUSD", sum, [3, 4]).addErrback(failures.append)
+    offloader.submit("EURUSD", sum, [5, 6], deadlineInSeconds=1).addCallbacks(results.append, failures.append)
+    assert len(executor.submitted) == 1 and offloader.replacedCount == 1
+    executor.complete()
+    assert results == [3] and len(executor.submitted) == 1
+    clock.advance(2)
+    executor.complete()
+    assert results == [3] and offloader.staleCount == 1
+    assert [failure.check(StaleResultError) for failure in failures] == [StaleResultError, StaleResultError]
+    assert not offloader.isBusy("EURUSD")
+
+
+def test_process_pool():
+    offloader = Offloader(maxWorkers=1, clock=ThreadlessClock())
+    results = []
+    deferred = offloader.submit("sum", sum, [1, 2, 3])
+    offloader.executor.shutdown(wait=True)
+    deferred.addCallback(results.append)
+    assert results == [6]
@@ -0,0 +1,33 @@
+"""Tests for the local PnL engine."""
+
+from ctrader_open_api import AccountState, PnlEngine
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAReconcileRes
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOALightSymbol, ProtoOAPosition, ProtoOATradeSide
+
+
+def makePosition(positionId, symbolId, volume, tradeSide, price):
+    position = ProtoOAPosition(positionId=positionId, positionStatus=1, swap=0, price=price)
+    position.tradeData.symbolId = symbolId
+    position.tradeData.volume = volume
+    position.tradeData.tradeSide = tradeSide
+    return position
+
+
+def test_pnl_with_conversion():
+    state = AccountState(1)
+    state.loadReconcile(ProtoOAReconcileRes(ctidTraderAccountId=1, position=[
+        makePosition(1, 1, 100000, ProtoOATradeSide.BUY, 1.1),
+        makePosition(2, 1, 50000, ProtoOATradeSide.SELL, 1.2),
+        makePosition(3, 3, 100000, ProtoOATradeSide.BUY, 150.0),
+    ]))
+    usd, eur, jpy = 1, 2, 3
+    engine = PnlEngine(state, depositAssetId=usd)
+    engine.setSymbols([ProtoOALightSymbol(symbolId=1, baseAssetId=eur, quoteAssetId=usd),
+                       ProtoOALightSymbol(symbolId=3, baseAssetId=usd, quoteAssetId=jpy)])
+    engine.setConversionChain(jpy, [ProtoOALightSymbol(symbolId=3, baseAssetId=usd, quoteAssetId=jpy)])
+    assert engine.getUnrealizedPnl() is None
+    engine.setQuote(1, 1.15, 1.15)
+    engine.setQuote(3, 151.0, 151.0)
+    assert round(engine.getSymbolPnl(1), 6) == 50.0 + 25.0
+    assert round(engine.getPositionPnl(3), 6) == round(1000 / 151.0, 6)
+    assert round(engine.getUnrealizedPnl(), 6) == round(75.0 + 1000 / 151.0, 6)
@@ -0,0 +1,72 @@
+"""Tests for the receive pipeline stage profiler."""
+
+from ctrader_open_api import Client, TcpProtocol
+from ctrader_open_api.profiler import StageProfiler, SessionRecorder, replay, main
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent, ProtoOAVersionRes
+
+
+class FakeClient:
+    def __init__(self):
+        self.listeners = []
+
+    def addMessageListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeMessageListener(self, listener):
+        self.listeners.remove(listener)
+
+    def receive(self, event, clientMsgId=None):
+        message = ProtoMessage(payloadType=event.payloadType, payload=event.SerializeToString(), clientMsgId=clientMsgId)
+        for listener in list(self.listeners):
+            listener(self, message)
+
+
+def recordSession(path):
+    client = FakeClient()
+    recorder = SessionRecorder(client, path)
+    for bid in range(20):
+        client.receive(ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1, bid=bid))
+    client.receive(ProtoOAVersionRes(version="1"), clientMsgId="~1")
+    recorder.stop()
+    assert not client.listeners
+
+
+def onSpot(client, message):
+    pass
+
+
+def setup(client):
+    client.addMessageListener(onSpot)
+
+
+def test_replay_records_each_stage_per_payload_type(tmp_path):
+    path = tmp_path / "session.bin"
+    recordSession(path)
+    client = Client("localhost", 5035, TcpProtocol)
+    responses = []
+    client.send(ProtoOAVersionRes(), clientMsgId="~1").addBoth(responses.append)
+    setup(client)
+    profiler = StageProfiler()
+    replay(path, client, profiler, chunkSizeInBytes=100)
+    spotType, versionType = ProtoOASpotEvent().payloadType, ProtoOAVersionRes().payloadType
+    assert profiler.stats[(spotType, "parse")][0] == 20
+    assert profiler.stats[(spotType, "dispatch")][0] == 20
+    assert profiler.stats[(spotType, "listener onSpot")][0] == 20
+    assert profiler.stats[(versionType, "response")][0] == 1 and len(responses) == 1
+    assert profiler.stats[(0, "frame")][0] > 1
+    report = profiler.formatReport()
+    assert "ProtoOASpotEvent" in report and "listener onSpot" in report
+
+
+def test_sampling_and_cli(tmp_path, capsys):
+    path = tmp_path / "session.bin"
+    recordSession(path)
+    client = Client("localhost", 5035, TcpProtocol)
+    profiler = StageProfiler(sampleEvery=2, trackAllocations=False)
+    replay(path, client, profiler, chunkSizeInBytes=30)
+    frames = profiler.stats[(0, "frame")][0]
+    assert 0 < profiler.stats[(ProtoOASpotEvent().payloadType, "parse")][0] < 20
+    assert frames == profiler._chunksCount // 2
+    main([str(path), "--setup", "test_profiler:setup"])
+    assert "listener onSpot" in capsys.readouterr().out
@@ -0,0 +1,53 @@
+"""Tests for protobuf backend detection and the fast mode switch."""
+
+import os
+import subprocess
+import sys
+import warnings
+
+from ctrader_open_api import Client, TcpProtocol
+from ctrader_open_api.protobufBackend import ProtobufBackend, SlowProtobufWarning
+
+
+def runPython(code, environment=None):
+    env = {key: value for key, value in os.environ.items() if key != ProtobufBackend.ENVIRONMENT_VARIABLE}
+    env.update(environment or {})
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env).stdout.split()
+
+
+def test_detection():
+    assert ProtobufBackend.getActive() in (ProtobufBackend.PYTHON, ProtobufBackend.CPP, ProtobufBackend.UPB)
+    assert ProtobufBackend.isSelected()
+    assert ProtobufBackend.getAvailable()[-1] == ProtobufBackend.PYTHON
+    client = Client("localhost", 5035, TcpProtocol)
+    assert client.protobufBackend == ProtobufBackend.getActive()
+    assert client.metrics.collect()["ctrader_protobuf_accelerated"] == int(ProtobufBackend.isAccelerated())
+
+
+def test_enable_fast_mode_before_protobuf_is_imported():
+    code = ("from ctrader_open_api.protobufBackend import ProtobufBackend; import sys; "
+            "print(ProtobufBackend.isSelected()); selected = ProtobufBackend.enableFastMode(); "
+            "from ctrader_open_api import Client; print(selected, ProtobufBackend.getActive(), ProtobufBackend.getAvailable()[0])")
+    isSelected, selected, active, fastest = runPython(code)
+    assert isSelected == "False"
+    assert selected == active == fastest
+    # Once protobuf is imported the backend can't change
+    code = ("from ctrader_open_api import Client; from ctrader_open_api.protobufBackend import ProtobufBackend; "
+            "print(ProtobufBackend.enableFastMode())")
+    assert runPython(code, {ProtobufBackend.ENVIRONMENT_VARIABLE: "python"}) == ["python"]
+
+
+def test_warns_once_when_slow(monkeypatch):
+    monkeypatch.setattr(ProtobufBackend, "_isWarned", False)
+    monkeypatch.setattr(ProtobufBackend, "getActive", classmethod(lambda cls: cls.PYTHON))
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        ProtobufBackend.warnIfSlow()
+        ProtobufBackend.warnIfSlow()
+    assert [warning.category for warning in caught] == [SlowProtobufWarning]
+    monkeypatch.setattr(ProtobufBackend, "_isWarned", False)
+    monkeypatch.setattr(ProtobufBackend, "getActive", classmethod(lambda cls: cls.UPB))
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        ProtobufBackend.warnIfSlow()
+    assert caught == []
@@ -0,0 +1,85 @@
+"""Tests for the Server-Sent Events push gateway."""
+
+import json
+
+from twisted.internet import defer
+
+from ctrader_open_api import PushGateway
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent, ProtoOADepthEvent, ProtoOAExecutionEvent
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOADepthQuote
+
+
+class FakeClient:
+    def __init__(self):
+        self.listeners = []
+
+    def addMessageListener(self, listener):
+        self.listeners.append(listener)
+
+    def receive(self, payload):
+        message = ProtoMessage(payloadType=payload.payloadType, payload=payload.SerializeToString())
+        for listener in self.listeners:
+            listener(self, message)
+
+
+class FakeRequest:
+    channel = object()
+
+    def __init__(self, symbols=b""):
+        self.args = {b"symbols": [symbols]}
+        self.written = []
+        self.finished = defer.Deferred()
+        self.isConnectionLost = False
+
+    def setHeader(self, name, value):
+        pass
+
+    def registerProducer(self, producer, streaming):
+        self.producer = producer
+
+    def unregisterProducer(self):
+        self.producer = None
+
+    def notifyFinish(self):
+        return self.finished
+
+    def write(self, data):
+        self.written.append(data)
+
+    def loseConnection(self):
+        self.isConnectionLost = True
+
+    def getEvents(self):
+        events = []
+        for data in self.written[1:]:
+            name, payload = data.decode().strip().split("\n")
+            events.append((name[len("event: "):], json.loads(payload[len("data: "):])))
+        return events
+
+
+def test_fan_out_and_conflation():
+    client = FakeClient()
+    gateway = PushGateway(client, maxQueuedEvents=1)
+    fast, slow = FakeRequest(), FakeRequest(b"1")
+    gateway.render_GET(fast)
+    gateway.render_GET(slow)
+    client.receive(ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=2, bid=5))
+    slow.producer.pauseProducing()
+    client.receive(ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1, bid=10, ask=12))
+    client.receive(ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1, ask=13))
+    client.receive(ProtoOADepthEvent(ctidTraderAccountId=1, symbolId=1, newQuotes=[ProtoOADepthQuote(id=1, size=100, bid=10)]))
+    client.receive(ProtoOADepthEvent(ctidTraderAccountId=1, symbolId=1, deletedQuotes=[1, 2]))
+    client.receive(ProtoOAExecutionEvent(ctidTraderAccountId=1, executionType=2))
+    assert len(fast.getEvents()) == 6 and slow.getEvents() == []
+    assert gateway.getConflatedCount() == 2
+    slow.producer.resumeProducing()
+    assert slow.getEvents() == [("ProtoOAExecutionEvent", {"ctidTraderAccountId": "1", "executionType": "ORDER_ACCEPTED"}),
+                                ("depth", {"symbolId": 1, "new": [], "deleted": [1, 2]}),
+                                ("spot", {"symbolId": 1, "bid": 10, "ask": 13, "timestamp": 0})]
+    slow.producer.pauseProducing()
+    client.receive(ProtoOAExecutionEvent(ctidTraderAccountId=1, executionType=2))
+    client.receive(ProtoOAExecutionEvent(ctidTraderAccountId=1, executionType=2))
+    assert slow.isConnectionLost and gateway.slowConsumersCount == 1
+    slow.finished.callback(None)
+    assert len(gateway.subscribers) == 1
@@ -0,0 +1,117 @@
+"""Tests for the read-only response cache."""
+
+from twisted.internet import defer, task
+
+from ctrader_open_api.responseCache import ResponseCache
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (ProtoOASymbolsListReq, ProtoOASymbolsListRes, ProtoOATraderReq,
+                                                          ProtoOATraderRes, ProtoOAErrorRes, ProtoOANewOrderReq, ProtoOASymbolChangedEvent)
+
+
+class FakeClient:
+    def __init__(self):
+        self.pending = []
+        self.listeners = []
+
+    def send(self, message, clientMsgId=None, **kwargs):
+        deferred = defer.Deferred()
+        self.pending.append((message, deferred, clientMsgId))
+        return deferred
+
+    def addMessageListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeMessageListener(self, listener):
+        self.listeners.remove(listener)
+
+    def receive(self, message):
+        for listener in list(self.listeners):
+            listener(self, message)
+
+
+def toMessage(message):
+    return ProtoMessage(payloadType=message.payloadType, payload=message.SerializePartialToString())
+
+
+def symbolsListReq(accountId=1):
+    return ProtoOASymbolsListReq(ctidTraderAccountId=accountId)
+
+
+def test_single_flight_and_ttl():
+    client = FakeClient()
+    clock = task.Clock()
+    cache = ResponseCache(client, clock=clock)
+    results = []
+    cache.send(symbolsListReq()).addCallback(results.append)
+    cache.send(symbolsListReq()).addCallback(results.append)
+    assert len(client.pending) == 1
+    response = toMessage(ProtoOASymbolsListRes(ctidTraderAccountId=1))
+    client.pending[0][1].callback(response)
+    assert results == [response, response]
+    cache.send(symbolsListReq()).addCallback(results.append)
+    cache.send(symbolsListReq(2))
+    assert len(client.pending) == 2 and results[2] is response
+    assert (cache.hitsCount, cache.mergedCount, cache.missesCount, cache.savedRequestsCount) == (1, 1, 2, 2)
+    assert cache.getHitRatio() == 0.5
+    clock.advance(cache.DEFAULT_TTLS_IN_SECONDS[ProtoOASymbolsListReq().payloadType] + 1)
+    cache.send(symbolsListReq())
+    assert len(client.pending) == 3
+
+
+def test_uncached_types_errors_and_failures_are_not_cached():
+    client = FakeClient()
+    cache = ResponseCache(client, clock=task.Clock())
+    cache.send(ProtoOANewOrderReq())
+    cache.send(ProtoOANewOrderReq())
+    assert len(client.pending) == 2
+    cache.send(ProtoOATraderReq(ctidTraderAccountId=1))
+    client.pending[-1][1].callback(toMessage(ProtoOAErrorRes(errorCode="ERROR")))
+    failures = []
+    cache.send(ProtoOATraderReq(ctidTraderAccountId=1)).addErrback(failures.append)
+    client.pending[-1][1].errback(defer.TimeoutError())
+    assert len(client.pending) == 4 and failures[0].check(defer.TimeoutError)
+    assert len(cache) == 0
+    cache.send(ProtoOATraderReq(ctidTraderAccountId=1), clientMsgId="trader")
+    cache.send(ProtoOATraderReq(ctidTraderAccountId=1), clientMsgId="trader")
+    assert len(client.pending) == 6 and client.pending[-1][2] == "trader"
+    client.pending[-1][1].callback(toMessage(ProtoOATraderRes(ctidTraderAccountId=1)))
+    assert len(cache) == 0
+
+
+def test_lru_eviction_by_size():
+    client = FakeClient()
+    cache = ResponseCache(client, maxSizeInBytes=20, clock=task.Clock())
+    for accountId in (1, 2, 3):
+        cache.send(ProtoOATraderReq(ctidTraderAccountId=accountId))
+        client.pending[-1][1].callback(toMessage(ProtoOATraderRes(ctidTraderAccountId=accountId)))
+        if accountId == 2:
+            cache.send(ProtoOATraderReq(ctidTraderAccountId=1))
+    assert cache.sizeInBytes <= 20 and cache.evictionsCount == 1
+    cache.send(ProtoOATraderReq(ctidTraderAccountId=1))
+    cache.send(ProtoOATraderReq(ctidTraderAccountId=2))
+    assert len(client.pending) == 4
+
+
+def test_symbol_changed_event_invalidates_account_entries():
+    client = FakeClient()
+    cache = ResponseCache(client, clock=task.Clock())
+    for accountId in (1, 2):
+        cache.send(symbolsListReq(accountId))
+        client.pending[-1][1].callback(toMessage(ProtoOASymbolsListRes(ctidTraderAccountId=accountId)))
+    cache.send(ProtoOATraderReq(ctidTraderAccountId=1))
+    client.pending[-1][1].callback(toMessage(ProtoOATraderRes(ctidTraderAccountId=1)))
+    client.receive(toMessage(ProtoOASymbolChangedEvent(ctidTraderAccountId=1, symbolId=[5])))
+    assert cache.invalidationsCount == 1 and len(cache) == 2
+    cache.send(symbolsListReq(1))
+    client.receive(toMessage(ProtoOASymbolChangedEvent(ctidTraderAccountId=1, symbolId=[5])))
+    client.pending[-1][1].callback(toMessage(ProtoOASymbolsListRes(ctidTraderAccountId=1)))
+    assert len(cache) == 2
+    cache.send(symbolsListReq(1))
+    assert len(client.pending) == 5
+    # An invalidation of another account doesn't stop caching the response
+    cache.send(ProtoOATraderReq(ctidTraderAccountId=2))
+    client.receive(toMessage(ProtoOASymbolChangedEvent(ctidTraderAccountId=1, symbolId=[5])))
+    client.pending[-1][1].callback(toMessage(ProtoOATraderRes(ctidTraderAccountId=2)))
+    assert len(cache) == 3
+    cache.stop()
+    assert not client.listeners
@@ -0,0 +1,51 @@
+"""Tests for the pre-trade risk gate."""
+
+from twisted.internet import defer, task
+
+from ctrader_open_api import AccountState, RiskCheckError, RiskGate, SymbolLimits
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOANewOrderReq
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOAOrderType, ProtoOATradeSide
+
+
+class FakeClient:
+    def __init__(self):
+        self.sent = []
+
+    def addMessageListener(self, listener):
+        pass
+
+    def send(self, message, **kwargs):
+        self.sent.append(message)
+        return defer.Deferred()
+
+
+def makeOrder(volume, tradeSide=ProtoOATradeSide.BUY, limitPrice=None):
+    order = ProtoOANewOrderReq(ctidTraderAccountId=1, symbolId=1, orderType=ProtoOAOrderType.MARKET, tradeSide=tradeSide, volume=volume)
+    if limitPrice is not None:
+        order.orderType = ProtoOAOrderType.LIMIT
+        order.limitPrice = limitPrice
+    return order
+
+
+def rejection(deferred):
+    failures = []
+    deferred.addErrback(failures.append)
+    return failures[0].value if failures else None
+
+
+def test_limits():
+    client = FakeClient()
+    clock = task.Clock()
+    gate = RiskGate(client, AccountState(1), maxOrdersPerSecond=3, clock=clock)
+    gate.setSymbolLimits(1, SymbolLimits(maxPositionVolume=1000, maxOrderVolume=600, maxPriceDeviation=0.01))
+    gate.setQuote(1, 1.0999, 1.1)
+    assert rejection(gate.send(makeOrder(600))) is None
+    assert "volume" in rejection(gate.send(makeOrder(700))).reason
+    assert isinstance(rejection(gate.send(makeOrder(600))), RiskCheckError)
+    assert rejection(gate.send(makeOrder(600, ProtoOATradeSide.SELL))) is None
+    assert "price" in rejection(gate.send(makeOrder(100, limitPrice=1.2))).reason
+    assert rejection(gate.send(makeOrder(100, limitPrice=1.1))) is None
+    assert "per second" in rejection(gate.send(makeOrder(100))).reason
+    clock.advance(1)
+    assert rejection(gate.send(makeOrder(100))) is None
+    assert len(client.sent) == 4
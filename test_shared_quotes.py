@@ -0,0 +1,58 @@
+"""Tests for the shared memory quote rings."""
+
+import multiprocessing
+
+from ctrader_open_api import QuoteRing, SharedQuotePublisher
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent, ProtoOADepthEvent
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOADepthQuote
+
+
+class FakeClient:
+    def __init__(self):
+        self.listeners = []
+
+    def addMessageListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeMessageListener(self, listener):
+        self.listeners.remove(listener)
+
+    def receive(self, payload):
+        message = ProtoMessage(payloadType=payload.payloadType, payload=payload.SerializeToString())
+        for listener in self.listeners:
+            listener(self, message)
+
+
+def readInChild(name, afterSequence, queue):
+    ring = QuoteRing.attach(name)
+    records, lastSequence = ring.read(afterSequence)
+    queue.put((records, lastSequence, ring.overrunCount))
+    ring.close()
+
+
+def test_publish_and_read_from_other_process():
+    client = FakeClient()
+    publisher = SharedQuotePublisher(client, {"majors": [1, 2]}, capacity=4)
+    try:
+        client.receive(ProtoOASpotEvent(ctidTraderAccountId=9, symbolId=3, bid=1))
+        client.receive(ProtoOASpotEvent(ctidTraderAccountId=9, symbolId=1, bid=110000, ask=110002, timestamp=5))
+        client.receive(ProtoOADepthEvent(ctidTraderAccountId=9, symbolId=2, deletedQuotes=[4],
+                                         newQuotes=[ProtoOADepthQuote(id=7, size=100, bid=120000)]))
+        ring = publisher.rings["majors"]
+        assert ring.getWriteSequence() == 3
+        records, lastSequence = ring.read(0)
+        assert records[0] == (1, QuoteRing.SPOT, 1, 110000, 110002, 5, 0)
+        assert [record[1] for record in records] == [QuoteRing.SPOT, QuoteRing.DEPTH_NEW, QuoteRing.DEPTH_DELETED]
+        for bid in range(3):
+            client.receive(ProtoOASpotEvent(ctidTraderAccountId=9, symbolId=1, bid=bid + 1))
+        queue = multiprocessing.get_context("spawn").Queue()
+        process = multiprocessing.get_context("spawn").Process(target=readInChild, args=(ring.name, lastSequence, queue))
+        process.start()
+        records, lastSequence, overrunCount = queue.get(timeout=10)
+        process.join()
+        assert [record[3] for record in records] == [1, 2, 3] and lastSequence == 6 and overrunCount == 0
+        records, _ = ring.read(0)
+        assert len(records) == 4 and ring.overrunCount == 2
+    finally:
+        publisher.stop()
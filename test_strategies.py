@@ -0,0 +1,61 @@
+"""Tests for the StrategyManager of the Tkinter sample."""
+
+import os
+import sys
+
+from twisted.internet import defer, task
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples", "TkinterGUISample"))
+from strategies import StrategyManager
+from ctrader_open_api import EventLog
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAOrderErrorEvent
+
+
+class FakeClient:
+    def __init__(self):
+        self.sent = []
+        self.deferreds = []
+
+    def send(self, message):
+        self.sent.append(message)
+        self.deferreds.append(defer.Deferred())
+        return self.deferreds[-1]
+
+
+class FakeOffloader:
+    def __init__(self):
+        self.deferreds = []
+
+    def submit(self, key, function, *args, deadlineInSeconds=None):
+        self.deferreds.append(defer.Deferred())
+        return self.deferreds[-1]
+
+
+def test_signals_of_a_stopped_run_are_dropped():
+    client, offloader, logs = FakeClient(), FakeOffloader(), []
+    manager = StrategyManager(client=client, account_id=1, log=logs.append, offloader=offloader, clock=task.Clock())
+    manager.start("safe", "EURUSD")
+    manager.stop()
+    offloader.deferreds[0].callback("BUY")
+    assert client.sent == [] and logs[-1] == "Dropped EURUSD signal of a stopped strategy"
+    # A signal of the previous run arriving after a restart is dropped too
+    manager.start("aggressive", "EURUSD")
+    manager.start("safe", "GBPUSD")
+    offloader.deferreds[1].callback("SELL")
+    assert client.sent == []
+    offloader.deferreds[2].callback("SELL")
+    assert len(client.sent) == 1 and client.sent[0].symbolId == 2
+
+
+def test_orders_are_recorded_in_the_event_log():
+    client, offloader, logs = FakeClient(), FakeOffloader(), []
+    event_log = EventLog(level=EventLog.INFO, clock=task.Clock())
+    manager = StrategyManager(client=client, account_id=1, log=logs.append, offloader=offloader, clock=task.Clock(), event_log=event_log)
+    manager.start("safe", "EURUSD")
+    offloader.deferreds[0].callback("BUY")
+    error = ProtoOAOrderErrorEvent(ctidTraderAccountId=1, errorCode="NOT_ENOUGH_MONEY")
+    client.deferreds[0].callback(ProtoMessage(payloadType=error.payloadType, payload=error.SerializePartialToString()))
+    kinds = [(record[2], record[3], record[5], record[6]) for record in event_log.getRecords()]
+    assert kinds == [(EventLog.SIGNAL, 0, 1, 1), (EventLog.ORDER_SENT, 0, 1, 1000), (EventLog.ORDER_FAILED, error.payloadType, 1, 0)]
+    assert logs == ["Executing safe strategy on EURUSD"]
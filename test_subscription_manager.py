@@ -0,0 +1,39 @@
+"""Tests for the batching subscription manager."""
+
+from twisted.internet import defer, task
+
+from ctrader_open_api import SubscriptionManager
+from ctrader_open_api.timingWheel import TimingWheel
+
+
+class FakeClient:
+    def __init__(self):
+        self.sent = []
+        self.timingWheel = None
+
+    def addMessageListener(self, listener):
+        pass
+
+    def send(self, message, **kwargs):
+        self.sent.append(message)
+        return defer.succeed(None)
+
+
+def test_batches_and_reference_counts():
+    client = FakeClient()
+    clock = task.Clock()
+    manager = SubscriptionManager(client, 1, clock=clock, timingWheel=TimingWheel(clock=clock))
+    manager.subscribeSpots(range(1, 301))
+    manager.subscribeSpots([5])
+    manager.subscribeDepth([7])
+    manager.unsubscribeDepth([7])
+    clock.advance(0.05)
+    assert len(client.sent) == 1
+    assert list(client.sent[0].symbolId) == list(range(1, 301))
+    manager.unsubscribeSpots([5, 6])
+    clock.advance(0.05)
+    assert list(client.sent[1].symbolId) == [6]
+    assert 5 in manager.getSubscribedSpots()
+    manager.unsubscribeSpotsLater(range(1, 301), 1)
+    clock.pump([0.1] * 12)
+    assert list(client.sent[2].symbolId) == [i for i in range(1, 301) if i != 6]
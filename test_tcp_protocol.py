@@ -0,0 +1,83 @@
+"""Tests for the TcpProtocol send queue."""
+
+from collections import deque
+
+from ctrader_open_api import TcpProtocol
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAAmendPositionSLTPReq, ProtoOAAmendOrderReq, ProtoOAVersionReq
+
+
+class FakeFactory:
+    numberOfMessagesToSendPerSecond = 5
+    heartbeatIntervalInSeconds = 20
+    coalesceAmendments = True
+
+    def __init__(self):
+        self.superseded_ids = []
+        self.canceled_ids = []
+
+    def sent(self, clientMsgId):
+        pass
+
+    def canceled(self, clientMsgId):
+        self.canceled_ids.append(clientMsgId)
+
+    def superseded(self, clientMsgId, supersedingClientMsgId):
+        self.superseded_ids.append((clientMsgId, supersedingClientMsgId))
+
+
+class RecordingProtocol(TcpProtocol):
+    def __init__(self):
+        self._send_queue = deque()
+        self._coalescing_index = dict()
+        self.factory = FakeFactory()
+        self.strings = []
+
+    def sendString(self, data):
+        self.strings.append(data)
+
+
+def test_amendments_are_coalesced():
+    protocol = RecordingProtocol()
+    protocol.send(ProtoOAAmendPositionSLTPReq(ctidTraderAccountId=1, positionId=9, stopLoss=1.1), clientMsgId="a")
+    protocol.send(ProtoOAVersionReq(), clientMsgId="b")
+    protocol.send(ProtoOAAmendPositionSLTPReq(ctidTraderAccountId=1, positionId=9, stopLoss=1.2), clientMsgId="c")
+    protocol.send(ProtoOAAmendPositionSLTPReq(ctidTraderAccountId=1, positionId=8, stopLoss=1.3), clientMsgId="d")
+    assert protocol.factory.superseded_ids == [("a", "c")]
+    protocol._sendStrings()
+    sent = [ProtoMessage.FromString(data).clientMsgId for data in protocol.strings]
+    assert sent == ["c", "b", "d"]
+    assert not protocol._coalescing_index
+
+
+def test_raw_messages_and_protocols_are_not_shared():
+    protocol, other = RecordingProtocol(), RecordingProtocol()
+    amend = ProtoOAAmendPositionSLTPReq(ctidTraderAccountId=1, positionId=9, stopLoss=1.1)
+    protocol.send(ProtoMessage(payloadType=amend.payloadType, payload=amend.SerializeToString()), clientMsgId="a")
+    protocol.send(amend, clientMsgId="b")
+    other.send(amend, clientMsgId="c")
+    assert protocol.factory.superseded_ids == [] and other.factory.superseded_ids == []
+    assert len(protocol._send_queue) == 2 and len(other._send_queue) == 1
+
+
+def test_canceled_messages_are_reported():
+    protocol = RecordingProtocol()
+    protocol.send(ProtoOAVersionReq(), clientMsgId="a", isCanceled=lambda: True)
+    protocol.send(ProtoOAVersionReq(), clientMsgId="b", isCanceled=lambda: False)
+    protocol._sendStrings()
+    assert protocol.factory.canceled_ids == ["a"] and len(protocol.strings) == 1
+
+
+def test_coalesced_amendments_keep_fields_of_both():
+    protocol = RecordingProtocol()
+    protocol.send(ProtoOAAmendPositionSLTPReq(ctidTraderAccountId=1, positionId=9, stopLoss=1.1), clientMsgId="a")
+    protocol.send(ProtoOAAmendPositionSLTPReq(ctidTraderAccountId=1, positionId=9, takeProfit=1.5), clientMsgId="b")
+    protocol.send(ProtoOAAmendOrderReq(ctidTraderAccountId=1, orderId=7, volume=100000, limitPrice=1.2), clientMsgId="c")
+    protocol.send(ProtoOAAmendOrderReq(ctidTraderAccountId=1, orderId=7, limitPrice=1.3, stopLoss=1.1), clientMsgId="d")
+    protocol._sendStrings()
+    messages = [ProtoMessage.FromString(data) for data in protocol.strings]
+    assert [message.clientMsgId for message in messages] == ["b", "d"]
+    position = ProtoOAAmendPositionSLTPReq.FromString(messages[0].payload)
+    assert (position.stopLoss, position.takeProfit) == (1.1, 1.5)
+    order = ProtoOAAmendOrderReq.FromString(messages[1].payload)
+    assert (order.volume, order.limitPrice, order.stopLoss) == (100000, 1.3, 1.1)
@@ -0,0 +1,45 @@
+"""Tests for the hierarchical timing wheel."""
+
+from twisted.internet import defer, task
+
+from ctrader_open_api.timingWheel import TimingWheel
+
+
+def test_cascades_long_delays_and_cancels():
+    clock = task.Clock()
+    wheel = TimingWheel(tickInSeconds=1, wheelSize=4, levels=2, clock=clock)
+    fired = []
+    wheel.callLater(3, fired.append, "short")
+    wheel.callLater(13, fired.append, "long")
+    wheel.callLater(100, fired.append, "overflow")
+    wheel.callLater(6, fired.append, "canceled").cancel()
+    clock.pump([1] * 12)
+    assert fired == ["short"]
+    clock.advance(1)
+    assert fired == ["short", "long"]
+    clock.pump([1] * 86)
+    assert fired == ["short", "long"]
+    clock.advance(1)
+    assert fired == ["short", "long", "overflow"]
+    assert len(wheel) == 0 and not clock.getDelayedCalls()
+
+
+def test_call_with_backoff():
+    clock = task.Clock()
+    wheel = TimingWheel(tickInSeconds=0.5, clock=clock)
+    attempts = []
+    results = []
+
+    def function():
+        attempts.append(clock.seconds())
+        if len(attempts) < 3:
+            return defer.fail(defer.TimeoutError())
+        return defer.succeed("done")
+
+    wheel.callWithBackoff(function, maxAttempts=3, initialDelayInSeconds=1).addCallback(results.append)
+    clock.pump([0.5] * 6)
+    assert attempts == [0, 1, 3]
+    assert results == ["done"]
+    failures = []
+    wheel.callWithBackoff(lambda: defer.fail(ValueError()), retryOn=(defer.TimeoutError,)).addErrback(failures.append)
+    assert failures[0].check(ValueError)
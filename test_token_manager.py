@@ -0,0 +1,112 @@
+"""Tests for the token manager."""
+
+from twisted.internet import defer, task
+
+from ctrader_open_api import AccountRouter, TokenManager
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (ProtoOARefreshTokenReq, ProtoOARefreshTokenRes, ProtoOAErrorRes, ProtoOAAccountAuthReq,
+                                                          ProtoOAAccountAuthRes, ProtoOAAccountsTokenInvalidatedEvent)
+
+
+class FakeAuth:
+    def __init__(self):
+        self.refreshed = []
+
+    def refreshTokenAsync(self, refreshToken):
+        self.refreshed.append(refreshToken)
+        return defer.succeed({"accessToken": f"access-{len(self.refreshed)}", "refreshToken": f"refresh-{len(self.refreshed)}", "expiresIn": 1000})
+
+
+class FakeClient:
+    isConnected = True
+
+    def __init__(self):
+        self.listeners = []
+        self.pending = []
+
+    def addMessageListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeMessageListener(self, listener):
+        self.listeners.remove(listener)
+
+    def send(self, message, **kwargs):
+        deferred = defer.Deferred()
+        self.pending.append((message, deferred))
+        return deferred
+
+    def receive(self, payload):
+        message = toMessage(payload)
+        for listener in list(self.listeners):
+            listener(self, message)
+
+
+def toMessage(payload):
+    return ProtoMessage(payloadType=payload.payloadType, payload=payload.SerializePartialToString())
+
+
+def refreshTokenRes(number):
+    return toMessage(ProtoOARefreshTokenRes(accessToken=f"access-{number}", refreshToken=f"refresh-{number}", expiresIn=1000, tokenType="bearer"))
+
+
+def test_refreshes_before_expiry():
+    clock = task.Clock()
+    auth = FakeAuth()
+    manager = TokenManager(auth, refreshBeforeExpiryInSeconds=100, clock=clock)
+    refreshedTokens = []
+    manager.addTokenRefreshedCallback(lambda m: refreshedTokens.append(m.accessToken))
+    manager.setToken({"accessToken": "access-0", "refreshToken": "refresh-0", "expiresIn": 1000})
+    clock.advance(899)
+    assert auth.refreshed == []
+    clock.advance(1)
+    assert auth.refreshed == ["refresh-0"]
+    assert manager.accessToken == "access-1"
+    assert refreshedTokens == ["access-0", "access-1"]
+    assert manager.getSecondsToExpiry() == 1000
+
+
+def test_socket_refresh_and_concurrent_refreshes_are_merged():
+    client, auth = FakeClient(), FakeAuth()
+    manager = TokenManager(auth, client, clock=task.Clock())
+    manager.setToken({"accessToken": "access-0", "refreshToken": "refresh-0", "expiresIn": 1000})
+    results = []
+    manager.refresh().addCallback(results.append)
+    manager.refresh().addCallback(results.append)
+    assert len(client.pending) == 1 and auth.refreshed == []
+    request, deferred = client.pending[0]
+    assert isinstance(request, ProtoOARefreshTokenReq) and request.refreshToken == "refresh-0"
+    deferred.callback(refreshTokenRes(1))
+    assert results == ["access-1", "access-1"]
+    assert (manager.accessToken, manager.refreshToken, manager.getSecondsToExpiry()) == ("access-1", "refresh-1", 1000)
+    failures = []
+    manager.refresh().addErrback(failures.append)
+    client.pending[-1][1].callback(toMessage(ProtoOAErrorRes(errorCode="INVALID_REQUEST")))
+    assert failures[0].check(ValueError) and manager.accessToken == "access-1"
+    # Without a connection the token is refreshed with the auth REST API
+    client.isConnected = False
+    manager.refresh()
+    assert len(client.pending) == 2 and auth.refreshed == ["refresh-1"]
+
+
+def test_token_invalidated_event_refreshes_and_reauthorizes_accounts():
+    client = FakeClient()
+    manager = TokenManager(FakeAuth(), client, clock=task.Clock())
+    manager.setToken({"accessToken": "access-0", "refreshToken": "refresh-0", "expiresIn": 1000})
+    router = AccountRouter(client, tokenManager=manager)
+    router.authorizeAccounts([11, 22])
+    for request, deferred in list(client.pending):
+        deferred.callback(toMessage(ProtoOAAccountAuthRes(ctidTraderAccountId=request.ctidTraderAccountId)))
+    client.pending.clear()
+    client.receive(ProtoOAAccountsTokenInvalidatedEvent(ctidTraderAccountIds=[22], reason="expired"))
+    # A second event while the refresh is waiting for its response doesn't send another request
+    client.receive(ProtoOAAccountsTokenInvalidatedEvent(ctidTraderAccountIds=[22], reason="expired"))
+    assert router.authorizedAccountIds == {11} and len(client.pending) == 1
+    request, deferred = client.pending.pop()
+    assert isinstance(request, ProtoOARefreshTokenReq)
+    deferred.callback(refreshTokenRes(1))
+    request, deferred = client.pending.pop()
+    assert isinstance(request, ProtoOAAccountAuthReq) and (request.ctidTraderAccountId, request.accessToken) == (22, "access-1")
+    deferred.callback(toMessage(ProtoOAAccountAuthRes(ctidTraderAccountId=22)))
+    assert router.authorizedAccountIds == {11, 22} and not client.pending
+    manager.stop()
+    assert len(client.listeners) == 1